@@ -0,0 +1,143 @@
+"""Content-addressed storage of trajectory payloads.
+
+Screenshots, ui trees and other large step fields are stored once per
+distinct content as zlib-compressed objects under `eval_results/objects/`,
+named by the SHA-256 of their content. Trajectory steps keep a reference in
+their place:
+
+    {"$blob": "<sha256>", "$kind": "bytes" | "json"}
+
+Repeated screenshots and unchanged ui trees, within a run and across tasks,
+share one object. `TrajectoryReader` resolves references when a step is read.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import zlib
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Sequence
+
+logger = logging.getLogger(__name__)
+
+BLOB_KEY = "$blob"
+KIND_KEY = "$kind"
+BYTES = "bytes"
+JSON = "json"
+
+# Step fields whose serialized size exceeds this are stored as blobs.
+DEFAULT_MIN_BLOB_SIZE = 1024
+
+
+class BlobStore:
+    def __init__(self, root: Path | str):
+        self.root = Path(root)
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:]
+
+    def put(self, data: bytes) -> str:
+        """Stores `data` unless already present and returns its hash."""
+        digest = hashlib.sha256(data).hexdigest()
+        path = self.path(digest)
+        if path.exists():
+            return digest
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+        tmp_path.write_bytes(zlib.compress(data))
+        os.replace(tmp_path, path)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        return zlib.decompress(self.path(digest).read_bytes())
+
+    def put_json(self, value: Any) -> str:
+        return self.put(_canonical_json(value))
+
+    def get_json(self, digest: str) -> Any:
+        return json.loads(self.get(digest))
+
+    def __contains__(self, digest: str) -> bool:
+        return self.path(digest).exists()
+
+
+def _canonical_json(value: Any) -> bytes:
+    return json.dumps(value, sort_keys=True, separators=(",", ":")).encode()
+
+
+def is_blob_ref(value: Any) -> bool:
+    return isinstance(value, dict) and BLOB_KEY in value
+
+
+def _externalize_bytes(value: Any, store: BlobStore) -> Any:
+    if isinstance(value, (bytes, bytearray)):
+        return {BLOB_KEY: store.put(bytes(value)), KIND_KEY: BYTES}
+    if isinstance(value, dict):
+        return {key: _externalize_bytes(item, store) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_externalize_bytes(item, store) for item in value]
+    return value
+
+
+def externalize(
+    value: Any, store: BlobStore, min_size: int = DEFAULT_MIN_BLOB_SIZE
+) -> Any:
+    """Stores bytes within `value`, and `value` itself if large, as blobs."""
+    value = _externalize_bytes(value, store)
+    if isinstance(value, (str, list, dict)) and not is_blob_ref(value):
+        body = _canonical_json(value)
+        if len(body) >= min_size:
+            return {BLOB_KEY: store.put(body), KIND_KEY: JSON}
+    return value
+
+
+def externalize_trajectory(
+    trajectory: Sequence[Dict[str, Any]],
+    store: BlobStore,
+    min_size: int = DEFAULT_MIN_BLOB_SIZE,
+) -> List[Dict[str, Any]]:
+    """Copy of `trajectory` whose large step fields are blob references."""
+    return [
+        {key: externalize(value, store, min_size) for key, value in step.items()}
+        for step in trajectory
+    ]
+
+
+def rehydrate(value: Any, store: BlobStore) -> Any:
+    """Resolves the blob references in `value`, including nested ones."""
+    if is_blob_ref(value):
+        if value.get(KIND_KEY) == BYTES:
+            return store.get(value[BLOB_KEY])
+        value = store.get_json(value[BLOB_KEY])
+    if isinstance(value, dict):
+        return {key: rehydrate(item, store) for key, item in value.items()}
+    if isinstance(value, list):
+        return [rehydrate(item, store) for item in value]
+    return value
+
+
+class TrajectoryReader:
+    """Sequence of trajectory steps that loads their blobs when accessed."""
+
+    def __init__(self, steps: Sequence[Dict[str, Any]], store: BlobStore):
+        self.steps = steps
+        self.store = store
+
+    def __len__(self) -> int:
+        return len(self.steps)
+
+    def __getitem__(self, index: int) -> Dict[str, Any]:
+        return {
+            key: rehydrate(value, self.store)
+            for key, value in self.steps[index].items()
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def field(self, index: int, key: str) -> Any:
+        """Loads a single field of a step."""
+        return rehydrate(self.steps[index][key], self.store)
@@ -0,0 +1,95 @@
+"""Step and time budgets of tasks.
+
+`StaticBudgetPolicy` is the original rule: budgets scale with the task's
+complexity by fixed multipliers. `HistoryBudgetPolicy` learns the budgets of
+each task type from past results instead: a high percentile of the steps and
+agent time of its successful runs, plus a margin. Task types with too few
+successful runs fall back to the static rule.
+"""
+
+import logging
+import math
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Protocol
+
+logger = logging.getLogger(__name__)
+
+STATIC = "static"
+HISTORY = "history"
+BUDGET_POLICIES = (STATIC, HISTORY)
+
+DEFAULT_BUDGET_PERCENTILE = 95
+DEFAULT_BUDGET_MARGIN = 0.25
+DEFAULT_BUDGET_MIN_SAMPLES = 3
+
+
+@dataclass
+class Budget:
+    max_steps: int
+    timeout: int
+    # Policy that chose the budget and the number of runs it was learned from.
+    source: str = field(default=STATIC)
+    samples: int = field(default=0)
+
+
+class BudgetPolicy(Protocol):
+    def budget(self, task_name: str, complexity: float) -> Budget: ...
+
+
+class StaticBudgetPolicy:
+    def __init__(self, max_steps_multiplier: int, timeout_multiplier: int):
+        self.max_steps_multiplier = max_steps_multiplier
+        self.timeout_multiplier = timeout_multiplier
+
+    def budget(self, task_name: str, complexity: float) -> Budget:
+        return Budget(
+            max_steps=math.ceil(complexity * self.max_steps_multiplier),
+            timeout=math.ceil(complexity * self.timeout_multiplier),
+        )
+
+
+@dataclass
+class _History:
+    steps: List[int] = field(default_factory=list)
+    seconds: List[float] = field(default_factory=list)
+
+
+class HistoryBudgetPolicy:
+    def __init__(
+        self,
+        results: Iterable[Dict[str, Any]],
+        fallback: StaticBudgetPolicy,
+        percentile: float = DEFAULT_BUDGET_PERCENTILE,
+        margin: float = DEFAULT_BUDGET_MARGIN,
+        min_samples: int = DEFAULT_BUDGET_MIN_SAMPLES,
+    ):
+        self.fallback = fallback
+        self.percentile = percentile
+        self.margin = margin
+        self.min_samples = min_samples
+        self.history: Dict[str, _History] = {}
+        for result in results:
+            if result.get("success") != 1.0 or result.get("error"):
+                continue
+            history = self.history.setdefault(result["task_name"], _History())
+            history.steps.append(result["steps_taken"])
+            history.seconds.append(
+                result.get("phases", {}).get("agent_run", result["execution_time"])
+            )
+        logger.debug(f"Loaded successful runs of {len(self.history)} task types")
+
+    def budget(self, task_name: str, complexity: float) -> Budget:
+        history = self.history.get(task_name)
+        if history is None or len(history.steps) < self.min_samples:
+            return self.fallback.budget(task_name, complexity)
+
+        import numpy as np
+
+        steps = np.percentile(history.steps, self.percentile)
+        seconds = np.percentile(history.seconds, self.percentile)
+        return Budget(
+            max_steps=max(1, math.ceil(steps * (1 + self.margin))),
+            timeout=max(1, math.ceil(seconds * (1 + self.margin))),
+            source=HISTORY,
+            samples=len(history.steps),
+        )
@@ -0,0 +1,18 @@
+"""Location of the local droidworld cache.
+
+Defaults to `~/.cache/droidworld`. Point `DROIDWORLD_CACHE_DIR` at a shared
+volume to share the cache between benchmark containers.
+"""
+
+import os
+from pathlib import Path
+
+CACHE_DIR_ENV = "DROIDWORLD_CACHE_DIR"
+
+
+def get_cache_dir(name: str) -> Path:
+    """Returns (and creates) the cache subdirectory `name`."""
+    root = os.getenv(CACHE_DIR_ENV) or Path.home() / ".cache" / "droidworld"
+    path = Path(root, name)
+    path.mkdir(parents=True, exist_ok=True)
+    return path
@@ -2,29 +2,128 @@ import click
 import logging
 import asyncio
 import functools
+import itertools
+import socket
+import sqlite3
 import textwrap
+import time
+from datetime import datetime, timedelta
+from importlib.metadata import PackageNotFoundError, version as package_version
 
-from eval.env.client import AndroidEnvClient
-from eval.env.boot import boot_environment
-from eval.runner import run_task_on_env
-from eval.tracker import write_task_result
-from eval.portal.keepalive import disable_overlay_once
-from droidrun import load_llm, __version__ as droidrun_version
-from android_world import __version__ as android_world_version
-from adbutils import adb
-
-logging.basicConfig(
-    level=logging.INFO, format="%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+# Only light modules are imported here: `check` runs as a frequent health
+# probe. Commands import droidrun, android_world, llama_index and numpy
+# themselves, `droidworld startup-check` keeps it that way.
+from eval.budget import (
+    BUDGET_POLICIES,
+    DEFAULT_BUDGET_MARGIN,
+    DEFAULT_BUDGET_PERCENTILE,
+    HISTORY,
+    STATIC,
+    HistoryBudgetPolicy,
+    StaticBudgetPolicy,
+)
+from eval.coordinator import (
+    DEFAULT_LEASE_SECONDS,
+    DEFAULT_MAX_ATTEMPTS,
+    DEFAULT_POLL_INTERVAL,
+    DEFAULT_QUEUE_PATH,
+    DONE,
+    FAILED,
+    LEASED,
+    PENDING,
+    LeaseQueue,
+    LeaseWorker,
+)
+from eval.deadline import (
+    BUDGET_STRATEGIES,
+    MOST_INSTANCES,
+    TimeBudget,
+    parse_time_budget,
+    plan_time_budget,
+)
+from eval.env.client import (
+    AndroidEnvClient,
+    DEFAULT_POOL_SIZE,
+    JSON_SCREENSHOTS,
+    SCREENSHOT_ENCODINGS,
+)
+from eval.env.catalog import SuiteCatalog
+from eval.env.fleet import FleetBoot, DEFAULT_BOOT_TIMEOUT, wait_ready_async
+from eval.env.frames import RAW
+from eval.env.snapshots import SnapshotManager
+from eval.env.boot import boot_environment, BootStateCache, DEFAULT_BOOT_STATE_TTL
+from eval.llm.cache import (
+    DEFAULT_LLM_CACHE_SIZE,
+    LLM_CACHE_MODES,
+    OFF,
+    LLMCacheStore,
+)
+from eval.llm.gateway import (
+    DEFAULT_GATEWAY_PORT,
+    LLMGateway,
+    RemoteGateway,
+    serve as serve_gateway,
+)
+from eval.loop_detector import DEFAULT_STUCK_REPEATS
+from eval.manifest import RunConfig, RunManifest, iter_write_timings
+from eval.ordering import (
+    LONGEST_FIRST,
+    SUITE,
+    TASK_ORDERS,
+    DurationEstimator,
+    estimate_makespan,
+    order_longest_first,
+)
+from eval.pipeline import ResultWriter, TaskOptions, TaskPipeline, WorkItem
+from eval.scheduler import (
+    DEFAULT_MAX_CONSECUTIVE_FAILURES,
+    DEFAULT_MAX_RETRIES,
+    DEFAULT_SUMMARY_INTERVAL,
+    DeviceScheduler,
+)
+from eval.startup import (
+    CLI_MODULE,
+    DEFAULT_STARTUP_BUDGET_MS,
+    check_startup,
+    measure_imports,
 )
+from eval.tracker import (
+    OUTPUT_DIR,
+    TaskResult,
+    iter_task_results,
+    write_task_result,
+)
+
 logger = logging.getLogger(__name__)
-logger.setLevel(logging.DEBUG)
-droidrun_logger = logging.getLogger("droidrun")
-droidrun_logger.setLevel(logging.DEBUG)
-logging.getLogger("eval.env.boot").setLevel(logging.DEBUG)
-logging.getLogger("eval.env.client").setLevel(logging.DEBUG)
-logging.getLogger("eval.tools").setLevel(logging.DEBUG)
-logging.getLogger("eval.runner").setLevel(logging.DEBUG)
-logging.getLogger("eval.portal.keepalive").setLevel(logging.DEBUG)
+
+DEBUG_LOGGERS = [
+    __name__,
+    "droidrun",
+    "eval.env.boot",
+    "eval.env.client",
+    "eval.tools",
+    "eval.runner",
+    "eval.pipeline",
+    "eval.scheduler",
+    "eval.coordinator",
+    "eval.portal.keepalive",
+]
+
+
+def configure_logging():
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
+    )
+    for name in DEBUG_LOGGERS:
+        logging.getLogger(name).setLevel(logging.DEBUG)
+
+
+def installed_version(package: str) -> str:
+    try:
+        return package_version(package)
+    except PackageNotFoundError:
+        return "unknown"
 
 
 def make_sync(func):
@@ -53,15 +152,17 @@ def print_banner():
 
 @click.group()
 def cli():
-    pass
+    configure_logging()
 
 
 @cli.command()
 def version():
     print_banner()
     logger.info(f"Droidrun Android World Benchmark --- v0.1.0")
-    logger.info(f"Droidrun --------------------------- v{droidrun_version}")
-    logger.info(f"Android World ---------------------- v{android_world_version}")
+    logger.info(f"Droidrun --------------------------- v{installed_version('droidrun')}")
+    logger.info(
+        f"Android World ---------------------- v{installed_version('android-world')}"
+    )
 
 
 @cli.command()
@@ -70,10 +171,23 @@ def version():
     default="http://localhost:5000",
     help="Android World Environment URL to use.",
 )
-def list_tasks(env_url):
-    env = AndroidEnvClient(env_url)
+@click.option("--task-family", default="android_world", help="Task family to use.")
+@click.option("--seed", default=42, help="Seed to use.")
+@click.option(
+    "--n-task-combinations", "-n", default=1, help="Number of task combinations."
+)
+@click.option("--refresh", is_flag=True, help="Ignore the cached suite catalog.")
+def list_tasks(env_url, task_family, seed, n_task_combinations, refresh):
     logger.info("Listing tasks...")
-    tasks = env.get_suite_task_list()
+    catalog = None
+    if not refresh:
+        catalog = SuiteCatalog.from_cache(task_family, seed, n_task_combinations)
+
+    if catalog is not None:
+        tasks = catalog.task_list
+    else:
+        env = AndroidEnvClient(env_url)
+        tasks = env.get_suite_task_list()
     for i, task in enumerate(tasks):
         logger.info(f"{i}: {task}")
 
@@ -95,9 +209,261 @@ def check(env_url, env_serial):
         exit(1)
 
 
+async def setup_env(
+    boot_cache: BootStateCache,
+    env: AndroidEnvClient,
+    serial: str,
+    task_family: str,
+    seed: int,
+    n_task_combinations: int,
+):
+    """Boot-checks a device, resets it and loads the suite."""
+    await asyncio.to_thread(boot_cache.ensure_booted, env, serial)
+    await prepare_env(env, serial, task_family, seed, n_task_combinations)
+
+
+async def prepare_env(
+    env: AndroidEnvClient,
+    serial: str,
+    task_family: str,
+    seed: int,
+    n_task_combinations: int,
+):
+    """Resets a verified device and loads the suite."""
+    logger.debug(f"Resetting environment {env.base_url}...")
+    await env.aio.reset(go_home=True)
+    logger.info(
+        f"Reinitializing suite {task_family} on {serial} with {n_task_combinations} combinations and seed {seed}"
+    )
+    await env.aio.reinitialize_suite(
+        n_task_combinations=n_task_combinations, seed=seed, task_family=task_family
+    )
+    logger.debug(f"Suite reinitialized successfully on {serial}")
+
+
+def build_gateway(llm_gateway, llm_rpm, llm_tpm, llm_max_in_flight):
+    if llm_gateway:
+        logger.info(f"Throttling LLM requests through the gateway at {llm_gateway}")
+        return RemoteGateway(llm_gateway)
+    if llm_rpm or llm_tpm or llm_max_in_flight:
+        logger.info(
+            f"Throttling LLM requests to {llm_rpm or 'unlimited'} RPM, {llm_tpm or 'unlimited'} TPM and {llm_max_in_flight or 'unlimited'} in flight"
+        )
+        return LLMGateway(llm_rpm, llm_tpm, llm_max_in_flight)
+    return None
+
+
+def build_llm(
+    llm_provider, llm_model, temperature, llm_cache, llm_cache_size, gateway=None
+):
+    from droidrun import load_llm
+
+    logger.debug(f"Loading LLM: {llm_provider} {llm_model} {temperature}")
+    llm = load_llm(llm_provider, model=llm_model, temperature=temperature)
+    logger.debug("LLM loaded successfully")
+    if gateway is not None:
+        from eval.llm.gated import GatedLLM
+
+        llm = GatedLLM(llm, gateway)
+    # Cache hits do not count against the gateway's budgets.
+    if llm_cache != OFF:
+        from eval.llm.caching import CachingLLM
+
+        store = LLMCacheStore(max_bytes=llm_cache_size)
+        llm = CachingLLM(llm, store, mode=llm_cache)
+        logger.info(f"Using LLM cache {store.path} in {llm_cache} mode")
+    return llm
+
+
+def build_budget_policy(
+    budget_policy,
+    max_steps_multiplier,
+    timeout_multiplier,
+    budget_percentile,
+    budget_margin,
+):
+    policy = StaticBudgetPolicy(max_steps_multiplier, timeout_multiplier)
+    if budget_policy == HISTORY:
+        policy = HistoryBudgetPolicy(
+            iter_task_results(),
+            fallback=policy,
+            percentile=budget_percentile,
+            margin=budget_margin,
+        )
+        logger.info(f"Loaded past successful runs of {len(policy.history)} task types")
+    return policy
+
+
+# Options of the agent and of task execution, shared by `run` and `worker`.
+AGENT_OPTIONS = [
+    click.option("--llm-provider", default="Gemini", help="LLM provider to use."),
+    click.option("--llm-model", default="gemini-2.5-pro", help="LLM model to use."),
+    click.option("--vision", is_flag=True, help="Enable vision."),
+    click.option("--reasoning", is_flag=True, help="Enable reasoning."),
+    click.option("--reflection", is_flag=True, help="Enable reflection."),
+    click.option("--debug", is_flag=True, help="Enable debug mode."),
+    click.option("--temperature", default=0.5, help="Temperature to use."),
+    click.option("--tracing", is_flag=True, help="Enable tracing."),
+    click.option("--max-steps-multiplier", default=15, help="Max steps multiplier."),
+    click.option("--timeout-multiplier", default=300, help="Timeout multiplier."),
+    click.option(
+        "--env-pool-size",
+        default=DEFAULT_POOL_SIZE,
+        help="Number of keep-alive connections to the environment server.",
+    ),
+    click.option(
+        "--screenshot-encoding",
+        type=click.Choice(SCREENSHOT_ENCODINGS),
+        default=RAW,
+        help="Screenshot transport. Falls back to json if the server lacks binary frames.",
+    ),
+    click.option(
+        "--boot-check-ttl",
+        default=DEFAULT_BOOT_STATE_TTL,
+        help="Seconds a boot check is trusted without a newer successful one.",
+    ),
+    click.option(
+        "--keep-overlay-disabled",
+        is_flag=True,
+        help="Re-disable the portal overlay whenever it comes back during a task.",
+    ),
+    click.option(
+        "--snapshot",
+        is_flag=True,
+        help="Save an emulator snapshot after boot and restore it before every task.",
+    ),
+    click.option(
+        "--budget-policy",
+        type=click.Choice(BUDGET_POLICIES),
+        default=STATIC,
+        help="Derive step/time budgets from the multipliers or from past successful runs.",
+    ),
+    click.option(
+        "--budget-percentile",
+        default=DEFAULT_BUDGET_PERCENTILE,
+        help="Percentile of past successful runs used as history budget.",
+    ),
+    click.option(
+        "--budget-margin",
+        default=DEFAULT_BUDGET_MARGIN,
+        help="Relative margin added on top of the history budget.",
+    ),
+    click.option(
+        "--stuck-repeats",
+        default=0,
+        help=f"Stop a run after this many identical actions on an unchanged screen and record it as stuck (off by default; try {DEFAULT_STUCK_REPEATS}). Stuck runs count as failed, so scores differ from runs without it.",
+    ),
+    click.option(
+        "--llm-cache",
+        type=click.Choice(LLM_CACHE_MODES),
+        default=OFF,
+        help="Record LLM responses to the local cache, or replay them without network.",
+    ),
+    click.option(
+        "--llm-cache-size",
+        default=DEFAULT_LLM_CACHE_SIZE,
+        help="Size limit of the LLM cache in bytes.",
+    ),
+    click.option(
+        "--llm-rpm",
+        default=0,
+        help="LLM requests per minute of this process (0: unlimited).",
+    ),
+    click.option(
+        "--llm-tpm",
+        default=0,
+        help="LLM tokens per minute of this process (0: unlimited).",
+    ),
+    click.option(
+        "--llm-max-in-flight",
+        default=0,
+        help="LLM requests in flight at once in this process (0: unlimited).",
+    ),
+    click.option(
+        "--llm-gateway",
+        default=None,
+        help="URL of a `droidworld llm-gateway` sidecar sharing its limits instead.",
+    ),
+]
+
+
+def agent_options(func):
+    for option in reversed(AGENT_OPTIONS):
+        func = option(func)
+    return func
+
+
+def time_budget_option(ctx, param, value) -> float | None:
+    if value is None:
+        return None
+    try:
+        return parse_time_budget(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+def get_env_targets(env_urls, env_serials) -> list[tuple[str, str]]:
+    if len(env_urls) != len(env_serials):
+        raise click.BadParameter(
+            f"Got {len(env_urls)} --env-url but {len(env_serials)} --env-serial values"
+        )
+    return list(zip(env_urls, env_serials))
+
+
+@cli.command()
+@click.option(
+    "--env-url",
+    multiple=True,
+    default=["http://localhost:5000"],
+    help="Android World Environment URL to use. Repeat for several devices.",
+)
+@click.option(
+    "--env-serial",
+    multiple=True,
+    default=["emulator-5554"],
+    help="Device serial to use, one per --env-url.",
+)
+@click.option(
+    "--quorum",
+    default=0,
+    help="Return once this many devices are ready (default: all).",
+)
+@click.option("--timeout", default=DEFAULT_BOOT_TIMEOUT, help="Boot timeout per device.")
+@make_sync
+async def boot(env_url, env_serial, quorum, timeout):
+    """Boot and verify several environments concurrently."""
+    targets = get_env_targets(env_url, env_serial)
+    quorum = quorum or len(targets)
+
+    fleet = FleetBoot(
+        [(AndroidEnvClient(url), serial) for url, serial in targets], timeout=timeout
+    ).start()
+    ready = await fleet.wait_for_quorum(quorum)
+    fleet.cancel()
+
+    for report in fleet.reports:
+        if report.ready:
+            logger.info(
+                f"{report.serial} ({report.env_url}): ready in {report.time_to_ready:.1f}s"
+            )
+        elif report.error:
+            logger.error(f"{report.serial} ({report.env_url}): {report.error}")
+        else:
+            logger.info(f"{report.serial} ({report.env_url}): still booting")
+
+    if len(ready) < quorum:
+        logger.error(f"Only {len(ready)}/{quorum} devices became ready")
+        exit(1)
+    logger.info(f"Quorum reached: {len(ready)}/{len(targets)} devices ready")
+
+
 @cli.command()
 @click.option("--env-serial", default="emulator-5554", help="Device serial to use.")
 def disable_overlay(env_serial):
+    from adbutils import adb
+
+    from eval.portal.keepalive import disable_overlay_once
+
     try:
         device = adb.device(env_serial)
         disable_overlay_once(device)
@@ -107,13 +473,124 @@ def disable_overlay(env_serial):
         exit(1)
 
 
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Host to bind to.")
+@click.option("--port", default=5000, help="Port to listen on.")
+def standin(host, port):
+    """Serve a synthetic stand-in for the Android World environment."""
+    from eval.env.standin import serve
+
+    server = serve(host, port)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+@cli.command()
+@click.option("--host", default="127.0.0.1", help="Host to bind to.")
+@click.option("--port", default=DEFAULT_GATEWAY_PORT, help="Port to listen on.")
+@click.option("--rpm", default=0, help="LLM requests per minute (0: unlimited).")
+@click.option("--tpm", default=0, help="LLM tokens per minute (0: unlimited).")
+@click.option(
+    "--max-in-flight", default=0, help="LLM requests in flight at once (0: unlimited)."
+)
+@click.option(
+    "--summary-interval",
+    default=DEFAULT_SUMMARY_INTERVAL,
+    help="Seconds between usage summaries.",
+)
+def llm_gateway(host, port, rpm, tpm, max_in_flight, summary_interval):
+    """Serve shared LLM rate limits to the runs and workers of this host."""
+    gateway = LLMGateway(rpm, tpm, max_in_flight)
+    server = serve_gateway(gateway, host, port)
+    try:
+        while True:
+            time.sleep(summary_interval)
+            logger.info(f"LLM gateway: {gateway.stats.summary()}")
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
 @cli.command()
 @click.option(
     "--env-url",
     default="http://localhost:5000",
     help="Android World Environment URL to use.",
 )
-@click.option("--env-serial", default="emulator-5554", help="Device serial to use.")
+@click.option("--rounds", default=10, help="Screenshots to fetch per encoding.")
+def bench_screenshot(env_url, rounds):
+    """Measure get_screenshot latency for every screenshot encoding."""
+    from eval.env.standin import benchmark_screenshots
+
+    results = benchmark_screenshots(env_url, rounds)
+    baseline = results[JSON_SCREENSHOTS]
+    for encoding, seconds in results.items():
+        logger.info(
+            f"{encoding:>5}: {seconds * 1000:8.1f} ms/screenshot ({baseline / seconds:.1f}x vs json)"
+        )
+
+
+@cli.command()
+@click.option("--task", "-t", multiple=True, help="Only summarize these tasks.")
+def timings(task):
+    """Summarize phase and per-step timings of written results per task."""
+    from eval.timing import summarize_timings
+
+    # Results do not include their own write, the run manifests record it.
+    results = itertools.chain(iter_task_results(), iter_write_timings())
+    results = (r for r in results if not task or r["task_name"] in task)
+    summary = summarize_timings(results)
+    if not summary:
+        logger.info(f"No task results with timings found in {OUTPUT_DIR}")
+        return
+
+    for task_name, metrics in summary.items():
+        logger.info(task_name)
+        for name, stats in metrics.items():
+            pcts = "  ".join(
+                f"{key} {value:8.2f}s" for key, value in stats.items() if key != "n"
+            )
+            logger.info(f"  {name:>12} (n={stats['n']:>4}): {pcts}")
+
+
+@cli.command()
+@click.option("--module", default=CLI_MODULE, help="Module to import.")
+@click.option(
+    "--max-ms",
+    default=DEFAULT_STARTUP_BUDGET_MS,
+    help="Import time budget in milliseconds.",
+)
+@click.option("--top", default=15, help="Packages to list, slowest first.")
+def startup_check(module, max_ms, top):
+    """Profile the imports of the CLI and fail if it starts too slowly."""
+    profile = measure_imports(module)
+    packages = sorted(profile.packages.items(), key=lambda p: p[1], reverse=True)
+    for package, ms in packages[:top]:
+        logger.info(f"{package:>24}: {ms:8.1f} ms")
+    logger.info(f"{'total':>24}: {profile.total_ms:8.1f} ms")
+
+    problems = check_startup(profile, max_ms)
+    for problem in problems:
+        logger.error(problem)
+    if problems:
+        exit(1)
+
+
+@cli.command()
+@click.option(
+    "--env-url",
+    multiple=True,
+    default=["http://localhost:5000"],
+    help="Android World Environment URL to use. Repeat for several devices.",
+)
+@click.option(
+    "--env-serial",
+    multiple=True,
+    default=["emulator-5554"],
+    help="Device serial to use, one per --env-url.",
+)
 @click.option("--task-family", default="android_world", help="Task family to use.")
 @click.option("--seed", default=42, help="Seed to use.")
 @click.option("--min-task-idx", "-min", default=0, help="Min task index.")
@@ -122,16 +599,51 @@ def disable_overlay(env_serial):
 @click.option(
     "--n-task-combinations", "-n", default=1, help="Number of task combinations."
 )
-@click.option("--llm-provider", default="Gemini", help="LLM provider to use.")
-@click.option("--llm-model", default="gemini-2.5-pro", help="LLM model to use.")
-@click.option("--vision", is_flag=True, help="Enable vision.")
-@click.option("--reasoning", is_flag=True, help="Enable reasoning.")
-@click.option("--reflection", is_flag=True, help="Enable reflection.")
-@click.option("--debug", is_flag=True, help="Enable debug mode.")
-@click.option("--temperature", default=0.5, help="Temperature to use.")
-@click.option("--tracing", is_flag=True, help="Enable tracing.")
-@click.option("--max-steps-multiplier", default=15, help="Max steps multiplier.")
-@click.option("--timeout-multiplier", default=300, help="Timeout multiplier.")
+@agent_options
+@click.option(
+    "--task-order",
+    type=click.Choice(TASK_ORDERS),
+    default=SUITE,
+    help="Run instances in suite order or, opt-in, longest expected duration first.",
+)
+@click.option(
+    "--resume",
+    is_flag=True,
+    help="Skip instances this run configuration already finished.",
+)
+@click.option(
+    "--restart",
+    is_flag=True,
+    help="Start this run configuration over, forgetting its finished instances.",
+)
+@click.option(
+    "--time-budget",
+    "--deadline",
+    "time_budget",
+    callback=time_budget_option,
+    help="Finish by then: a duration (5400, 90m, 1h30m) or a time (06:00).",
+)
+@click.option(
+    "--time-budget-strategy",
+    type=click.Choice(BUDGET_STRATEGIES),
+    default=MOST_INSTANCES,
+    help="Within the time budget, run as many instances or task types as possible.",
+)
+@click.option(
+    "--max-device-failures",
+    default=DEFAULT_MAX_CONSECUTIVE_FAILURES,
+    help="Quarantine a device after this many infrastructure failures in a row.",
+)
+@click.option(
+    "--max-retries",
+    default=DEFAULT_MAX_RETRIES,
+    help="Retries of a task instance that hit an infrastructure error.",
+)
+@click.option(
+    "--summary-interval",
+    default=DEFAULT_SUMMARY_INTERVAL,
+    help="Seconds between throughput summaries.",
+)
 @make_sync
 async def run(
     env_url,
@@ -152,78 +664,509 @@ async def run(
     tracing,
     max_steps_multiplier,
     timeout_multiplier,
+    env_pool_size,
+    screenshot_encoding,
+    boot_check_ttl,
+    keep_overlay_disabled,
+    snapshot,
+    budget_policy,
+    budget_percentile,
+    budget_margin,
+    stuck_repeats,
+    llm_cache,
+    llm_cache_size,
+    llm_rpm,
+    llm_tpm,
+    llm_max_in_flight,
+    llm_gateway,
+    task_order,
+    resume,
+    restart,
+    time_budget,
+    time_budget_strategy,
+    max_device_failures,
+    max_retries,
+    summary_interval,
 ):
-    env = AndroidEnvClient(env_url)
-
+    # The budget includes booting the devices.
+    budget = TimeBudget(time_budget) if time_budget is not None else None
+    config = RunConfig(
+        task_family=task_family,
+        seed=seed,
+        n_task_combinations=n_task_combinations,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        temperature=temperature,
+        vision=vision,
+        reasoning=reasoning,
+        reflection=reflection,
+    )
     try:
-        boot_environment(env, env_serial)
-    except Exception as e:
-        logger.error(f"Error booting environment: {e}")
+        manifest = RunManifest(config).start(resume=resume, restart=restart)
+    except RuntimeError as e:
+        logger.error(str(e))
+        exit(1)
+
+    targets = [
+        (
+            AndroidEnvClient(
+                url, pool_size=env_pool_size, screenshot_encoding=screenshot_encoding
+            ),
+            serial,
+        )
+        for url, serial in get_env_targets(env_url, env_serial)
+    ]
+    boot_cache = BootStateCache(ttl=boot_check_ttl)
+    suite = dict(
+        task_family=task_family, seed=seed, n_task_combinations=n_task_combinations
+    )
+    setup = functools.partial(setup_env, boot_cache, **suite)
+
+    # Devices start on tasks as soon as they are ready, the first one to be
+    # ready loads the catalog.
+    fleet = FleetBoot(
+        targets, boot_cache=boot_cache, prepare=functools.partial(prepare_env, **suite)
+    ).start()
+    ready = [fleet.target(report) for report in await fleet.wait_for_quorum(1)]
+    if not ready:
         logger.info(
             "Please check if the environment is running and accessible. Keep on trying or restart the environment"
         )
         exit(1)
 
-    logger.debug("Resetting environment...")
-    env.reset(go_home=True)
-    logger.info(
-        f"Reinitializing suite {task_family} with {n_task_combinations} combinations and seed {seed}"
+    logger.debug("Loading suite catalog...")
+    catalog = await SuiteCatalog.load(
+        ready[0][0].aio,
+        task_family,
+        seed,
+        n_task_combinations,
+        tasks=list(task) or None,
     )
-    env.reinitialize_suite(
-        n_task_combinations=n_task_combinations, seed=seed, task_family=task_family
-    )
-    logger.debug("Suite reinitialized successfully")
-
-    logger.debug("Fetching task list...")
-    all_tasks = env.get_suite_task_list()
+    all_tasks = catalog.task_list
     if len(task) > 0:
         task_list = [task for task in task if task in all_tasks]
     else:
-        task_list = env.get_suite_task_list(min_task_idx, max_task_idx)
+        task_list = catalog.select(min_task_idx, max_task_idx)
         logger.debug(f"Task list: {task_list}")
 
     logger.info(f"Found tasks: {', '.join(task_list)} ({len(task_list)})")
 
-    logger.debug(f"Loading LLM: {llm_provider} {llm_model} {temperature}")
-    llm = load_llm(llm_provider, model=llm_model, temperature=temperature)
-    logger.debug("LLM loaded successfully")
+    gateway = build_gateway(llm_gateway, llm_rpm, llm_tpm, llm_max_in_flight)
+    llm = build_llm(
+        llm_provider, llm_model, temperature, llm_cache, llm_cache_size, gateway
+    )
 
-    for task_name in task_list:
-        task_id = all_tasks.index(task_name)
-        num_tasks = env.get_suite_task_length(task_name)
-
-        for task_idx in range(num_tasks):
-            try:
-                boot_environment(env, env_serial)
-            except Exception as e:
-                logger.error(f"Error booting environment: {e}")
-                logger.info(
-                    "Please check if the environment is running and accessible. Keep on trying or restart the environment"
-                )
-                continue
-
-            logger.info(f"Running task {task_name} {task_idx}...")
-            res, e = await run_task_on_env(
-                env,
-                env_serial,
-                llm,
-                task_id,
-                task_name,
-                task_idx,
-                max_steps_multiplier,
-                timeout_multiplier,
-                vision,
-                reasoning,
-                reflection,
-                tracing,
-                debug,
-            )
-            if e:
-                logger.error(f"Error running task {task_name} {task_idx}: {e}")
-            else:
-                logger.info(f"Task {task_name} {task_idx} completed successfully")
+    items = [
+        WorkItem(catalog.task_id(task_name), task_name, task_idx)
+        for task_name in task_list
+        for task_idx in range(catalog.length(task_name))
+    ]
+    if resume:
+        remaining = [
+            item
+            for item in items
+            if not manifest.is_finished(item.task_name, item.task_idx)
+        ]
+        logger.info(f"Skipping {len(items) - len(remaining)} finished instances")
+        items = remaining
+
+    estimator = DurationEstimator(iter_task_results(), catalog)
+    estimates = {item: estimator.estimate(item) for item in items}
+    if budget is not None:
+        budget.estimates = estimates
+        plan = plan_time_budget(
+            items,
+            estimates,
+            budget.seconds_left(),
+            len(targets),
+            time_budget_strategy,
+        )
+        selected = set(plan.selected)
+        items = [item for item in items if item in selected]
+        logger.info(
+            f"Time budget of {budget.seconds_left() / 60:.1f} min fits {len(items)} instances of {len(selected) + len(plan.skipped)} ({time_budget_strategy}), skipping {len(plan.skipped)}"
+        )
+        manifest.update(
+            time_budget={
+                "seconds": budget.seconds,
+                "deadline": (
+                    datetime.now() + timedelta(seconds=budget.seconds_left())
+                ).isoformat(),
+                "strategy": time_budget_strategy,
+            }
+        )
+        manifest.record_skipped(
+            {(i.task_name, i.task_idx): reason for i, reason in plan.skipped.items()}
+        )
+    if task_order == LONGEST_FIRST:
+        items = order_longest_first(items, estimates, seed)
+    estimated_makespan = estimate_makespan(
+        (estimates[item] for item in items), len(targets)
+    )
+    logger.info(
+        f"Running {len(items)} instances in {task_order} order on {len(targets)} devices, estimated makespan {estimated_makespan / 60:.1f} min"
+    )
+
+    options = TaskOptions(
+        max_steps_multiplier=max_steps_multiplier,
+        timeout_multiplier=timeout_multiplier,
+        vision=vision,
+        reasoning=reasoning,
+        reflection=reflection,
+        tracing=tracing,
+        debug=debug,
+        keep_overlay_disabled=keep_overlay_disabled,
+        stuck_repeats=stuck_repeats,
+    )
+    policy = build_budget_policy(
+        budget_policy,
+        max_steps_multiplier,
+        timeout_multiplier,
+        budget_percentile,
+        budget_margin,
+    )
+
+    def write(result: TaskResult):
+        result.run_id = manifest.run_id
+        if write_task_result(result):
+            manifest.record(result)
+
+    writer = ResultWriter(write)
+    snapshots = SnapshotManager() if snapshot else None
+    devices = {f"{serial}@{env.base_url}": (env, serial) for env, serial in targets}
+
+    async def recover(device: str):
+        env, serial = devices[device]
+        boot_cache.invalidate(env, serial)
+        if snapshots is not None:
+            snapshots.invalidate(env)
+        await setup(env, serial)
+
+    def pipeline(env: AndroidEnvClient, serial: str) -> TaskPipeline:
+        return TaskPipeline(
+            env,
+            serial,
+            llm,
+            options,
+            catalog=catalog,
+            boot_cache=boot_cache,
+            writer=writer,
+            snapshots=snapshots,
+            budget_policy=policy,
+        )
+
+    async def joining():
+        async for report in fleet.as_ready():
+            env, serial = fleet.target(report)
+            yield f"{serial}@{env.base_url}", pipeline(env, serial)
+
+    scheduler = DeviceScheduler(
+        {f"{serial}@{env.base_url}": pipeline(env, serial) for env, serial in ready},
+        recover=recover,
+        max_consecutive_failures=max_device_failures,
+        max_retries=max_retries,
+        summary_interval=summary_interval,
+        time_budget=budget,
+    )
+    started_at = time.monotonic()
+    try:
+        await scheduler.run(items, joining())
+    finally:
+        fleet.cancel()
+        await writer.aclose()
+        manifest.record_skipped(
+            {(i.task_name, i.task_idx): r for i, r in scheduler.skipped.items()}
+        )
+    if scheduler.skipped:
+        logger.warning(
+            f"Skipped {len(scheduler.skipped)} instances that would not finish before the deadline"
+        )
+    makespan = time.monotonic() - started_at
+    logger.info(
+        f"Makespan: {makespan / 60:.1f} min actual vs {estimated_makespan / 60:.1f} min estimated ({makespan / estimated_makespan:.2f}x)"
+        if estimated_makespan > 0
+        else f"Makespan: {makespan / 60:.1f} min"
+    )
+    if llm_cache != OFF:
+        logger.info(f"LLM cache: {llm.hits} hits, {llm.misses} misses")
+    if isinstance(gateway, LLMGateway):
+        logger.info(f"LLM gateway: {gateway.stats.summary()}")
+
+
+@cli.command()
+@click.option(
+    "--env-url",
+    default="http://localhost:5000",
+    help="Environment to load the suite catalog from if it is not cached.",
+)
+@click.option("--task-family", default="android_world", help="Task family to use.")
+@click.option("--seed", default=42, help="Seed to use.")
+@click.option("--min-task-idx", "-min", default=0, help="Min task index.")
+@click.option("--max-task-idx", "-max", default=-1, help="Max task index.")
+@click.option("--task", "-t", multiple=True, help="Tasks to run.")
+@click.option(
+    "--n-task-combinations", "-n", default=1, help="Number of task combinations."
+)
+@click.option(
+    "--task-order",
+    type=click.Choice(TASK_ORDERS),
+    default=SUITE,
+    help="Queue instances in suite order or, opt-in, longest expected duration first.",
+)
+@click.option(
+    "--queue",
+    "queue_path",
+    default=str(DEFAULT_QUEUE_PATH),
+    help="Task queue database, on the volume shared with the workers.",
+)
+@click.option(
+    "--max-attempts",
+    default=DEFAULT_MAX_ATTEMPTS,
+    help="Leases of an instance before it is given up on.",
+)
+@click.option("--reset", is_flag=True, help="Queue finished instances again.")
+@click.option(
+    "--summary-interval",
+    default=DEFAULT_SUMMARY_INTERVAL,
+    help="Seconds between queue summaries.",
+)
+@make_sync
+async def coordinator(
+    env_url,
+    task_family,
+    seed,
+    min_task_idx,
+    max_task_idx,
+    task,
+    n_task_combinations,
+    task_order,
+    queue_path,
+    max_attempts,
+    reset,
+    summary_interval,
+):
+    """Fill the shared task queue and follow the workers' progress."""
+    catalog = SuiteCatalog.from_cache(task_family, seed, n_task_combinations)
+    if catalog is None:
+        env = AndroidEnvClient(env_url)
+        await wait_ready_async(env, DEFAULT_BOOT_TIMEOUT)
+        await env.aio.reinitialize_suite(
+            n_task_combinations=n_task_combinations, seed=seed, task_family=task_family
+        )
+        catalog = await SuiteCatalog.load(
+            env.aio, task_family, seed, n_task_combinations
+        )
+
+    if len(task) > 0:
+        task_list = [name for name in task if name in catalog.task_list]
+    else:
+        task_list = catalog.select(min_task_idx, max_task_idx)
+    items = [
+        WorkItem(catalog.task_id(task_name), task_name, task_idx)
+        for task_name in task_list
+        for task_idx in range(catalog.length(task_name))
+    ]
+    if task_order == LONGEST_FIRST:
+        estimator = DurationEstimator(iter_task_results(), catalog)
+        estimates = {item: estimator.estimate(item) for item in items}
+        items = order_longest_first(items, estimates, seed)
+
+    queue = LeaseQueue(queue_path)
+    meta = {
+        "task_family": task_family,
+        "seed": seed,
+        "n_task_combinations": n_task_combinations,
+        "max_attempts": max_attempts,
+    }
+    added = await asyncio.to_thread(queue.create, items, meta, reset)
+    logger.info(f"Queued {added} new of {len(items)} instances in {queue.path}")
+
+    while True:
+        counts = await asyncio.to_thread(queue.counts)
+        workers = await asyncio.to_thread(queue.workers)
+        logger.info(
+            f"Queue: {counts[DONE]} done, {counts[FAILED]} failed, {counts[LEASED]} leased, {counts[PENDING]} pending | {len(workers)} workers"
+        )
+        if counts[PENDING] == 0 and counts[LEASED] == 0:
+            break
+        await asyncio.sleep(summary_interval)
+    logger.info("All queued instances are finished")
 
-            write_task_result(res)
+
+@cli.command()
+@click.option(
+    "--env-url",
+    default="http://localhost:5000",
+    help="Android World Environment URL to use.",
+)
+@click.option("--env-serial", default="emulator-5554", help="Device serial to use.")
+@click.option(
+    "--queue",
+    "queue_path",
+    default=str(DEFAULT_QUEUE_PATH),
+    help="Task queue database filled by the coordinator.",
+)
+@click.option(
+    "--worker-id", default=None, help="Name of the worker (default: host and serial)."
+)
+@click.option(
+    "--lease-seconds",
+    default=DEFAULT_LEASE_SECONDS,
+    help="Seconds a lease lasts without heartbeat.",
+)
+@click.option(
+    "--poll-interval",
+    default=DEFAULT_POLL_INTERVAL,
+    help="Seconds between polls while the queue has nothing to hand out.",
+)
+@click.option(
+    "--max-device-failures",
+    default=DEFAULT_MAX_CONSECUTIVE_FAILURES,
+    help="Stop leasing after this many infrastructure failures in a row.",
+)
+@agent_options
+@make_sync
+async def worker(
+    env_url,
+    env_serial,
+    queue_path,
+    worker_id,
+    lease_seconds,
+    poll_interval,
+    max_device_failures,
+    llm_provider,
+    llm_model,
+    vision,
+    reasoning,
+    reflection,
+    debug,
+    temperature,
+    tracing,
+    max_steps_multiplier,
+    timeout_multiplier,
+    env_pool_size,
+    screenshot_encoding,
+    boot_check_ttl,
+    keep_overlay_disabled,
+    snapshot,
+    budget_policy,
+    budget_percentile,
+    budget_margin,
+    stuck_repeats,
+    llm_cache,
+    llm_cache_size,
+    llm_rpm,
+    llm_tpm,
+    llm_max_in_flight,
+    llm_gateway,
+):
+    """Run task instances leased from the coordinator's queue."""
+    worker_id = worker_id or f"{socket.gethostname()}-{env_serial}"
+    queue = LeaseQueue(queue_path)
+    while True:
+        try:
+            meta = await asyncio.to_thread(queue.meta) if queue.exists() else {}
+        except sqlite3.Error:
+            meta = {}
+        if "task_family" in meta:
+            break
+        logger.info(f"Waiting for the coordinator to create {queue.path}...")
+        await asyncio.sleep(poll_interval)
+    task_family, seed = meta["task_family"], meta["seed"]
+    n_task_combinations = meta["n_task_combinations"]
+
+    env = AndroidEnvClient(
+        env_url, pool_size=env_pool_size, screenshot_encoding=screenshot_encoding
+    )
+    boot_cache = BootStateCache(ttl=boot_check_ttl)
+    try:
+        await setup_env(
+            boot_cache, env, env_serial, task_family, seed, n_task_combinations
+        )
+    except Exception as e:
+        logger.error(f"Error booting environment: {e}")
+        logger.info(
+            "Please check if the environment is running and accessible. Keep on trying or restart the environment"
+        )
+        exit(1)
+    catalog = await SuiteCatalog.load(env.aio, task_family, seed, n_task_combinations)
+
+    gateway = build_gateway(llm_gateway, llm_rpm, llm_tpm, llm_max_in_flight)
+    llm = build_llm(
+        llm_provider, llm_model, temperature, llm_cache, llm_cache_size, gateway
+    )
+    config = RunConfig(
+        task_family=task_family,
+        seed=seed,
+        n_task_combinations=n_task_combinations,
+        llm_provider=llm_provider,
+        llm_model=llm_model,
+        temperature=temperature,
+        vision=vision,
+        reasoning=reasoning,
+        reflection=reflection,
+    )
+    # Workers share the manifest, none of them starts the run over.
+    manifest = RunManifest(config).join()
+    leases = LeaseWorker(queue, worker_id, lease_seconds, max_device_failures)
+
+    def write(result: TaskResult):
+        result.run_id = manifest.run_id
+        written = write_task_result(result)
+        if written:
+            manifest.record(result)
+        leases.record(result, written)
+
+    writer = ResultWriter(write)
+    pipeline = TaskPipeline(
+        env,
+        env_serial,
+        llm,
+        TaskOptions(
+            max_steps_multiplier=max_steps_multiplier,
+            timeout_multiplier=timeout_multiplier,
+            vision=vision,
+            reasoning=reasoning,
+            reflection=reflection,
+            tracing=tracing,
+            debug=debug,
+            keep_overlay_disabled=keep_overlay_disabled,
+            stuck_repeats=stuck_repeats,
+        ),
+        catalog=catalog,
+        boot_cache=boot_cache,
+        writer=writer,
+        snapshots=SnapshotManager() if snapshot else None,
+        budget_policy=build_budget_policy(
+            budget_policy,
+            max_steps_multiplier,
+            timeout_multiplier,
+            budget_percentile,
+            budget_margin,
+        ),
+    )
+    pipeline.on_finished = leases.on_finished
+
+    logger.info(f"Worker {worker_id} pulling from {queue.path}")
+    heartbeat = asyncio.create_task(leases.heartbeat())
+    try:
+        # Leases held by other workers may still expire and come back.
+        while True:
+            await pipeline.run(leases.items())
+            if leases.health.quarantined:
+                break
+            if await asyncio.to_thread(queue.finished):
+                break
+            await asyncio.sleep(poll_interval)
+    finally:
+        heartbeat.cancel()
+        await writer.aclose()
+    logger.info(f"Worker {worker_id} finished {leases.completed} instances")
+    if isinstance(gateway, LLMGateway):
+        logger.info(f"LLM gateway: {gateway.stats.summary()}")
+    if leases.health.quarantined:
+        # Its device needs attention, the other workers take over the queue.
+        exit(1)
 
 
 if __name__ == "__main__":
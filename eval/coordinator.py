@@ -0,0 +1,350 @@
+"""Task queue shared by benchmark containers.
+
+`droidworld coordinator` fills a SQLite database on the shared results
+volume with the task instances of a suite. Every `droidworld worker` leases
+instances from it one at a time. A lease expires unless its worker renews it
+with heartbeats, so the instances of a killed container go back to the queue
+and containers can be added or removed at any time. Finished instances are
+marked done once their result is written; instances that keep failing on
+infrastructure errors are marked failed after `max_attempts`. A released
+instance goes to another worker if there is one, and a worker whose device
+keeps failing is quarantined like a device of the `DeviceScheduler`: it stops
+leasing, so its instances are left to the healthy workers.
+"""
+
+import asyncio
+import json
+import logging
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, AsyncIterator, Dict, Iterable, Iterator, List, Set
+
+from eval.pipeline import WorkItem
+from eval.scheduler import (
+    DEFAULT_MAX_CONSECUTIVE_FAILURES,
+    MIN_HEALTH_SCORE,
+    DeviceHealth,
+)
+from eval.tracker import OUTPUT_DIR, TaskResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_QUEUE_PATH = Path(OUTPUT_DIR, "queue.sqlite")
+DEFAULT_LEASE_SECONDS = 300
+DEFAULT_MAX_ATTEMPTS = 3
+DEFAULT_POLL_INTERVAL = 10
+
+PENDING = "pending"
+LEASED = "leased"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS items (
+    task_name TEXT NOT NULL,
+    task_idx INTEGER NOT NULL,
+    task_id INTEGER NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    success REAL,
+    error TEXT,
+    updated_at REAL,
+    PRIMARY KEY (task_name, task_idx)
+);
+CREATE INDEX IF NOT EXISTS items_by_state ON items (state, position);
+"""
+
+
+class LeaseQueue:
+    def __init__(self, path: Path | str = DEFAULT_QUEUE_PATH):
+        self.path = Path(path)
+
+    @contextmanager
+    def _transaction(self) -> Iterator[sqlite3.Connection]:
+        # Workers in other containers share the file, so every operation
+        # takes the write lock up front and waits for it if necessary.
+        db = sqlite3.connect(self.path, timeout=60, isolation_level=None)
+        try:
+            db.execute("BEGIN IMMEDIATE")
+            try:
+                yield db
+            except BaseException:
+                db.execute("ROLLBACK")
+                raise
+            db.execute("COMMIT")
+        finally:
+            db.close()
+
+    def exists(self) -> bool:
+        return self.path.exists()
+
+    def create(
+        self,
+        items: Iterable[WorkItem],
+        meta: Dict[str, Any],
+        reset: bool = False,
+    ) -> int:
+        """Adds `items` in order and returns how many were new.
+
+        Instances already in the queue keep their state unless `reset`.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        now = time.time()
+        with self._transaction() as db:
+            for statement in _SCHEMA.split(";"):
+                if statement.strip():
+                    db.execute(statement)
+            if reset:
+                db.execute("DELETE FROM items")
+            db.executemany(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)",
+                [(key, json.dumps(value)) for key, value in meta.items()],
+            )
+            before = db.total_changes
+            db.executemany(
+                "INSERT OR IGNORE INTO items"
+                " (task_name, task_idx, task_id, position, state, updated_at)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                [
+                    (item.task_name, item.task_idx, item.task_id, i, PENDING, now)
+                    for i, item in enumerate(items)
+                ],
+            )
+            return db.total_changes - before
+
+    def meta(self) -> Dict[str, Any]:
+        with self._transaction() as db:
+            rows = db.execute("SELECT key, value FROM meta").fetchall()
+        return {key: json.loads(value) for key, value in rows}
+
+    def lease(self, worker: str, lease_seconds: float) -> WorkItem | None:
+        """Leases the first pending instance, or one whose lease expired.
+
+        Instances `worker` held before, and failed on, come last.
+        """
+        now = time.time()
+        with self._transaction() as db:
+            max_attempts = _max_attempts(db)
+            # Instances whose workers died too often are given up on.
+            db.execute(
+                "UPDATE items SET state = ?, error = ?, updated_at = ?"
+                " WHERE state = ? AND lease_expires < ? AND attempts >= ?",
+                (FAILED, "lease expired", now, LEASED, now, max_attempts),
+            )
+            row = db.execute(
+                "SELECT task_name, task_idx, task_id FROM items"
+                " WHERE state = ? OR (state = ? AND lease_expires < ?)"
+                " ORDER BY worker IS ?, position LIMIT 1",
+                (PENDING, LEASED, now, worker),
+            ).fetchone()
+            if row is None:
+                return None
+            task_name, task_idx, task_id = row
+            db.execute(
+                "UPDATE items SET state = ?, worker = ?, lease_expires = ?,"
+                " attempts = attempts + 1, updated_at = ?"
+                " WHERE task_name = ? AND task_idx = ?",
+                (LEASED, worker, now + lease_seconds, now, task_name, task_idx),
+            )
+        return WorkItem(task_id, task_name, task_idx)
+
+    def heartbeat(self, worker: str, items: Iterable[WorkItem], lease_seconds: float):
+        """Renews the leases `worker` still holds on `items`."""
+        now = time.time()
+        with self._transaction() as db:
+            db.executemany(
+                "UPDATE items SET lease_expires = ?, updated_at = ?"
+                " WHERE task_name = ? AND task_idx = ? AND state = ? AND worker = ?",
+                [
+                    (now + lease_seconds, now, item.task_name, item.task_idx)
+                    + (LEASED, worker)
+                    for item in items
+                ],
+            )
+
+    def complete(self, worker: str, item: WorkItem, success: float):
+        """Marks an instance done, unless its lease went to another worker."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE items SET state = ?, success = ?, error = NULL,"
+                " lease_expires = NULL, updated_at = ?"
+                " WHERE task_name = ? AND task_idx = ? AND state = ? AND worker = ?",
+                (DONE, success, time.time(), item.task_name, item.task_idx)
+                + (LEASED, worker),
+            )
+
+    def release(self, worker: str, item: WorkItem, error: str) -> bool:
+        """Returns a failed instance to the queue; False if out of attempts."""
+        with self._transaction() as db:
+            row = db.execute(
+                "SELECT attempts FROM items WHERE task_name = ? AND task_idx = ?",
+                (item.task_name, item.task_idx),
+            ).fetchone()
+            retry = row is not None and row[0] < _max_attempts(db)
+            db.execute(
+                "UPDATE items SET state = ?, error = ?, lease_expires = NULL,"
+                " updated_at = ?"
+                " WHERE task_name = ? AND task_idx = ? AND state = ? AND worker = ?",
+                (PENDING if retry else FAILED, error, time.time())
+                + (item.task_name, item.task_idx, LEASED, worker),
+            )
+        return retry
+
+    def fail(self, worker: str, item: WorkItem, error: str):
+        """Marks an instance that cannot run as failed for good."""
+        with self._transaction() as db:
+            db.execute(
+                "UPDATE items SET state = ?, error = ?, lease_expires = NULL,"
+                " updated_at = ?"
+                " WHERE task_name = ? AND task_idx = ? AND state = ? AND worker = ?",
+                (FAILED, error, time.time(), item.task_name, item.task_idx)
+                + (LEASED, worker),
+            )
+
+    def counts(self) -> Dict[str, int]:
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT state, COUNT(*) FROM items GROUP BY state"
+            ).fetchall()
+        return {state: 0 for state in (PENDING, LEASED, DONE, FAILED)} | dict(rows)
+
+    def workers(self) -> Dict[str, int]:
+        """Number of live leases per worker."""
+        with self._transaction() as db:
+            rows = db.execute(
+                "SELECT worker, COUNT(*) FROM items"
+                " WHERE state = ? AND lease_expires >= ? GROUP BY worker",
+                (LEASED, time.time()),
+            ).fetchall()
+        return dict(rows)
+
+    def finished(self) -> bool:
+        counts = self.counts()
+        return counts[PENDING] == 0 and counts[LEASED] == 0
+
+
+def _max_attempts(db: sqlite3.Connection) -> int:
+    row = db.execute("SELECT value FROM meta WHERE key = 'max_attempts'").fetchone()
+    return json.loads(row[0]) if row else DEFAULT_MAX_ATTEMPTS
+
+
+class LeaseWorker:
+    """Feeds a `TaskPipeline` from a `LeaseQueue` and reports back to it."""
+
+    def __init__(
+        self,
+        queue: LeaseQueue,
+        worker_id: str,
+        lease_seconds: float = DEFAULT_LEASE_SECONDS,
+        max_consecutive_failures: int = DEFAULT_MAX_CONSECUTIVE_FAILURES,
+    ):
+        self.queue = queue
+        self.worker_id = worker_id
+        self.lease_seconds = lease_seconds
+        self.max_consecutive_failures = max_consecutive_failures
+        self.health = DeviceHealth(worker_id)
+        self.completed = 0
+        self._leased: Set[WorkItem] = set()
+        self._lock = threading.Lock()
+
+    def _forget(self, item: WorkItem):
+        with self._lock:
+            self._leased.discard(item)
+
+    async def items(self) -> AsyncIterator[WorkItem]:
+        """Leases instances until the queue has none left or this worker is
+        quarantined."""
+        while not self.health.quarantined:
+            item = await asyncio.to_thread(
+                self.queue.lease, self.worker_id, self.lease_seconds
+            )
+            if item is None:
+                return
+            with self._lock:
+                self._leased.add(item)
+            logger.debug(f"Leased {item.task_name} {item.task_idx}")
+            yield item
+
+    async def heartbeat(self):
+        """Renews the leases held by this worker until cancelled."""
+        while True:
+            await asyncio.sleep(self.lease_seconds / 3)
+            with self._lock:
+                leased: List[WorkItem] = list(self._leased)
+            if not leased:
+                continue
+            try:
+                await asyncio.to_thread(
+                    self.queue.heartbeat, self.worker_id, leased, self.lease_seconds
+                )
+            except Exception as e:
+                logger.error(f"Error renewing leases: {e}")
+
+    def _check_health(self):
+        health = self.health
+        if (
+            health.consecutive_failures < self.max_consecutive_failures
+            and health.score >= MIN_HEALTH_SCORE
+        ):
+            return
+        health.quarantined = True
+        logger.error(
+            f"Quarantining worker {self.worker_id}: {health.consecutive_failures} infrastructure failures in a row, health {health.score:.2f}, last error: {health.last_error}"
+        )
+
+    async def on_finished(
+        self,
+        item: WorkItem,
+        result: TaskResult | None,
+        seconds: float,
+        infrastructure_error: str | None,
+    ) -> bool:
+        self.health.busy_seconds += seconds
+        if infrastructure_error is not None:
+            self._forget(item)
+            self.health.last_error = infrastructure_error
+            self.health.record(failed=True)
+            self._check_health()
+            retry = await asyncio.to_thread(
+                self.queue.release, self.worker_id, item, infrastructure_error
+            )
+            logger.warning(
+                f"Released {item.task_name} {item.task_idx} after an infrastructure error ({'requeued' if retry else 'out of attempts'}): {infrastructure_error}"
+            )
+            return retry
+        self.health.record(failed=False)
+        if result is None:
+            self._forget(item)
+            await asyncio.to_thread(
+                self.queue.fail, self.worker_id, item, "task did not run"
+            )
+        # Results are completed once written, see `record`.
+        return False
+
+    def record(self, result: TaskResult, written: bool = True):
+        """Marks the instance of a written result as done.
+
+        Called by the result writer, on its own thread.
+        """
+        item = WorkItem(result.task_id, result.task_name, result.task_idx)
+        with self._lock:
+            settled = item not in self._leased
+        self._forget(item)
+        # Released or failed by `on_finished`, the result only records why.
+        if settled:
+            return
+        if not written:
+            self.queue.release(self.worker_id, item, "result could not be written")
+            return
+        self.queue.complete(self.worker_id, item, result.success)
+        self.completed += 1
@@ -0,0 +1,161 @@
+"""Runs that have to finish within a wall-clock budget.
+
+`plan_time_budget` picks the instances to run before the deadline from their
+estimated durations (see `eval.ordering`). `MOST_INSTANCES` admits the
+shortest instances first, which maximizes the number of finished instances.
+`STRATIFIED` admits instances round-robin across task types, shortest first
+within each type, so that as many task types as possible are covered. An
+instance is admitted if the estimated makespan of the admitted instances on
+all devices still fits the budget.
+
+Estimates are only estimates, so `TimeBudget` also checks every instance
+again when a device is about to start it and skips it if it is expected to
+run past the deadline. Skipped instances and the reasons are recorded in the
+run manifest; resuming the run picks them up.
+"""
+
+import re
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from eval.ordering import estimate_makespan
+from eval.pipeline import WorkItem
+
+MOST_INSTANCES = "most-instances"
+STRATIFIED = "stratified"
+BUDGET_STRATEGIES = (MOST_INSTANCES, STRATIFIED)
+
+_NUMBER = r"(\d+(?:\.\d+)?)"
+_DURATION = re.compile(rf"(?:{_NUMBER}h)?(?:{_NUMBER}m)?(?:{_NUMBER}s)?")
+
+
+def parse_time_budget(value: str, now: datetime | None = None) -> float:
+    """Seconds until a deadline given as a duration or a time of day.
+
+    Durations are seconds or combine hours, minutes and seconds, e.g. `5400`,
+    `90m` or `1h30m`. A time of day (`06:00`) is its next occurrence; a date
+    and time (`2025-01-31T06:00`) is taken as is.
+    """
+    value = value.strip()
+    now = now or datetime.now()
+    if re.fullmatch(_NUMBER, value):
+        return float(value)
+    match = _DURATION.fullmatch(value)
+    if value and match is not None:
+        hours, minutes, seconds = (float(g or 0) for g in match.groups())
+        return hours * 3600 + minutes * 60 + seconds
+
+    try:
+        clock = datetime.strptime(value, "%H:%M")
+    except ValueError:
+        pass
+    else:
+        deadline = now.replace(
+            hour=clock.hour, minute=clock.minute, second=0, microsecond=0
+        )
+        if deadline <= now:
+            deadline += timedelta(days=1)
+        return (deadline - now).total_seconds()
+
+    try:
+        deadline = datetime.fromisoformat(value)
+    except ValueError:
+        raise ValueError(f"Invalid time budget {value!r}")
+    seconds = (deadline - now).total_seconds()
+    if seconds <= 0:
+        raise ValueError(f"Deadline {value} has passed")
+    return seconds
+
+
+@dataclass
+class BudgetPlan:
+    # Instances to run, in the order they were admitted.
+    selected: List[WorkItem] = field(default_factory=list)
+    # Instances left out, with the reason.
+    skipped: Dict[WorkItem, str] = field(default_factory=dict)
+    # Estimated makespan of the selected instances.
+    makespan: float = field(default=0.0)
+
+
+def _stratified(
+    items: List[WorkItem], estimates: Dict[WorkItem, float]
+) -> List[WorkItem]:
+    by_task: Dict[str, List[WorkItem]] = defaultdict(list)
+    for item in sorted(items, key=lambda item: estimates[item]):
+        by_task[item.task_name].append(item)
+    # Each round takes the next shortest instance of every task type.
+    rounds = []
+    for instances in by_task.values():
+        for i, item in enumerate(instances):
+            rounds.append((i, estimates[item], item))
+    return [item for _, _, item in sorted(rounds, key=lambda r: r[:2])]
+
+
+def plan_time_budget(
+    items: Iterable[WorkItem],
+    estimates: Dict[WorkItem, float],
+    seconds: float,
+    n_devices: int,
+    strategy: str = MOST_INSTANCES,
+) -> BudgetPlan:
+    """Picks the instances that are expected to finish within `seconds`."""
+    items = list(items)
+    if strategy == STRATIFIED:
+        candidates = _stratified(items, estimates)
+    else:
+        candidates = sorted(items, key=lambda item: estimates[item])
+
+    plan = BudgetPlan()
+    durations: List[float] = []
+    total = 0.0
+    for item in candidates:
+        estimate = estimates[item]
+        if estimate > seconds:
+            plan.skipped[item] = (
+                f"estimated {estimate:.0f}s, longer than the {seconds:.0f}s budget"
+            )
+            continue
+        # Devices that start items as they free up finish no earlier than the
+        # average load, which rules out most items without the full estimate.
+        makespan = None
+        if (total + estimate) / max(1, n_devices) <= seconds:
+            makespan = estimate_makespan(
+                sorted(durations + [estimate], reverse=True), n_devices
+            )
+        if makespan is None or makespan > seconds:
+            plan.skipped[item] = (
+                f"estimated {estimate:.0f}s, does not fit the {seconds:.0f}s budget"
+            )
+            continue
+        plan.selected.append(item)
+        durations.append(estimate)
+        total += estimate
+        plan.makespan = makespan
+    return plan
+
+
+class TimeBudget:
+    """Deadline of a run, checked before every instance is started."""
+
+    def __init__(
+        self, seconds: float, estimates: Dict[WorkItem, float] | None = None
+    ):
+        self.seconds = seconds
+        self.estimates = estimates or {}
+        self.deadline = time.monotonic() + seconds
+
+    def seconds_left(self) -> float:
+        return self.deadline - time.monotonic()
+
+    def skip_reason(self, item: WorkItem) -> str | None:
+        """Why `item` must not be started now, None if it may be."""
+        left = self.seconds_left()
+        estimate = self.estimates.get(item, 0.0)
+        if estimate <= left:
+            return None
+        if left <= 0:
+            return "deadline passed"
+        return f"estimated {estimate:.0f}s, {left:.0f}s left before the deadline"
@@ -1,87 +1,145 @@
 import logging
-from eval.env.client import AndroidEnvClient
-from droidrun.portal import (
-    download_portal_apk,
-    enable_portal_accessibility,
-    check_portal_accessibility,
-    ping_portal,
-    ping_portal_content,
-    ping_portal_tcp,
-    set_overlay_offset,
-    A11Y_SERVICE_NAME as DROIDRUN_A11Y_SERVICE_NAME,
-)
-from adbutils import adb, AdbDevice
+import threading
 import time
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Dict, Iterator, Tuple
+
+from eval.env.client import AndroidEnvClient
+from eval.portal.apk_cache import PortalApkCache
+from eval.portal.probe import PORTAL_PACKAGE_NAME, DeviceStatus, probe_device
+
+# adbutils imports PIL and droidrun is slow to import, so both are imported
+# when a device is booted, not when the CLI starts.
+if TYPE_CHECKING:
+    from adbutils import AdbDevice
 
 logger = logging.getLogger(__name__)
 
 GOOGLE_A11Y_SERVICE_NAME = "com.google.androidenv.accessibilityforwarder/com.google.androidenv.accessibilityforwarder.AccessibilityForwarder"
-DROIDRUN_X_GOOGLE_A11Y_SERVICE_NAME = (
-    f"{DROIDRUN_A11Y_SERVICE_NAME}:{GOOGLE_A11Y_SERVICE_NAME}"
-)
 DEFAULT_OVERLAY_OFFSET = -126
+# Seconds a verification stays valid for the fast path. Every successful
+# fast check renews it, so it only has to outlast the longest task.
+DEFAULT_BOOT_STATE_TTL = 120.0
+
+
+def droidrun_x_google_a11y_service_name() -> str:
+    from droidrun.portal import A11Y_SERVICE_NAME as DROIDRUN_A11Y_SERVICE_NAME
+
+    return f"{DROIDRUN_A11Y_SERVICE_NAME}:{GOOGLE_A11Y_SERVICE_NAME}"
+
+
+class BootCancelled(RuntimeError):
+    pass
+
+
+def check_cancelled(cancelled: threading.Event | None):
+    """Stops a boot in a worker thread between two steps once cancelled."""
+    if cancelled is not None and cancelled.is_set():
+        raise BootCancelled("Boot cancelled")
+
+
+def backoff_delays(
+    initial: float = 0.5, maximum: float = 10.0, factor: float = 1.5
+) -> Iterator[float]:
+    """Poll delays growing geometrically from `initial` up to `maximum`."""
+    delay = initial
+    while True:
+        yield delay
+        delay = min(delay * factor, maximum)
+
+
+def ensure_connected(serial: str) -> "AdbDevice":
+    from adbutils import adb
 
-def ensure_connected(serial: str) -> AdbDevice:
     try:
         res = adb.connect(serial)
         if res.count("failed") > 0 or res.count("unable") > 0:
             raise res
     except Exception as e:
         raise RuntimeError(f"Device {serial} is not connected: {e}")
-    
+
     return adb.device(serial)
 
 
-def install_portal(device: AdbDevice):
+def get_installed_portal_sha256(device: "AdbDevice") -> str | None:
+    """SHA-256 of the portal APK installed on the device, if any."""
+    output = device.shell(
+        f"p=$(pm path {PORTAL_PACKAGE_NAME} | head -n1 | cut -d: -f2);"
+        ' [ -n "$p" ] && sha256sum "$p"'
+    )
+    return output.split()[0] if output.strip() else None
+
+
+def install_portal(device: "AdbDevice", apk_cache: PortalApkCache | None = None):
     logger.info(f"Installing portal...")
 
     try:
-        with download_portal_apk() as apk_path:
-            device.install(apk_path, uninstall=True, flags=["-g"], silent=False)
+        sha256, apk_path = (apk_cache or PortalApkCache()).fetch()
+    except Exception as e:
+        raise RuntimeError(f"Failed to download portal APK: {e}")
+
+    try:
+        if get_installed_portal_sha256(device) == sha256:
+            logger.info("Portal APK already installed, skipping reinstall")
+        else:
+            device.install(str(apk_path), uninstall=True, flags=["-g"], silent=False)
             logger.info("Portal APK installed successfully")
     except Exception as e:
-        raise RuntimeError(f"Failed to download and install portal APK: {e}")
+        raise RuntimeError(f"Failed to install portal APK: {e}")
 
     try:
+        from droidrun.portal import enable_portal_accessibility
+
         enable_portal_accessibility(
-            device, service_name=DROIDRUN_X_GOOGLE_A11Y_SERVICE_NAME
+            device, service_name=droidrun_x_google_a11y_service_name()
         )
         logger.info("Portal accessibility enabled successfully")
     except Exception as e:
         raise RuntimeError(f"Failed to enable portal accessibility: {e}")
 
 
-def check_portal(device: AdbDevice):
-    if not check_portal_accessibility(
-        device, service_name=DROIDRUN_X_GOOGLE_A11Y_SERVICE_NAME
-    ):
-        raise RuntimeError("Accessibility settings invalid")
-    
+def check_portal(device: "AdbDevice") -> DeviceStatus:
+    # a11y settings, overlay offset, package and content provider checks all
+    # run in one adb shell call. The TCP ping needs a host-side request.
     try:
-        set_overlay_offset(device, DEFAULT_OVERLAY_OFFSET)
-        logger.info("Overlay offset set successfully")
+        status = probe_device(device, overlay_offset=DEFAULT_OVERLAY_OFFSET)
     except Exception as e:
-        raise RuntimeError(f"Failed to set overlay offset: {e}")
+        raise RuntimeError(f"Failed to probe device: {e}")
 
-    try:
-        ping_portal(device)
-    except Exception as e:
-        raise RuntimeError(f"Failed to ping portal: {e}")
+    if not status.has_a11y_service(droidrun_x_google_a11y_service_name()):
+        raise RuntimeError("Accessibility settings invalid")
 
-    try:
-        ping_portal_content(device)
-    except Exception as e:
-        raise RuntimeError(f"Failed to ping portal content: {e}")
+    if not status.overlay_offset_set:
+        raise RuntimeError(
+            f"Failed to set overlay offset: {status.raw.get('overlay_offset')}"
+        )
+    logger.info("Overlay offset set successfully")
+
+    if not status.portal_version:
+        raise RuntimeError("Failed to ping portal: Portal is not installed")
+
+    if not status.portal_content_ok:
+        raise RuntimeError(
+            "Failed to ping portal content: Failed to get state from Droidrun Portal"
+        )
 
     try:
+        from droidrun.portal import ping_portal_tcp
+
         ping_portal_tcp(device)
     except Exception as e:
-        raise RuntimeError(f"Failed to ping portal TCP: {e}")
+        # droidrun falls back to the content provider without TCP.
+        logger.warning(f"Failed to ping portal TCP: {e}")
 
     logger.info("Portal is installed and accessible. You're good to go!")
+    return status
 
 
-def wait_ready(env: AndroidEnvClient, timeout: int = 300):
+def wait_ready(
+    env: AndroidEnvClient,
+    timeout: int = 300,
+    cancelled: threading.Event | None = None,
+):
     """
     Wait for the environment to be ready (health check returns True).
 
@@ -91,9 +149,12 @@ def wait_ready(env: AndroidEnvClient, timeout: int = 300):
     Args:
         callback: Optional function to call when environment is ready
         timeout: Maximum time to wait in seconds (default: 5 minutes)
+        cancelled: Stops waiting once set
     """
     start_time = time.time()
+    delays = backoff_delays()
     while time.time() - start_time < timeout:
+        check_cancelled(cancelled)
         try:
             if env.health():
                 logger.info(f"Environment {env.base_url} is ready!")
@@ -101,22 +162,29 @@ def wait_ready(env: AndroidEnvClient, timeout: int = 300):
         except Exception as e:
             logger.debug(f"Health check failed: {e}")
 
-        time.sleep(2)  # Poll every 2 seconds
+        time.sleep(next(delays))
 
     raise RuntimeError(
         f"Environment {env.base_url} failed to become ready within {timeout} seconds"
     )
 
 
-def boot_environment(env: AndroidEnvClient, serial: str):
+def boot_environment(
+    env: AndroidEnvClient, serial: str, cancelled: threading.Event | None = None
+) -> "AdbDevice":
+    """Verifies the device, installing the portal if needed.
+
+    Setting `cancelled` stops the boot before its next step.
+    """
     try:
         logger.info(f"Waiting for environment {env.base_url} to be ready...")
-        wait_ready(env, timeout=600)
+        wait_ready(env, timeout=600, cancelled=cancelled)
         logger.info(f"Environment {env.base_url} is ready!")
     except Exception as e:
         logger.error(f"Environment {env.base_url} failed to boot: {e}")
         raise e
 
+    check_cancelled(cancelled)
     try:
         device = ensure_connected(serial)
     except Exception as e:
@@ -124,16 +192,18 @@ def boot_environment(env: AndroidEnvClient, serial: str):
         raise e
 
     # check if portal is already installed
+    check_cancelled(cancelled)
     try:
         logger.info(f"Checking portal for environment {env.base_url}...")
         check_portal(device)
         logger.info(f"Portal is installed and accessible. You're good to go!")
-        return
+        return device
     except Exception as e:
         logger.info(
             f"Environment {env.base_url} failed to check portal: {e}. Trying to install and enable portal..."
         )
 
+    check_cancelled(cancelled)
     try:
         logger.info(f"Installing portal for environment {env.base_url}...")
         install_portal(device)
@@ -142,6 +212,7 @@ def boot_environment(env: AndroidEnvClient, serial: str):
         logger.error(f"Environment {env.base_url} failed to install portal: {e}")
         raise e
 
+    check_cancelled(cancelled)
     try:
         logger.info(f"Checking portal for environment {env.base_url}...")
         check_portal(device)
@@ -149,3 +220,88 @@ def boot_environment(env: AndroidEnvClient, serial: str):
     except Exception as e:
         logger.error(f"Environment {env.base_url} failed to check portal: {e}")
         raise e
+
+    return device
+
+
+@dataclass(frozen=True)
+class DeviceFingerprint:
+    boot_id: str
+    portal_version: str
+    a11y_services: str
+
+
+def get_device_fingerprint(device: "AdbDevice") -> DeviceFingerprint:
+    """Reads boot id, portal version and enabled a11y services in one call."""
+    status = probe_device(device, ("boot_id", "portal_version", "a11y_services"))
+    return DeviceFingerprint(
+        status.boot_id, status.portal_version, status.a11y_services
+    )
+
+
+@dataclass
+class BootState:
+    fingerprint: DeviceFingerprint
+    verified_at: float
+
+
+class BootStateCache:
+    """Remembers verified environments to skip repeated full boot checks.
+
+    While the last verification is younger than `ttl` seconds, a health
+    check plus one device fingerprint read replace `boot_environment`. A
+    matching fingerprint renews the verification: it includes the boot id, so
+    the device has not rebooted since. Any fingerprint mismatch, expiry or
+    `invalidate` forces a full check.
+    """
+
+    def __init__(self, ttl: float = DEFAULT_BOOT_STATE_TTL):
+        self.ttl = ttl
+        self._states: Dict[Tuple[str, str], BootState] = {}
+
+    def invalidate(self, env: AndroidEnvClient, serial: str):
+        self._states.pop((env.base_url, serial), None)
+
+    def _fast_path(self, env: AndroidEnvClient, serial: str) -> bool:
+        state = self._states.get((env.base_url, serial))
+        if state is None or time.monotonic() - state.verified_at > self.ttl:
+            return False
+
+        from adbutils import adb
+
+        try:
+            if not env.health():
+                return False
+            fingerprint = get_device_fingerprint(adb.device(serial))
+        except Exception as e:
+            logger.debug(f"Fast boot check for {serial} failed: {e}")
+            return False
+
+        if fingerprint != state.fingerprint:
+            logger.info(
+                f"Device {serial} changed since last boot check ({fingerprint}), re-verifying..."
+            )
+            return False
+        state.verified_at = time.monotonic()
+        return True
+
+    def ensure_booted(
+        self,
+        env: AndroidEnvClient,
+        serial: str,
+        cancelled: threading.Event | None = None,
+    ):
+        """Verifies the environment, fully only if the cached state is stale."""
+        start = time.monotonic()
+        if self._fast_path(env, serial):
+            logger.debug(
+                f"Environment {env.base_url} verified from cache in {time.monotonic() - start:.3f}s"
+            )
+            return
+
+        self.invalidate(env, serial)
+        device = boot_environment(env, serial, cancelled)
+        self._states[(env.base_url, serial)] = BootState(
+            fingerprint=get_device_fingerprint(device),
+            verified_at=time.monotonic(),
+        )
@@ -0,0 +1,170 @@
+"""Prefetched metadata for a whole task suite.
+
+`SuiteCatalog.load` fetches task names, lengths, goals, complexities and
+templates for one `(task_family, seed, n_task_combinations)` in a single
+bounded-parallel pass and persists them in the local cache, so later runs
+and `droidworld list-tasks` don't need a round trip per task. Runs of a few
+selected tasks fetch only the instances of those tasks and skip the cache.
+"""
+
+import asyncio
+import json
+import logging
+import os
+from dataclasses import dataclass, field, asdict
+from pathlib import Path
+from typing import Dict, List
+
+from eval.cache import get_cache_dir
+from eval.env.client import AsyncAndroidEnvClient
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of catalog requests in flight at once.
+DEFAULT_CONCURRENCY = 8
+
+
+@dataclass
+class TaskInstanceInfo:
+    goal: str
+    complexity: float
+    template: str
+
+
+@dataclass
+class SuiteCatalog:
+    task_family: str
+    seed: int
+    n_task_combinations: int
+    fingerprint: str
+    task_list: List[str] = field(default_factory=list)
+    instances: Dict[str, List[TaskInstanceInfo]] = field(default_factory=dict)
+
+    def task_id(self, task_name: str) -> int:
+        return self.task_list.index(task_name)
+
+    def length(self, task_name: str) -> int:
+        return len(self.instances[task_name])
+
+    def instance(self, task_name: str, task_idx: int) -> TaskInstanceInfo:
+        return self.instances[task_name][task_idx]
+
+    def select(self, min_index: int = 0, max_index: int = -1) -> List[str]:
+        """Same slice of the task list as `get_suite_task_list`."""
+        if max_index == -1:
+            return self.task_list[min_index:]
+        return self.task_list[min_index:max_index]
+
+    @staticmethod
+    def cache_path(task_family: str, seed: int, n_task_combinations: int) -> Path:
+        fname = f"{task_family}-seed{seed}-n{n_task_combinations}.json"
+        return get_cache_dir("catalog") / fname
+
+    @classmethod
+    def from_cache(
+        cls, task_family: str, seed: int, n_task_combinations: int
+    ) -> "SuiteCatalog | None":
+        """Loads a cached catalog without contacting the server."""
+        path = cls.cache_path(task_family, seed, n_task_combinations)
+        try:
+            with open(path) as f:
+                data = json.load(f)
+            data["instances"] = {
+                name: [TaskInstanceInfo(**info) for info in infos]
+                for name, infos in data["instances"].items()
+            }
+            return cls(**data)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable catalog cache {path}: {e}")
+            return None
+
+    def save(self):
+        path = self.cache_path(self.task_family, self.seed, self.n_task_combinations)
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp_path, "w") as f:
+            json.dump(asdict(self), f)
+        os.replace(tmp_path, path)
+        logger.debug(f"Wrote suite catalog to {path}")
+
+    @classmethod
+    async def load(
+        cls,
+        env: AsyncAndroidEnvClient,
+        task_family: str,
+        seed: int,
+        n_task_combinations: int,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        refresh: bool = False,
+        tasks: List[str] | None = None,
+    ) -> "SuiteCatalog":
+        """Returns the catalog of the suite currently loaded on the server.
+
+        The cached catalog is reused while the server's suite fingerprint is
+        unchanged. `env` must already be reinitialized with the same params.
+        With `tasks`, only the instances of those tasks are fetched, without
+        checking or updating the cache.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def bounded(coro):
+            async with semaphore:
+                return await coro
+
+        if tasks is not None:
+            task_list = await env.get_suite_task_list()
+            selected = [name for name in task_list if name in tasks]
+            fingerprint = ""
+        else:
+            fingerprint = await env.get_suite_fingerprint()
+            cached = cls.from_cache(task_family, seed, n_task_combinations)
+            if not refresh and cached is not None and cached.fingerprint == fingerprint:
+                logger.debug(f"Using cached suite catalog {fingerprint[:12]}")
+                return cached
+
+            logger.info(
+                f"Fetching suite catalog for {task_family} (seed {seed}, {n_task_combinations} combinations)..."
+            )
+            task_list = await env.get_suite_task_list()
+            selected = task_list
+        lengths = await asyncio.gather(
+            *[bounded(env.get_suite_task_length(name)) for name in selected]
+        )
+
+        async def fetch_instance(name: str, idx: int) -> TaskInstanceInfo:
+            goal, complexity, template = await asyncio.gather(
+                bounded(env.get_task_goal(name, idx)),
+                bounded(env.get_task_complexity(name, idx)),
+                bounded(env.get_task_template(name, idx)),
+            )
+            return TaskInstanceInfo(goal, complexity, template)
+
+        infos = await asyncio.gather(
+            *[
+                fetch_instance(name, idx)
+                for name, length in zip(selected, lengths)
+                for idx in range(length)
+            ]
+        )
+
+        instances: Dict[str, List[TaskInstanceInfo]] = {}
+        it = iter(infos)
+        for name, length in zip(selected, lengths):
+            instances[name] = [next(it) for _ in range(length)]
+
+        catalog = cls(
+            task_family=task_family,
+            seed=seed,
+            n_task_combinations=n_task_combinations,
+            fingerprint=fingerprint,
+            task_list=task_list,
+            instances=instances,
+        )
+        if tasks is not None:
+            return catalog
+        try:
+            catalog.save()
+        except Exception as e:
+            logger.warning(f"Could not cache suite catalog: {e}")
+        return catalog
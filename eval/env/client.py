@@ -28,20 +28,50 @@ environment. You'll need to implement your agent logic to interact with the
 environment.
 """
 
+from __future__ import annotations
+
+import asyncio
+import copy
+import hashlib
 import json
 import logging
+import threading
 import time
-from typing import Any, List
+from typing import TYPE_CHECKING, Any, Awaitable, Callable, List, TypeVar
 
-from android_world.env import json_action, representation_utils
-import numpy as np
+import httpx
 import pydantic
-import requests
+
+from eval.env import frames
+from eval.env.observations import (
+    DEFAULT_OBSERVATION_CACHE_SIZE,
+    ObservationCache,
+    apply_element_delta,
+    content_hash,
+)
+
+# android_world and numpy are only needed once elements and screenshots are
+# read, so health checks and suite queries start without them.
+if TYPE_CHECKING:
+    from android_world.env import json_action, representation_utils
+    import numpy as np
+
+    from eval.env.elements import ElementTree
 
 logger = logging.getLogger(__name__)
 logger.setLevel(logging.INFO)
 
 Params = dict[str, int | str]
+T = TypeVar("T")
+
+# Number of keep-alive connections kept open to the environment server.
+DEFAULT_POOL_SIZE = 10
+# Idle pooled connections are closed after this many seconds.
+DEFAULT_KEEPALIVE_EXPIRY = 60.0
+
+# Legacy screenshot transport: pixels as a JSON nested list.
+JSON_SCREENSHOTS = "json"
+SCREENSHOT_ENCODINGS = (*frames.ENCODINGS, JSON_SCREENSHOTS)
 
 
 class Response(pydantic.BaseModel):
@@ -50,6 +80,13 @@ class Response(pydantic.BaseModel):
 
 
 def parse_element(data: dict[str, Any]) -> representation_utils.UIElement:
+    from android_world.env import representation_utils
+
+    # Raw elements are cached, so the element must not share their values.
+    data = {
+        key: copy.deepcopy(value) if isinstance(value, (dict, list)) else value
+        for key, value in data.items()
+    }
     # Parse nested bounding boxes if they exist
     if "bbox" in data and data["bbox"] is not None:
         data["bbox"] = representation_utils.BoundingBox(**data["bbox"])
@@ -58,165 +95,516 @@ def parse_element(data: dict[str, Any]) -> representation_utils.UIElement:
     return representation_utils.UIElement(**data)
 
 
-class AndroidEnvClient:
-    """Client for interacting with the Android environment server."""
+class AsyncAndroidEnvClient:
+    """Asyncio client for interacting with the Android environment server.
+
+    All calls share one persistent connection pool, so consecutive round trips
+    reuse keep-alive connections instead of opening a new TCP connection each.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:5000",
+        pool_size: int = DEFAULT_POOL_SIZE,
+        timeout: float | None = None,
+        screenshot_encoding: str = frames.RAW,
+        observation_cache_size: int = DEFAULT_OBSERVATION_CACHE_SIZE,
+        element_deltas: bool = True,
+    ):
+        if screenshot_encoding not in SCREENSHOT_ENCODINGS:
+            raise ValueError(f"Unknown screenshot encoding {screenshot_encoding}")
 
-    def __init__(self, base_url: str = "http://localhost:5000"):
-        logger.info(
-            "Setting up Android environment using Docker - Initial setup may take"
-            " 5-10 minutes. Please wait..."
-        )
         self.base_url = base_url
+        self.pool_size = pool_size
+        # Switched to JSON_SCREENSHOTS if the server has no binary endpoint.
+        self.screenshot_encoding = screenshot_encoding
+        self._has_suite_fingerprint = True
+        # Parameters of the last suite this client loaded, if any.
+        self._suite_params: dict[str, Any] | None = None
+        # Ask for changed elements only, relative to the last element list.
+        self.element_deltas = element_deltas
+        self._observations = ObservationCache(observation_cache_size)
+        self._etags: dict[str, str] = {}
+        self._http = httpx.AsyncClient(
+            base_url=base_url,
+            timeout=timeout,
+            limits=httpx.Limits(
+                max_connections=pool_size,
+                max_keepalive_connections=pool_size,
+                keepalive_expiry=DEFAULT_KEEPALIVE_EXPIRY,
+            ),
+        )
 
-    def reset(self, go_home: bool) -> Response:
-        """Resets the environment."""
-        response = requests.post(f"{self.base_url}/reset", params={"go_home": go_home})
+    async def __aenter__(self) -> "AsyncAndroidEnvClient":
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        """Closes all pooled connections. Does not close the environment."""
+        await self._http.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs) -> httpx.Response:
+        response = await self._http.request(method, path, **kwargs)
         response.raise_for_status()
+        return response
+
+    async def reset(self, go_home: bool) -> Response:
+        """Resets the environment."""
+        response = await self._request("POST", "/reset", params={"go_home": go_home})
         return Response(**response.json())
 
-    def get_screenshot(self, wait_to_stabilize: bool = False) -> np.ndarray[Any, Any]:
+    async def _get_observation(
+        self,
+        key: str,
+        path: str,
+        params: dict[str, Any],
+        decode: Callable[[httpx.Response], Any],
+    ) -> tuple[str, Any]:
+        """GETs an observation, reusing the decoded copy if it is unchanged.
+
+        Sends the last content hash seen for `key` as `If-None-Match` and
+        returns `(hash, decoded observation)`.
+        """
+        etag = self._etags.get(key)
+        cached = self._observations.get((key, etag)) if etag else None
+        headers = {"If-None-Match": etag} if cached is not None else {}
+        if cached is None:
+            params = {k: v for k, v in params.items() if k != "since"}
+
+        response = await self._http.get(path, params=params, headers=headers)
+        if response.status_code == 304 and cached is not None:
+            return etag, cached
+        response.raise_for_status()
+
+        etag = response.headers.get("ETag") or content_hash(response.content)
+        observation = self._observations.get((key, etag))
+        if observation is None:
+            observation = decode(response)
+            self._observations.put((key, etag), observation)
+        self._etags[key] = etag
+        return etag, observation
+
+    async def get_screenshot(
+        self, wait_to_stabilize: bool = False
+    ) -> np.ndarray[Any, Any]:
         """Gets the current screenshot of the environment."""
-        response = requests.get(
-            f"{self.base_url}/screenshot",
-            params={"wait_to_stabilize": wait_to_stabilize},
+        if self.screenshot_encoding != JSON_SCREENSHOTS:
+            try:
+                return await self._get_binary_screenshot(wait_to_stabilize)
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (404, 405):
+                    raise
+                logger.info(
+                    f"Environment {self.base_url} does not serve binary screenshots, falling back to JSON"
+                )
+                self.screenshot_encoding = JSON_SCREENSHOTS
+
+        def decode(response: httpx.Response) -> np.ndarray[Any, Any]:
+            import numpy as np
+
+            # Same dtype as the binary frames.
+            pixels = np.array(response.json()["pixels"], dtype=np.uint8)
+            pixels.setflags(write=False)  # shared through the observation cache
+            return pixels
+
+        _, screenshot = await self._get_observation(
+            "screenshot",
+            "/screenshot",
+            {"wait_to_stabilize": wait_to_stabilize},
+            decode,
         )
-        response.raise_for_status()
-        image = response.json()
-        return np.array(image["pixels"])
+        return screenshot
+
+    async def _get_binary_screenshot(
+        self, wait_to_stabilize: bool
+    ) -> np.ndarray[Any, Any]:
+        _, screenshot = await self._get_observation(
+            f"screenshot/{self.screenshot_encoding}",
+            "/screenshot/raw",
+            {
+                "wait_to_stabilize": wait_to_stabilize,
+                "encoding": self.screenshot_encoding,
+            },
+            lambda response: frames.decode_frame(response.content, response.headers),
+        )
+        return screenshot
+
+    async def _get_raw_elements(
+        self, wait_to_stabilize: bool
+    ) -> tuple[str, List[dict[str, Any]]]:
+        """Gets `(hash, raw elements)`, asking for a delta if one is known."""
+        params: dict[str, Any] = {"wait_to_stabilize": wait_to_stabilize}
+        if self.element_deltas and "elements" in self._etags:
+            params["since"] = self._etags["elements"]
+
+        def decode(response: httpx.Response) -> List[dict[str, Any]]:
+            payload = response.json()
+            delta = payload.get("ui_elements_delta")
+            if delta is None:
+                return payload["ui_elements"]
+            base = self._observations.get(("elements", delta["base"]))
+            if base is None:
+                raise RuntimeError(f"Element delta base {delta['base']} is unknown")
+            return apply_element_delta(base, delta)
 
-    def get_elements(
+        try:
+            return await self._get_observation("elements", "/elements", params, decode)
+        except RuntimeError as e:
+            # Delta base was evicted meanwhile, fetch the full element list.
+            logger.debug(f"{e}, refetching all elements")
+            self._etags.pop("elements", None)
+            return await self._get_observation("elements", "/elements", params, decode)
+
+    async def get_elements(
         self, wait_to_stabilize: bool = False
     ) -> List[representation_utils.UIElement]:
-        """Gets the current ui elements of the environment."""
-        response = requests.get(
-            f"{self.base_url}/elements",
-            params={"wait_to_stabilize": wait_to_stabilize},
-        )
-        response.raise_for_status()
-        raw_elements = response.json()["ui_elements"]
+        """Gets the current ui elements of the environment.
+
+        The elements are new objects on every call, callers may change them.
+        """
+        _, raw_elements = await self._get_raw_elements(wait_to_stabilize)
         return [parse_element(el) for el in raw_elements]
 
-    def get_auxiliaries(self, wait_to_stabilize: bool = False) -> dict[str, Any]:
+    async def get_element_tree(self, wait_to_stabilize: bool = False) -> ElementTree:
+        """Gets the current ui elements as a compact, lazily parsed tree.
+
+        Trees of an unchanged screen share their arrays, but every call
+        materializes its own elements.
+        """
+        etag, raw_elements = await self._get_raw_elements(wait_to_stabilize)
+        tree = self._observations.get(("elements/tree", etag))
+        if tree is None:
+            from eval.env.elements import ElementTree
+
+            tree = ElementTree(raw_elements)
+            self._observations.put(("elements/tree", etag), tree)
+        return tree.view()
+
+    async def get_auxiliaries(self, wait_to_stabilize: bool = False) -> dict[str, Any]:
         """Gets the current auxiliaries of the environment."""
-        response = requests.get(
-            f"{self.base_url}/auxiliaries",
-            params={"wait_to_stabilize": wait_to_stabilize},
+        response = await self._request(
+            "GET", "/auxiliaries", params={"wait_to_stabilize": wait_to_stabilize}
         )
-        response.raise_for_status()
         return response.json()["auxiliaries"]
 
-    def get_packages(self) -> list[str]:
+    async def get_packages(self) -> list[str]:
         """Gets the current packages of the environment."""
-        response = requests.get(f"{self.base_url}/packages")
-        response.raise_for_status()
+        response = await self._request("GET", "/packages")
         return response.json()["packages"]
 
-    def execute_action(
+    async def execute_action(
         self,
         action: json_action.JSONAction,
     ) -> Response:
         """Executes an action in the environment."""
         logger.debug(f"Executing action: {action.json_str()}")
-        response = requests.post(
-            f"{self.base_url}/execute_action", json=json.loads(action.json_str())
+        response = await self._request(
+            "POST", "/execute_action", json=json.loads(action.json_str())
         )
-        response.raise_for_status()
         return Response(**response.json())
 
-    def get_suite_task_list(self, min_index: int = 0, max_index: int = -1) -> list[str]:
+    async def get_suite_task_list(
+        self, min_index: int = 0, max_index: int = -1
+    ) -> list[str]:
         """Gets the list of tasks in the suite."""
-        response = requests.get(
-            f"{self.base_url}/suite/task_list",
+        response = await self._request(
+            "GET",
+            "/suite/task_list",
             params={"min_index": min_index, "max_index": max_index},
         )
-        response.raise_for_status()
         return response.json()["task_list"]
 
-    def get_suite_task_length(self, task_type: str) -> int:
+    async def get_suite_task_length(self, task_type: str) -> int:
         """Gets the length of the suite of tasks."""
-        response = requests.get(
-            f"{self.base_url}/suite/task_length", params={"task_type": task_type}
+        response = await self._request(
+            "GET", "/suite/task_length", params={"task_type": task_type}
         )
-        response.raise_for_status()
         return response.json()["length"]
 
-    def reinitialize_suite(
+    async def get_suite_fingerprint(self) -> str:
+        """Gets a fingerprint that changes whenever the suite changes.
+
+        Servers without a fingerprint endpoint are fingerprinted by their
+        task list and the parameters this client last loaded the suite with,
+        which takes a single request.
+        """
+        if self._has_suite_fingerprint:
+            try:
+                response = await self._request("GET", "/suite/fingerprint")
+                return response.json()["fingerprint"]
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code not in (404, 405):
+                    raise
+                self._has_suite_fingerprint = False
+
+        task_list = await self.get_suite_task_list()
+        summary = json.dumps([self._suite_params, task_list], sort_keys=True)
+        return hashlib.sha256(summary.encode()).hexdigest()
+
+    async def reinitialize_suite(
         self,
         n_task_combinations: int = 2,  # Default from initial server setup.
         seed: int = 42,  # Default from initial server setup.
         task_family: str = "android_world",  # Default from initial server setup.
     ) -> Response:
         """Reinitializes the suite of tasks."""
-        response = requests.get(
-            f"{self.base_url}/suite/reinitialize",
-            params={
-                "n_task_combinations": n_task_combinations,
-                "seed": seed,
-                "task_family": task_family,
-            },
-        )
-        response.raise_for_status()
+        params = {
+            "n_task_combinations": n_task_combinations,
+            "seed": seed,
+            "task_family": task_family,
+        }
+        response = await self._request("GET", "/suite/reinitialize", params=params)
+        self._suite_params = params
         return Response(**response.json())
 
-    def initialize_task(self, task_type: str, task_idx: int) -> Response:
+    async def initialize_task(self, task_type: str, task_idx: int) -> Response:
         """Initializes the task in the environment."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.post(f"{self.base_url}/task/initialize", params=params)
-        response.raise_for_status()
+        response = await self._request("POST", "/task/initialize", params=params)
         return Response(**response.json())
 
-    def tear_down_task(self, task_type: str, task_idx: int) -> Response:
+    async def tear_down_task(self, task_type: str, task_idx: int) -> Response:
         """Tears down the task in the environment."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.post(f"{self.base_url}/task/tear_down", params=params)
-        response.raise_for_status()
+        response = await self._request("POST", "/task/tear_down", params=params)
         return Response(**response.json())
 
-    def get_task_score(self, task_type: str, task_idx: int) -> float:
+    async def get_task_score(self, task_type: str, task_idx: int) -> float:
         """Gets the score of the current task."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.get(f"{self.base_url}/task/score", params=params)
-        response.raise_for_status()
+        response = await self._request("GET", "/task/score", params=params)
         return response.json()["score"]
 
-    def get_task_goal(self, task_type: str, task_idx: int) -> str:
+    async def get_task_goal(self, task_type: str, task_idx: int) -> str:
         """Gets the goal of the current task."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.get(f"{self.base_url}/task/goal", params=params)
-        response.raise_for_status()
+        response = await self._request("GET", "/task/goal", params=params)
         return response.json()["goal"]
 
-    def get_task_complexity(self, task_type: str, task_idx: int) -> float:
+    async def get_task_complexity(self, task_type: str, task_idx: int) -> float:
         """Gets the complexity of the current task."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.get(f"{self.base_url}/task/complexity", params=params)
-        response.raise_for_status()
+        response = await self._request("GET", "/task/complexity", params=params)
         return response.json()["complexity"]
 
-    def get_task_template(self, task_type: str, task_idx: int) -> str:
+    async def get_task_template(self, task_type: str, task_idx: int) -> str:
         """Gets the template of the current task."""
         params: Params = {"task_type": task_type, "task_idx": task_idx}
-        response = requests.get(f"{self.base_url}/task/template", params=params)
-        response.raise_for_status()
+        response = await self._request("GET", "/task/template", params=params)
         return response.json()["template"]
 
-    def close(self) -> None:
+    async def save_snapshot(self, name: str) -> Response:
+        """Saves an emulator snapshot of the current device state."""
+        response = await self._request("POST", "/snapshot/save", params={"name": name})
+        return Response(**response.json())
+
+    async def load_snapshot(self, name: str) -> Response:
+        """Restores the device to a previously saved emulator snapshot."""
+        response = await self._request("POST", "/snapshot/load", params={"name": name})
+        # Cached observations describe the screen before the restore.
+        self._observations.clear()
+        self._etags.clear()
+        return Response(**response.json())
+
+    async def close(self) -> None:
         """Closes the environment."""
-        response = requests.post(f"{self.base_url}/close")
-        response.raise_for_status()
+        await self._request("POST", "/close")
 
-    def health(self) -> bool:
+    async def health(self) -> bool:
         """Checks the health of the environment."""
         try:
-            response = requests.get(f"{self.base_url}/health")
-            response.raise_for_status()
+            await self._request("GET", "/health")
         except Exception as e:  # pylint: disable=broad-exception-caught
             logger.debug(f"Environment is not healthy: {e}")
             return False
         return True
 
 
+class _LoopThread:
+    """Event loop running forever in a daemon thread."""
+
+    def __init__(self, name: str):
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name=name, daemon=True
+        )
+        self._thread.start()
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """Runs `coro` on the loop and blocks until it is done."""
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def run_async(self, coro: Awaitable[T]) -> T:
+        """Runs `coro` on the loop without blocking the caller's event loop."""
+        future = asyncio.run_coroutine_threadsafe(coro, self.loop)
+        return await asyncio.wrap_future(future)
+
+    def stop(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
+
+
+class _AsyncBridge:
+    """Awaitable view of an `AsyncAndroidEnvClient` owned by another loop.
+
+    Exposes the same coroutine methods, usable from any event loop.
+    """
+
+    def __init__(self, loop: _LoopThread, client: AsyncAndroidEnvClient):
+        self._loop = loop
+        self._client = client
+
+    def __getattr__(self, name: str) -> Callable[..., Awaitable[Any]]:
+        method = getattr(self._client, name)
+
+        async def call(*args, **kwargs):
+            return await self._loop.run_async(method(*args, **kwargs))
+
+        return call
+
+
+class AndroidEnvClient:
+    """Client for interacting with the Android environment server.
+
+    Thin blocking wrapper over `AsyncAndroidEnvClient`. The async client and
+    its connection pool live on a private event loop thread, so sync callers
+    and coroutines (through `aio`) share the same keep-alive connections.
+    """
+
+    def __init__(
+        self,
+        base_url: str = "http://localhost:5000",
+        pool_size: int = DEFAULT_POOL_SIZE,
+        screenshot_encoding: str = frames.RAW,
+        observation_cache_size: int = DEFAULT_OBSERVATION_CACHE_SIZE,
+        element_deltas: bool = True,
+    ):
+        logger.info(
+            "Setting up Android environment using Docker - Initial setup may take"
+            " 5-10 minutes. Please wait..."
+        )
+        self.base_url = base_url
+        self._loop = _LoopThread(name=f"android-env-client {base_url}")
+        self._client = AsyncAndroidEnvClient(
+            base_url,
+            pool_size=pool_size,
+            screenshot_encoding=screenshot_encoding,
+            observation_cache_size=observation_cache_size,
+            element_deltas=element_deltas,
+        )
+        self.aio = _AsyncBridge(self._loop, self._client)
+
+    def _run(self, coro: Awaitable[T]) -> T:
+        return self._loop.run(coro)
+
+    def disconnect(self) -> None:
+        """Closes all pooled connections. Does not close the environment."""
+        self._run(self._client.aclose())
+        self._loop.stop()
+
+    def reset(self, go_home: bool) -> Response:
+        """Resets the environment."""
+        return self._run(self._client.reset(go_home))
+
+    def get_screenshot(self, wait_to_stabilize: bool = False) -> np.ndarray[Any, Any]:
+        """Gets the current screenshot of the environment."""
+        return self._run(self._client.get_screenshot(wait_to_stabilize))
+
+    def get_elements(
+        self, wait_to_stabilize: bool = False
+    ) -> List[representation_utils.UIElement]:
+        """Gets the current ui elements of the environment."""
+        return self._run(self._client.get_elements(wait_to_stabilize))
+
+    def get_element_tree(self, wait_to_stabilize: bool = False) -> ElementTree:
+        """Gets the current ui elements as a compact, lazily parsed tree."""
+        return self._run(self._client.get_element_tree(wait_to_stabilize))
+
+    def get_auxiliaries(self, wait_to_stabilize: bool = False) -> dict[str, Any]:
+        """Gets the current auxiliaries of the environment."""
+        return self._run(self._client.get_auxiliaries(wait_to_stabilize))
+
+    def get_packages(self) -> list[str]:
+        """Gets the current packages of the environment."""
+        return self._run(self._client.get_packages())
+
+    def execute_action(
+        self,
+        action: json_action.JSONAction,
+    ) -> Response:
+        """Executes an action in the environment."""
+        return self._run(self._client.execute_action(action))
+
+    def get_suite_task_list(self, min_index: int = 0, max_index: int = -1) -> list[str]:
+        """Gets the list of tasks in the suite."""
+        return self._run(self._client.get_suite_task_list(min_index, max_index))
+
+    def get_suite_task_length(self, task_type: str) -> int:
+        """Gets the length of the suite of tasks."""
+        return self._run(self._client.get_suite_task_length(task_type))
+
+    def get_suite_fingerprint(self) -> str:
+        """Gets a fingerprint that changes whenever the suite changes."""
+        return self._run(self._client.get_suite_fingerprint())
+
+    def reinitialize_suite(
+        self,
+        n_task_combinations: int = 2,  # Default from initial server setup.
+        seed: int = 42,  # Default from initial server setup.
+        task_family: str = "android_world",  # Default from initial server setup.
+    ) -> Response:
+        """Reinitializes the suite of tasks."""
+        return self._run(
+            self._client.reinitialize_suite(n_task_combinations, seed, task_family)
+        )
+
+    def initialize_task(self, task_type: str, task_idx: int) -> Response:
+        """Initializes the task in the environment."""
+        return self._run(self._client.initialize_task(task_type, task_idx))
+
+    def tear_down_task(self, task_type: str, task_idx: int) -> Response:
+        """Tears down the task in the environment."""
+        return self._run(self._client.tear_down_task(task_type, task_idx))
+
+    def get_task_score(self, task_type: str, task_idx: int) -> float:
+        """Gets the score of the current task."""
+        return self._run(self._client.get_task_score(task_type, task_idx))
+
+    def get_task_goal(self, task_type: str, task_idx: int) -> str:
+        """Gets the goal of the current task."""
+        return self._run(self._client.get_task_goal(task_type, task_idx))
+
+    def get_task_complexity(self, task_type: str, task_idx: int) -> float:
+        """Gets the complexity of the current task."""
+        return self._run(self._client.get_task_complexity(task_type, task_idx))
+
+    def get_task_template(self, task_type: str, task_idx: int) -> str:
+        """Gets the template of the current task."""
+        return self._run(self._client.get_task_template(task_type, task_idx))
+
+    def save_snapshot(self, name: str) -> Response:
+        """Saves an emulator snapshot of the current device state."""
+        return self._run(self._client.save_snapshot(name))
+
+    def load_snapshot(self, name: str) -> Response:
+        """Restores the device to a previously saved emulator snapshot."""
+        return self._run(self._client.load_snapshot(name))
+
+    def close(self) -> None:
+        """Closes the environment."""
+        self._run(self._client.close())
+
+    def health(self) -> bool:
+        """Checks the health of the environment."""
+        return self._run(self._client.health())
+
+
 if __name__ == "__main__":
+    from android_world.env.json_action import JSONAction
+
     client = AndroidEnvClient()
 
     while True:
@@ -232,9 +620,7 @@ if __name__ == "__main__":
     screenshot = client.get_screenshot()
     print("Screen dimensions:", screenshot.shape)
 
-    res = client.execute_action(
-        json_action.JSONAction(action_type="click", x=100, y=200)
-    )
+    res = client.execute_action(JSONAction(action_type="click", x=100, y=200))
     print(f"execute_action response: {res}")
 
     task_list = client.get_suite_task_list(max_index=-1)
@@ -0,0 +1,166 @@
+"""Compact, lazily materialized ui element trees.
+
+`ElementTree` stores the raw elements returned by the environment server as
+struct-of-arrays: bounding boxes in `(n, 4)` float arrays, boolean
+attributes in one `(n, k)` int8 array and strings in interned lists.
+`UIElement` objects are only built for the elements that are accessed, and
+geometric/attribute queries run vectorized over the arrays. The arrays are
+read-only, so that trees of one observation can share them through `view`.
+"""
+
+import copy
+import sys
+from typing import Any, Dict, Iterator, List
+
+import numpy as np
+from android_world.env import representation_utils
+
+BOX_FIELDS = ("bbox", "bbox_pixels")
+# Column order of the bbox arrays.
+BOX_COLUMNS = ("x_min", "y_min", "x_max", "y_max")
+BOOL_FIELDS = (
+    "is_checked",
+    "is_checkable",
+    "is_clickable",
+    "is_editable",
+    "is_enabled",
+    "is_focused",
+    "is_focusable",
+    "is_long_clickable",
+    "is_scrollable",
+    "is_selected",
+    "is_visible",
+)
+STRING_FIELDS = (
+    "text",
+    "content_description",
+    "class_name",
+    "hint_text",
+    "package_name",
+    "resource_name",
+    "tooltip",
+    "resource_id",
+)
+KNOWN_FIELDS = frozenset(BOX_FIELDS + BOOL_FIELDS + STRING_FIELDS)
+
+# Value stored in the flag array for attributes that are None.
+UNSET = -1
+_NO_BOX = (np.nan, np.nan, np.nan, np.nan)
+
+
+def _intern(value: str | None) -> str | None:
+    return sys.intern(value) if isinstance(value, str) else value
+
+
+def _flag(value: bool | None) -> int:
+    return UNSET if value is None else int(bool(value))
+
+
+def _box(value: dict[str, float] | None) -> tuple:
+    if not value:
+        return _NO_BOX
+    return tuple(value[column] for column in BOX_COLUMNS)
+
+
+class ElementTree:
+    """Struct-of-arrays view over the ui elements of one observation."""
+
+    def __init__(self, raw_elements: List[Dict[str, Any]]):
+        n = len(raw_elements)
+        self.boxes = {
+            name: np.array(
+                [_box(el.get(name)) for el in raw_elements], dtype=np.float64
+            ).reshape(n, 4)
+            for name in BOX_FIELDS
+        }
+        self.flags = np.array(
+            [[_flag(el.get(name)) for name in BOOL_FIELDS] for el in raw_elements],
+            dtype=np.int8,
+        ).reshape(n, len(BOOL_FIELDS))
+        self.strings = {
+            name: tuple(_intern(el.get(name)) for el in raw_elements)
+            for name in STRING_FIELDS
+        }
+        # Rare attributes (e.g. metadata) are kept per element, only if set.
+        self.extras: Dict[int, Dict[str, Any]] = {}
+        for i, el in enumerate(raw_elements):
+            extra = {k: v for k, v in el.items() if k not in KNOWN_FIELDS}
+            if extra:
+                self.extras[i] = extra
+        for array in (*self.boxes.values(), self.flags):
+            array.setflags(write=False)
+        self._elements: Dict[int, representation_utils.UIElement] = {}
+
+    def view(self) -> "ElementTree":
+        """Tree over the same arrays that materializes its own elements."""
+        tree = object.__new__(ElementTree)
+        tree.boxes, tree.flags = self.boxes, self.flags
+        tree.strings, tree.extras = self.strings, self.extras
+        tree._elements = {}
+        return tree
+
+    def __len__(self) -> int:
+        return self.flags.shape[0]
+
+    def __getitem__(self, index: int) -> representation_utils.UIElement:
+        if index < 0:
+            index += len(self)
+        element = self._elements.get(index)
+        if element is None:
+            element = self._materialize(index)
+            self._elements[index] = element
+        return element
+
+    def __iter__(self) -> Iterator[representation_utils.UIElement]:
+        for i in range(len(self)):
+            yield self[i]
+
+    def _materialize(self, index: int) -> representation_utils.UIElement:
+        if not 0 <= index < len(self):
+            raise IndexError(f"Element index {index} out of range")
+
+        fields: Dict[str, Any] = {
+            name: values[index] for name, values in self.strings.items()
+        }
+        for column, name in enumerate(BOOL_FIELDS):
+            value = self.flags[index, column]
+            fields[name] = None if value == UNSET else bool(value)
+        for name, boxes in self.boxes.items():
+            box = boxes[index]
+            fields[name] = (
+                None
+                if np.isnan(box[0])
+                else representation_utils.BoundingBox(
+                    **{column: float(v) for column, v in zip(BOX_COLUMNS, box)}
+                )
+            )
+        fields.update(copy.deepcopy(self.extras.get(index, {})))
+        return representation_utils.UIElement(**fields)
+
+    def to_list(self) -> List[representation_utils.UIElement]:
+        """Materializes every element, like `AndroidEnvClient.get_elements`."""
+        return list(self)
+
+    def flag(self, name: str) -> np.ndarray:
+        """Boolean mask of the elements whose attribute `name` is True."""
+        return self.flags[:, BOOL_FIELDS.index(name)] == 1
+
+    def contains_point(
+        self, x: float, y: float, box: str = "bbox_pixels"
+    ) -> np.ndarray:
+        """Boolean mask of the elements whose bbox contains `(x, y)`."""
+        boxes = self.boxes[box]
+        return (
+            (boxes[:, 0] <= x)
+            & (x <= boxes[:, 2])
+            & (boxes[:, 1] <= y)
+            & (y <= boxes[:, 3])
+        )
+
+    def select(self, mask: np.ndarray) -> List[representation_utils.UIElement]:
+        """Materializes only the elements selected by `mask`."""
+        return [self[int(i)] for i in np.flatnonzero(mask)]
+
+    def clickable_at(self, x: float, y: float) -> List[representation_utils.UIElement]:
+        """All clickable elements whose pixel bbox contains `(x, y)`."""
+        return self.select(self.flag("is_clickable") & self.contains_point(x, y))
@@ -0,0 +1,171 @@
+"""Concurrent boot of several environment/device pairs.
+
+`FleetBoot` brings up N `(env_url, serial)` pairs at once: health polling
+with adaptive backoff runs on the event loop, and the blocking adb/portal
+checks of every device run in parallel worker threads. Callers can start
+working once a quorum of devices is ready and pick up the stragglers later
+through `as_ready`.
+
+The worker threads are daemon threads outside the event loop's executor, so
+a caller that got its quorum can `cancel` the stragglers and exit: the
+threads stop at their next boot step and never hold up interpreter exit.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Sequence, Tuple
+
+from eval.env.boot import BootStateCache, backoff_delays, boot_environment
+from eval.env.client import AndroidEnvClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BOOT_TIMEOUT = 600
+
+
+@dataclass
+class BootReport:
+    env_url: str
+    serial: str
+    ready: bool = field(default=False)
+    time_to_ready: float | None = field(default=None)
+    error: str | None = field(default=None)
+
+
+async def wait_ready_async(env: AndroidEnvClient, timeout: float):
+    """Polls the environment's health with growing delays until it is up."""
+    start_time = time.monotonic()
+    for delay in backoff_delays():
+        if await env.aio.health():
+            return
+        if time.monotonic() - start_time + delay > timeout:
+            break
+        await asyncio.sleep(delay)
+
+    raise RuntimeError(
+        f"Environment {env.base_url} failed to become ready within {timeout} seconds"
+    )
+
+
+async def run_detached(func: Callable[..., Any], *args: Any) -> Any:
+    """Runs blocking `func` in a daemon thread and waits for its result.
+
+    Unlike `asyncio.to_thread`, the event loop does not wait for the thread
+    when it shuts down.
+    """
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+
+    def settle(result: Any, error: BaseException | None):
+        if future.done():
+            return
+        if error is not None:
+            future.set_exception(error)
+        else:
+            future.set_result(result)
+
+    def target():
+        result, error = None, None
+        try:
+            result = func(*args)
+        except BaseException as e:
+            error = e
+        try:
+            loop.call_soon_threadsafe(settle, result, error)
+        except RuntimeError:
+            pass  # the loop is closed, nobody waits for the result
+
+    threading.Thread(target=target, daemon=True).start()
+    return await future
+
+
+class FleetBoot:
+    """Boots several environment/device pairs concurrently.
+
+    Devices are verified through `boot_cache` if given, and `prepare` runs
+    once a device is verified, e.g. to load the suite on it.
+    """
+
+    def __init__(
+        self,
+        targets: Sequence[Tuple[AndroidEnvClient, str]],
+        timeout: float = DEFAULT_BOOT_TIMEOUT,
+        boot_cache: BootStateCache | None = None,
+        prepare: Callable[[AndroidEnvClient, str], Awaitable[None]] | None = None,
+    ):
+        self.targets = list(targets)
+        self.timeout = timeout
+        self.boot_cache = boot_cache
+        self.prepare = prepare
+        self.reports = [BootReport(env.base_url, serial) for env, serial in targets]
+        self._pending: Dict[asyncio.Task, BootReport] = {}
+        self._started_at = 0.0
+        self._cancelled = threading.Event()
+
+    def start(self) -> "FleetBoot":
+        self._started_at = time.monotonic()
+        for (env, serial), report in zip(self.targets, self.reports):
+            task = asyncio.create_task(self._boot(env, serial, report))
+            self._pending[task] = report
+        return self
+
+    async def _boot(
+        self, env: AndroidEnvClient, serial: str, report: BootReport
+    ) -> BootReport:
+        try:
+            await wait_ready_async(env, self.timeout)
+            if self.boot_cache is not None:
+                await run_detached(
+                    self.boot_cache.ensure_booted, env, serial, self._cancelled
+                )
+            else:
+                await run_detached(boot_environment, env, serial, self._cancelled)
+            if self.prepare is not None:
+                await self.prepare(env, serial)
+            report.ready = True
+            report.time_to_ready = time.monotonic() - self._started_at
+            logger.info(
+                f"Device {serial} ({env.base_url}) ready after {report.time_to_ready:.1f}s"
+            )
+        except Exception as e:
+            report.error = str(e)
+            logger.error(f"Device {serial} ({env.base_url}) failed to boot: {e}")
+        return report
+
+    def target(self, report: BootReport) -> Tuple[AndroidEnvClient, str]:
+        return self.targets[self.reports.index(report)]
+
+    @property
+    def ready(self) -> List[BootReport]:
+        return [report for report in self.reports if report.ready]
+
+    async def wait_for_quorum(self, quorum: int) -> List[BootReport]:
+        """Returns as soon as `quorum` devices are ready or all boots ended."""
+        while len(self.ready) < quorum and self._pending:
+            done, _ = await asyncio.wait(
+                self._pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                self._pending.pop(task)
+        return self.ready
+
+    async def as_ready(self) -> AsyncIterator[BootReport]:
+        """Yields the remaining devices as they become ready."""
+        while self._pending:
+            done, _ = await asyncio.wait(
+                self._pending, return_when=asyncio.FIRST_COMPLETED
+            )
+            for task in done:
+                report = self._pending.pop(task)
+                if report.ready:
+                    yield report
+
+    def cancel(self):
+        """Stops the boots still running; their threads end at the next step."""
+        self._cancelled.set()
+        for task in self._pending:
+            task.cancel()
+        self._pending.clear()
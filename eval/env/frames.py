@@ -0,0 +1,86 @@
+"""Binary framebuffer transport for screenshots.
+
+A frame is sent as raw bytes plus headers describing how to rebuild it:
+
+    X-Frame-Shape: 2400,1080,3
+    X-Frame-Dtype: uint8
+    X-Frame-Encoding: raw | zlib | png
+
+`raw` and `zlib` frames are rebuilt with `np.frombuffer`, without copying
+the pixel data again. PNG frames need Pillow.
+"""
+
+from __future__ import annotations
+
+import io
+import zlib
+from typing import TYPE_CHECKING, Any, Mapping, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+SHAPE_HEADER = "X-Frame-Shape"
+DTYPE_HEADER = "X-Frame-Dtype"
+ENCODING_HEADER = "X-Frame-Encoding"
+
+RAW = "raw"
+ZLIB = "zlib"
+PNG = "png"
+ENCODINGS = (RAW, ZLIB, PNG)
+
+# zlib level 1 is ~10x faster than the default and still shrinks flat UI
+# frames by an order of magnitude.
+ZLIB_LEVEL = 1
+
+
+def encode_frame(
+    frame: np.ndarray[Any, Any], encoding: str = RAW
+) -> Tuple[bytes, dict[str, str]]:
+    """Encodes a frame into a body and the headers needed to decode it."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Unknown frame encoding {encoding}")
+
+    import numpy as np
+
+    frame = np.ascontiguousarray(frame)
+    if encoding == RAW:
+        body = frame.tobytes()
+    elif encoding == ZLIB:
+        body = zlib.compress(frame.tobytes(), ZLIB_LEVEL)
+    else:
+        from PIL import Image
+
+        buffer = io.BytesIO()
+        Image.fromarray(frame.astype(np.uint8)).save(buffer, format="PNG")
+        body = buffer.getvalue()
+
+    headers = {
+        SHAPE_HEADER: ",".join(str(dim) for dim in frame.shape),
+        DTYPE_HEADER: frame.dtype.str if encoding != PNG else np.dtype(np.uint8).str,
+        ENCODING_HEADER: encoding,
+    }
+    return body, headers
+
+
+def decode_frame(body: bytes, headers: Mapping[str, str]) -> np.ndarray[Any, Any]:
+    """Rebuilds a frame from a binary body and its headers.
+
+    The returned array is a read-only view over the received buffer.
+    """
+    import numpy as np
+
+    encoding = headers.get(ENCODING_HEADER, RAW)
+    shape = tuple(int(dim) for dim in headers[SHAPE_HEADER].split(","))
+    dtype = np.dtype(headers.get(DTYPE_HEADER, "|u1"))
+
+    if encoding == PNG:
+        from PIL import Image
+
+        return np.asarray(Image.open(io.BytesIO(body))).reshape(shape)
+
+    if encoding == ZLIB:
+        body = zlib.decompress(body)
+    elif encoding != RAW:
+        raise ValueError(f"Unknown frame encoding {encoding}")
+
+    return np.frombuffer(body, dtype=dtype).reshape(shape)
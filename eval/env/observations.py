@@ -0,0 +1,64 @@
+"""Caching of decoded observations across repeated fetches.
+
+The client remembers the content hash (ETag) of the last screenshot and ui
+element payloads and sends it as `If-None-Match`. An unchanged screen is
+answered with `304 Not Modified` and served from an LRU of already decoded
+observations. For ui elements the client can also send `since=<hash>`, to
+which the server may answer with only the elements that changed:
+
+    {"ui_elements_delta": {"base": "<hash>", "length": 212,
+                           "changed": [[3, {...}], [17, {...}]]}}
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Any, Dict, Hashable, List
+
+DEFAULT_OBSERVATION_CACHE_SIZE = 32
+
+
+def content_hash(body: bytes) -> str:
+    """ETag-style hash for payloads of servers that send no ETag."""
+    return f'"{hashlib.sha1(body).hexdigest()}"'
+
+
+def apply_element_delta(
+    base: List[Dict[str, Any]], delta: Dict[str, Any]
+) -> List[Dict[str, Any]]:
+    """Rebuilds the full raw element list from `base` and a delta."""
+    length = delta["length"]
+    elements = list(base[:length])
+    elements.extend([None] * (length - len(elements)))
+    for index, element in delta["changed"]:
+        elements[index] = element
+    if any(element is None for element in elements):
+        raise ValueError("Element delta does not cover all new elements")
+    return elements
+
+
+class ObservationCache:
+    """Least-recently-used map of decoded observations."""
+
+    def __init__(self, maxsize: int = DEFAULT_OBSERVATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: OrderedDict[Hashable, Any] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, key: Hashable) -> Any | None:
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any):
+        if self.maxsize <= 0:
+            return
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
@@ -0,0 +1,58 @@
+"""Snapshot-based reset of devices between tasks.
+
+After a verified boot, `SnapshotManager` saves one emulator snapshot per
+environment. Restoring it before each task returns the device to a known
+clean state even if the previous teardown failed, and replaces the per-task
+boot check: a device whose snapshot restores fine is in the verified state.
+"""
+
+import logging
+import time
+from typing import Dict
+
+from eval.env.client import AndroidEnvClient
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SNAPSHOT_NAME = "droidworld_clean"
+
+
+class SnapshotManager:
+    def __init__(self, name: str = DEFAULT_SNAPSHOT_NAME):
+        self.name = name
+        # Environments with a saved snapshot of the verified state.
+        self._saved: Dict[str, bool] = {}
+
+    def is_saved(self, env: AndroidEnvClient) -> bool:
+        return self._saved.get(env.base_url, False)
+
+    def invalidate(self, env: AndroidEnvClient):
+        """Forgets the snapshot, so the next task does a full boot check."""
+        self._saved.pop(env.base_url, None)
+
+    async def save(self, env: AndroidEnvClient):
+        """Saves the current, verified device state as the clean snapshot."""
+        start = time.monotonic()
+        try:
+            await env.aio.save_snapshot(self.name)
+        except Exception as e:
+            raise RuntimeError(f"Error saving snapshot {self.name}: {e}")
+        self._saved[env.base_url] = True
+        logger.info(
+            f"Saved snapshot {self.name} of {env.base_url} in {time.monotonic() - start:.1f}s"
+        )
+
+    async def restore(self, env: AndroidEnvClient) -> float:
+        """Restores the clean snapshot and returns how long it took."""
+        if not self.is_saved(env):
+            raise RuntimeError(f"No snapshot {self.name} saved for {env.base_url}")
+
+        start = time.monotonic()
+        try:
+            await env.aio.load_snapshot(self.name)
+        except Exception as e:
+            self.invalidate(env)
+            raise RuntimeError(f"Error restoring snapshot {self.name}: {e}")
+        elapsed = time.monotonic() - start
+        logger.debug(f"Restored snapshot {self.name} in {elapsed:.2f}s")
+        return elapsed
@@ -0,0 +1,339 @@
+"""Stand-in for the AndroidWorld environment server.
+
+Serves the HTTP API used by `AndroidEnvClient` with synthetic data and no
+emulator, so client-side transport changes can be measured locally:
+
+    droidworld standin --port 5000
+    droidworld bench-screenshot --env-url http://localhost:5000
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+
+from eval.env import frames
+
+logger = logging.getLogger(__name__)
+
+STANDIN_TASKS = {
+    "ContactsAddContact": 1.2,
+    "ClockStopWatchRunning": 1.0,
+    "SimpleSmsReply": 1.4,
+    "MarkorCreateNote": 1.6,
+    "ExpenseAddSingle": 2.0,
+}
+
+
+def synthetic_frame(
+    height: int = 2400, width: int = 1080, seed: int = 0
+) -> np.ndarray[Any, Any]:
+    """Builds a UI-like frame: flat background with a few solid blocks."""
+    rng = np.random.default_rng(seed)
+    frame = np.full((height, width, 3), 245, dtype=np.uint8)
+    for _ in range(24):
+        y, x = rng.integers(0, height - 100), rng.integers(0, width - 100)
+        h, w = rng.integers(40, 200), rng.integers(100, width)
+        frame[y : y + h, x : x + w] = rng.integers(0, 255, size=3, dtype=np.uint8)
+    return frame
+
+
+def synthetic_elements(count: int = 200) -> list[dict[str, Any]]:
+    """Builds `count` raw ui elements in the server's JSON format."""
+    elements = []
+    for i in range(count):
+        top = (i * 48) % 2400
+        elements.append(
+            {
+                "text": f"Item {i}",
+                "content_description": None,
+                "class_name": "android.widget.TextView",
+                "bbox": None,
+                "bbox_pixels": {
+                    "x_min": 0,
+                    "x_max": 1080,
+                    "y_min": top,
+                    "y_max": top + 48,
+                },
+                "is_clickable": i % 3 == 0,
+                "is_enabled": True,
+                "is_visible": True,
+                "package_name": "com.android.contacts",
+                "resource_name": f"com.android.contacts:id/item_{i}",
+            }
+        )
+    return elements
+
+
+# Number of past element lists kept to answer delta requests.
+ELEMENT_HISTORY_SIZE = 16
+# Simulated duration of an emulator snapshot restore.
+SNAPSHOT_LOAD_SECONDS = 0.05
+
+
+class StandInEnv:
+    """In-memory state behind the stand-in server.
+
+    Every executed action changes one element and one block of the frame, so
+    conditional and delta requests can be exercised.
+    """
+
+    def __init__(self, n_task_combinations: int = 1):
+        self.lock = threading.Lock()
+        self.frame = synthetic_frame()
+        self.elements = synthetic_elements()
+        self.version = 0
+        self.history: OrderedDict[str, list[dict[str, Any]]] = OrderedDict()
+        self.history[self.etag] = self.elements
+        self.n_task_combinations = n_task_combinations
+        self.seed = 42
+        self.task_family = "android_world"
+        self.snapshots: Dict[str, Tuple[np.ndarray, list[dict[str, Any]]]] = {}
+
+    @property
+    def etag(self) -> str:
+        return f'"screen-{self.version}"'
+
+    def advance(self):
+        """Simulates the screen changing after an action."""
+        with self.lock:
+            self.version += 1
+            i = self.version % len(self.elements)
+            self.elements = list(self.elements)
+            self.elements[i] = {**self.elements[i], "text": f"Item {i} v{self.version}"}
+            self.frame = self.frame.copy()
+            self.frame[(i * 48) % 2400 : (i * 48) % 2400 + 48] = self.version % 255
+            self.history[self.etag] = self.elements
+            while len(self.history) > ELEMENT_HISTORY_SIZE:
+                self.history.popitem(last=False)
+
+    def save_snapshot(self, name: str):
+        with self.lock:
+            self.snapshots[name] = (self.frame, self.elements)
+
+    def load_snapshot(self, name: str) -> bool:
+        """Restores a saved screen.
+
+        The version still moves forward, so etags handed out before the
+        restore are never reused for other content.
+        """
+        with self.lock:
+            if name not in self.snapshots:
+                return False
+            time.sleep(SNAPSHOT_LOAD_SECONDS)
+            self.frame, self.elements = self.snapshots[name]
+            self.version += 1
+            self.history[self.etag] = self.elements
+            while len(self.history) > ELEMENT_HISTORY_SIZE:
+                self.history.popitem(last=False)
+            return True
+
+    def task_list(self) -> list[str]:
+        return list(STANDIN_TASKS)
+
+    def fingerprint(self) -> str:
+        suite = [self.task_family, self.seed, self.n_task_combinations, STANDIN_TASKS]
+        return hashlib.sha256(json.dumps(suite).encode()).hexdigest()
+
+
+# Routes return (status, payload) or (status, payload, headers). Payloads are
+# JSON values, (body, headers) for binary bodies, or None for an empty body.
+Route = Callable[["StandInHandler", Dict[str, str]], Tuple]
+
+
+class StandInHandler(BaseHTTPRequestHandler):
+    env: StandInEnv
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_GET(self):
+        self._dispatch()
+
+    def do_POST(self):
+        self._dispatch()
+
+    def _dispatch(self):
+        url = urlparse(self.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            self.rfile.read(length)
+
+        route = ROUTES.get(url.path)
+        if route is None:
+            self._send_json(404, {"detail": "Not Found"})
+            return
+
+        status, payload, *extra = route(self, params)
+        headers = extra[0] if extra else {}
+        if payload is None:
+            self._send(status, b"", headers)
+        elif isinstance(payload, tuple):
+            body, frame_headers = payload
+            headers = {
+                "Content-Type": "application/octet-stream",
+                **frame_headers,
+                **headers,
+            }
+            self._send(status, body, headers)
+        else:
+            self._send_json(status, payload, headers)
+
+    def _send_json(
+        self, status: int, payload: Any, headers: Dict[str, str] | None = None
+    ):
+        body = json.dumps(payload).encode()
+        headers = {"Content-Type": "application/json", **(headers or {})}
+        self._send(status, body, headers)
+
+    def _send(self, status: int, body: bytes, headers: Dict[str, str]):
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def _ok(message: str = "ok") -> Tuple[int, Any]:
+    return 200, {"status": "success", "message": message}
+
+
+def _conditional(route: Route) -> Route:
+    """Answers `304 Not Modified` when the client already has the screen."""
+
+    def conditional(handler: StandInHandler, params: Dict[str, str]):
+        etag = handler.env.etag
+        if handler.headers.get("If-None-Match") == etag:
+            return 304, None, {"ETag": etag}
+        status, payload = route(handler, params)
+        return status, payload, {"ETag": etag}
+
+    return conditional
+
+
+def _screenshot_json(handler: StandInHandler, params: Dict[str, str]):
+    return 200, {"pixels": handler.env.frame.tolist()}
+
+
+def _screenshot_raw(handler: StandInHandler, params: Dict[str, str]):
+    encoding = params.get("encoding", frames.RAW)
+    if encoding not in frames.ENCODINGS:
+        return 400, {"detail": f"Unknown encoding {encoding}"}
+    return 200, frames.encode_frame(handler.env.frame, encoding)
+
+
+def _elements(handler: StandInHandler, params: Dict[str, str]):
+    elements = handler.env.elements
+    base = handler.env.history.get(params.get("since", ""))
+    if base is None:
+        return 200, {"ui_elements": elements}
+
+    changed = [
+        [i, element]
+        for i, element in enumerate(elements)
+        if i >= len(base) or base[i] != element
+    ]
+    delta = {"base": params["since"], "length": len(elements), "changed": changed}
+    return 200, {"ui_elements_delta": delta}
+
+
+def _execute_action(handler: StandInHandler, params: Dict[str, str]):
+    handler.env.advance()
+    return _ok("Action executed")
+
+
+def _save_snapshot(handler: StandInHandler, params: Dict[str, str]):
+    handler.env.save_snapshot(params["name"])
+    return _ok(f"Snapshot {params['name']} saved")
+
+
+def _load_snapshot(handler: StandInHandler, params: Dict[str, str]):
+    if not handler.env.load_snapshot(params["name"]):
+        return 404, {"detail": f"Unknown snapshot {params['name']}"}
+    return _ok(f"Snapshot {params['name']} loaded")
+
+
+def _task_length(handler: StandInHandler, params: Dict[str, str]):
+    return 200, {"length": handler.env.n_task_combinations}
+
+
+def _reinitialize(handler: StandInHandler, params: Dict[str, str]):
+    handler.env.n_task_combinations = int(params.get("n_task_combinations", 1))
+    handler.env.seed = int(params.get("seed", 42))
+    handler.env.task_family = params.get("task_family", "android_world")
+    return _ok("Suite reinitialized")
+
+
+def _task_field(field: str, value: Callable[[str, int], Any]) -> Route:
+    def route(handler: StandInHandler, params: Dict[str, str]):
+        return 200, {field: value(params["task_type"], int(params["task_idx"]))}
+
+    return route
+
+
+ROUTES: Dict[str, Route] = {
+    "/health": lambda h, p: _ok(),
+    "/reset": lambda h, p: _ok("Environment reset"),
+    "/close": lambda h, p: _ok("Environment closed"),
+    "/screenshot": _conditional(_screenshot_json),
+    "/screenshot/raw": _conditional(_screenshot_raw),
+    "/elements": _conditional(_elements),
+    "/auxiliaries": lambda h, p: (200, {"auxiliaries": {}}),
+    "/packages": lambda h, p: (200, {"packages": ["com.android.contacts"]}),
+    "/execute_action": _execute_action,
+    "/snapshot/save": _save_snapshot,
+    "/snapshot/load": _load_snapshot,
+    "/suite/task_list": lambda h, p: (200, {"task_list": h.env.task_list()}),
+    "/suite/task_length": _task_length,
+    "/suite/fingerprint": lambda h, p: (200, {"fingerprint": h.env.fingerprint()}),
+    "/suite/reinitialize": _reinitialize,
+    "/task/initialize": lambda h, p: _ok("Task initialized"),
+    "/task/tear_down": lambda h, p: _ok("Task torn down"),
+    "/task/score": _task_field("score", lambda name, idx: 0.0),
+    "/task/goal": _task_field("goal", lambda name, idx: f"Goal for {name} #{idx}"),
+    "/task/complexity": _task_field(
+        "complexity", lambda name, idx: STANDIN_TASKS.get(name, 1.0)
+    ),
+    "/task/template": _task_field("template", lambda name, idx: f"{name} template"),
+}
+
+
+def serve(host: str = "127.0.0.1", port: int = 5000) -> ThreadingHTTPServer:
+    """Starts the stand-in server in a daemon thread and returns it."""
+    handler = type("BoundStandInHandler", (StandInHandler,), {"env": StandInEnv()})
+    server = ThreadingHTTPServer((host, port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"Stand-in environment listening on http://{host}:{port}")
+    return server
+
+
+def benchmark_screenshots(base_url: str, rounds: int = 10) -> Dict[str, float]:
+    """Returns the mean `get_screenshot` latency in seconds per encoding."""
+    from eval.env.client import AndroidEnvClient, SCREENSHOT_ENCODINGS
+
+    results = {}
+    for encoding in SCREENSHOT_ENCODINGS:
+        # Without the observation cache, repeat fetches of the unchanged
+        # screen transfer and decode it instead of getting a 304.
+        env = AndroidEnvClient(
+            base_url, screenshot_encoding=encoding, observation_cache_size=0
+        )
+        try:
+            env.get_screenshot()  # warm up the connection
+            start = time.perf_counter()
+            for _ in range(rounds):
+                env.get_screenshot()
+            results[encoding] = (time.perf_counter() - start) / rounds
+        finally:
+            env.disconnect()
+    return results
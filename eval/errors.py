@@ -0,0 +1,72 @@
+"""Classification of task errors into infrastructure and agent errors.
+
+Infrastructure errors come from the device or the environment server: adb
+errors, HTTP 5xx responses, transport errors and timeouts of the environment
+server, and devices that drop off. They say nothing about the agent, so the
+task is run again, ideally on another device. Every other error is an agent
+error and counts as an outcome of the task.
+
+Errors are classified by the exception classes along their cause chain, so
+they have to be classified before they are turned into strings for results.
+"""
+
+import re
+import sys
+
+import httpx
+
+INFRASTRUCTURE = "infrastructure"
+AGENT = "agent"
+
+# Errors the agent can not cause, whatever their message.
+_INFRASTRUCTURE_TYPES = (httpx.TransportError, ConnectionError)
+
+# Device failures that droidrun and android_world report as plain errors.
+_INFRASTRUCTURE_MESSAGES = re.compile(
+    "|".join(
+        [
+            r"device \S+ (is not connected|not found|offline)",
+            r"device offline",
+            r"accessibility settings invalid",
+            r"failed to become ready",
+        ]
+    ),
+    re.IGNORECASE,
+)
+
+
+def _exception_chain(e: BaseException):
+    seen = set()
+    while e is not None and id(e) not in seen:
+        seen.add(id(e))
+        yield e
+        e = e.__cause__ or e.__context__
+
+
+def _is_adb_error(e: BaseException) -> bool:
+    # adbutils imports PIL, so the adb clients are only looked up if something
+    # loaded them. droidrun talks to devices through async_adbutils.
+    for name in ("adbutils", "async_adbutils"):
+        module = sys.modules.get(name)
+        if module is not None and isinstance(e, getattr(module, "AdbError", ())):
+            return True
+    return False
+
+
+def is_infrastructure_error(error: BaseException | None) -> bool:
+    """Whether `error` or one of its causes is not the agent's fault."""
+    for e in _exception_chain(error):
+        if isinstance(e, _INFRASTRUCTURE_TYPES) or _is_adb_error(e):
+            return True
+        if isinstance(e, httpx.HTTPStatusError) and e.response.status_code >= 500:
+            return True
+        if _INFRASTRUCTURE_MESSAGES.search(str(e)):
+            return True
+    return False
+
+
+def classify_error(error: BaseException | None) -> str | None:
+    """INFRASTRUCTURE, AGENT, or None if there is no error."""
+    if error is None:
+        return None
+    return INFRASTRUCTURE if is_infrastructure_error(error) else AGENT
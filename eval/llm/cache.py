@@ -0,0 +1,140 @@
+"""Record/replay cache in front of an LLM.
+
+`CachingLLM` (in `eval.llm.caching`) keys every chat request by a
+normalized hash of its messages, the model name and the temperature. In `record` mode it answers from the
+cache when it can and stores every new provider response; in `replay` mode
+it never calls the provider and fails on a cache miss, so a recorded run can
+be repeated offline and deterministically.
+
+Entries live in one SQLite database in the droidworld cache directory and
+are evicted least recently used first once the cache exceeds its size limit.
+"""
+
+import hashlib
+import json
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Sequence
+
+from eval.cache import get_cache_dir
+
+if TYPE_CHECKING:
+    from llama_index.core.base.llms.types import ChatMessage
+
+logger = logging.getLogger(__name__)
+
+OFF = "off"
+RECORD = "record"
+REPLAY = "replay"
+LLM_CACHE_MODES = (OFF, RECORD, REPLAY)
+
+DEFAULT_LLM_CACHE_SIZE = 2 << 30  # 2 GiB
+
+
+class LLMCacheMiss(RuntimeError):
+    pass
+
+
+def _normalize_block(block: Any) -> Dict[str, Any]:
+    text = getattr(block, "text", None)
+    if text is not None:
+        return {"text": text.strip()}
+
+    image = getattr(block, "image", None)
+    source = image or str(getattr(block, "url", None) or getattr(block, "path", ""))
+    if isinstance(source, str):
+        source = source.encode()
+    return {
+        "type": getattr(block, "block_type", type(block).__name__),
+        "sha256": hashlib.sha256(source).hexdigest(),
+    }
+
+
+def request_key(
+    messages: Sequence["ChatMessage"], model: str, temperature: float | None
+) -> str:
+    """Hash of a chat request that ignores whitespace and image encoding."""
+    request = {
+        "model": model,
+        "temperature": temperature,
+        "messages": [
+            {
+                "role": str(getattr(m.role, "value", m.role)),
+                "blocks": [_normalize_block(b) for b in m.blocks],
+            }
+            for m in messages
+        ],
+    }
+    body = json.dumps(request, sort_keys=True, default=str)
+    return hashlib.sha256(body.encode()).hexdigest()
+
+
+class LLMCacheStore:
+    """Size-bounded key/value store of compressed responses in SQLite."""
+
+    def __init__(
+        self, path: Path | None = None, max_bytes: int = DEFAULT_LLM_CACHE_SIZE
+    ):
+        self.path = Path(path) if path else get_cache_dir("llm") / "responses.sqlite"
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                " key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL,"
+                " created REAL NOT NULL, last_used REAL NOT NULL)"
+            )
+            self._db.execute(
+                "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+            )
+
+    def get(self, key: str) -> Dict[str, Any] | None:
+        with self._lock, self._db:
+            row = self._db.execute(
+                "SELECT value FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            self._db.execute(
+                "UPDATE entries SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+        return json.loads(zlib.decompress(row[0]))
+
+    def put(self, key: str, value: Dict[str, Any]):
+        blob = zlib.compress(json.dumps(value).encode())
+        now = time.time()
+        with self._lock, self._db:
+            self._db.execute(
+                "INSERT OR REPLACE INTO entries VALUES (?, ?, ?, ?, ?)",
+                (key, blob, len(blob), now, now),
+            )
+            self._evict()
+
+    def _evict(self):
+        (total,) = self._db.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        if total <= self.max_bytes:
+            return
+
+        evicted = []
+        rows = self._db.execute("SELECT key, size FROM entries ORDER BY last_used")
+        for key, size in rows.fetchall():
+            if total <= self.max_bytes:
+                break
+            evicted.append((key,))
+            total -= size
+        self._db.executemany("DELETE FROM entries WHERE key = ?", evicted)
+        logger.debug(f"Evicted {len(evicted)} LLM cache entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        self._db.close()
@@ -0,0 +1,139 @@
+"""`CachingLLM`, the llama_index LLM in front of an `LLMCacheStore`.
+
+See `eval.llm.cache` for the record and replay modes.
+"""
+
+import logging
+from typing import Any, Sequence
+
+from llama_index.core.base.llms.generic_utils import (
+    achat_to_completion_decorator,
+    chat_to_completion_decorator,
+)
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.llms import LLM
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from pydantic import Field, PrivateAttr
+
+from eval.llm.cache import RECORD, REPLAY, LLMCacheMiss, LLMCacheStore, request_key
+
+logger = logging.getLogger(__name__)
+
+
+class CachingLLM(LLM):
+    """Answers chat requests from an `LLMCacheStore` before asking `llm`."""
+
+    llm: LLM = Field(exclude=True)
+    mode: str = Field(default=RECORD)
+    hits: int = Field(default=0)
+    misses: int = Field(default=0)
+    _store: LLMCacheStore = PrivateAttr()
+
+    def __init__(self, llm: LLM, store: LLMCacheStore, mode: str = RECORD, **kwargs):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown LLM cache mode {mode}")
+        super().__init__(
+            llm=llm, mode=mode, callback_manager=llm.callback_manager, **kwargs
+        )
+        self._store = store
+
+    def class_name(self) -> str:
+        # droidrun adapts prompts to the wrapped provider's class name.
+        return self.llm.class_name()
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return self.llm.metadata
+
+    def _key(self, messages: Sequence[ChatMessage]) -> str:
+        temperature = getattr(self.llm, "temperature", None)
+        return request_key(messages, self.llm.metadata.model_name, temperature)
+
+    def _lookup(self, key: str) -> ChatResponse | None:
+        entry = self._store.get(key)
+        if entry is not None:
+            self.hits += 1
+            return ChatResponse(
+                message=ChatMessage.model_validate(entry["message"]),
+                additional_kwargs=entry.get("additional_kwargs", {}),
+            )
+
+        self.misses += 1
+        if self.mode == REPLAY:
+            raise LLMCacheMiss(f"No recorded LLM response for request {key[:12]}")
+        return None
+
+    def _record(self, key: str, response: ChatResponse):
+        try:
+            self._store.put(
+                key,
+                {
+                    "message": response.message.model_dump(mode="json"),
+                    "additional_kwargs": response.additional_kwargs,
+                },
+            )
+        except Exception as e:
+            logger.warning(f"Could not record LLM response {key[:12]}: {e}")
+
+    @llm_chat_callback()
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        key = self._key(messages)
+        response = self._lookup(key)
+        if response is None:
+            response = self.llm.chat(messages, **kwargs)
+            self._record(key, response)
+        return response
+
+    @llm_chat_callback()
+    async def achat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponse:
+        key = self._key(messages)
+        response = self._lookup(key)
+        if response is None:
+            response = await self.llm.achat(messages, **kwargs)
+            self._record(key, response)
+        return response
+
+    @llm_completion_callback()
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        return chat_to_completion_decorator(self.chat)(prompt, **kwargs)
+
+    @llm_completion_callback()
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        return await achat_to_completion_decorator(self.achat)(prompt, **kwargs)
+
+    # Streaming responses are not cached.
+
+    def stream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseGen:
+        return self.llm.stream_chat(messages, **kwargs)
+
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseGen:
+        return self.llm.stream_complete(prompt, formatted=formatted, **kwargs)
+
+    async def astream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseAsyncGen:
+        return await self.llm.astream_chat(messages, **kwargs)
+
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseAsyncGen:
+        return await self.llm.astream_complete(prompt, formatted=formatted, **kwargs)
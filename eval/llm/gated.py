@@ -0,0 +1,188 @@
+"""`GatedLLM`, the llama_index LLM behind an `LLMGateway`.
+
+See `eval.llm.gateway` for the budgets and the sidecar.
+"""
+
+import asyncio
+import logging
+from typing import Any, Sequence
+
+from llama_index.core.base.llms.generic_utils import (
+    achat_to_completion_decorator,
+    chat_to_completion_decorator,
+)
+from llama_index.core.base.llms.types import (
+    ChatMessage,
+    ChatResponse,
+    ChatResponseAsyncGen,
+    ChatResponseGen,
+    CompletionResponse,
+    CompletionResponseAsyncGen,
+    CompletionResponseGen,
+    LLMMetadata,
+)
+from llama_index.core.llms import LLM
+from llama_index.core.llms.callbacks import llm_chat_callback, llm_completion_callback
+from pydantic import Field, PrivateAttr
+
+from eval.llm.gateway import Admission, Gateway, estimate_tokens, seconds_left
+from eval.timing import current_step_timer
+
+logger = logging.getLogger(__name__)
+
+
+def response_tokens(response: ChatResponse) -> int | None:
+    """Tokens the provider reports for a response, if it does."""
+    kwargs = response.additional_kwargs or {}
+    if "prompt_tokens" in kwargs or "completion_tokens" in kwargs:
+        return int(kwargs.get("prompt_tokens", 0)) + int(
+            kwargs.get("completion_tokens", 0)
+        )
+    if "total_tokens" in kwargs:
+        return int(kwargs["total_tokens"])
+
+    raw = response.raw
+    usage = None
+    if isinstance(raw, dict):
+        usage = raw.get("usage") or raw.get("usage_metadata")
+    elif raw is not None:
+        usage = getattr(raw, "usage", None) or getattr(raw, "usage_metadata", None)
+    for name in ("total_tokens", "total_token_count"):
+        if isinstance(usage, dict):
+            value = usage.get(name)
+        else:
+            value = getattr(usage, name, None)
+        if isinstance(value, int):
+            return value
+    return None
+
+
+class GatedLLM(LLM):
+    """Sends the requests of `llm` once `gateway` admits them."""
+
+    llm: LLM = Field(exclude=True)
+    requests: int = Field(default=0)
+    queued: float = Field(default=0.0)
+    _gateway: Gateway = PrivateAttr()
+
+    def __init__(self, llm: LLM, gateway: Gateway, **kwargs):
+        super().__init__(llm=llm, callback_manager=llm.callback_manager, **kwargs)
+        self._gateway = gateway
+
+    def class_name(self) -> str:
+        # droidrun adapts prompts to the wrapped provider's class name.
+        return self.llm.class_name()
+
+    @property
+    def metadata(self) -> LLMMetadata:
+        return self.llm.metadata
+
+    def _acquire(self, prompt: str) -> Admission:
+        admission = self._gateway.acquire(estimate_tokens(prompt), seconds_left())
+        self.requests += 1
+        self.queued += admission.waited
+        timer = current_step_timer.get()
+        if timer is not None:
+            timer.llm_queued(admission.waited)
+        logger.debug(
+            f"LLM request {admission.ticket} admitted after {admission.waited:.2f}s"
+        )
+        return admission
+
+    async def _aacquire(self, prompt: str) -> Admission:
+        # Waiting for admission blocks, so it must not block the event loop.
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self._acquire, prompt))
+        try:
+            return await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # The waiting thread cannot be interrupted, free its slot later.
+            acquiring.add_done_callback(self._release_abandoned)
+            raise
+
+    def _release_abandoned(self, acquiring: asyncio.Future):
+        if not acquiring.cancelled() and acquiring.exception() is None:
+            loop = asyncio.get_running_loop()
+            loop.run_in_executor(None, self._release, acquiring.result())
+
+    def _release(self, admission: Admission, response: ChatResponse | None = None):
+        tokens = response_tokens(response) if response is not None else None
+        self._gateway.release(admission, tokens)
+
+    @staticmethod
+    def _prompt(messages: Sequence[ChatMessage]) -> str:
+        return "\n".join(str(m.content or "") for m in messages)
+
+    @llm_chat_callback()
+    def chat(self, messages: Sequence[ChatMessage], **kwargs: Any) -> ChatResponse:
+        admission = self._acquire(self._prompt(messages))
+        response = None
+        try:
+            response = self.llm.chat(messages, **kwargs)
+            return response
+        finally:
+            self._release(admission, response)
+
+    @llm_chat_callback()
+    async def achat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponse:
+        admission = await self._aacquire(self._prompt(messages))
+        response = None
+        try:
+            response = await self.llm.achat(messages, **kwargs)
+            return response
+        finally:
+            await asyncio.to_thread(self._release, admission, response)
+
+    @llm_completion_callback()
+    def complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        return chat_to_completion_decorator(self.chat)(prompt, **kwargs)
+
+    @llm_completion_callback()
+    async def acomplete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponse:
+        return await achat_to_completion_decorator(self.achat)(prompt, **kwargs)
+
+    # Streaming requests count against the budgets, but leave the in-flight
+    # slot as soon as the stream is open.
+
+    def stream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseGen:
+        admission = self._acquire(self._prompt(messages))
+        try:
+            return self.llm.stream_chat(messages, **kwargs)
+        finally:
+            self._release(admission)
+
+    def stream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseGen:
+        admission = self._acquire(prompt)
+        try:
+            return self.llm.stream_complete(prompt, formatted=formatted, **kwargs)
+        finally:
+            self._release(admission)
+
+    async def astream_chat(
+        self, messages: Sequence[ChatMessage], **kwargs: Any
+    ) -> ChatResponseAsyncGen:
+        admission = await self._aacquire(self._prompt(messages))
+        try:
+            return await self.llm.astream_chat(messages, **kwargs)
+        finally:
+            await asyncio.to_thread(self._release, admission)
+
+    async def astream_complete(
+        self, prompt: str, formatted: bool = False, **kwargs: Any
+    ) -> CompletionResponseAsyncGen:
+        admission = await self._aacquire(prompt)
+        try:
+            return await self.llm.astream_complete(
+                prompt, formatted=formatted, **kwargs
+            )
+        finally:
+            await asyncio.to_thread(self._release, admission)
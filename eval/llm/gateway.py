@@ -0,0 +1,314 @@
+"""Rate limiting and prioritization of LLM requests.
+
+`LLMGateway` admits LLM requests under a requests-per-minute and a
+tokens-per-minute budget, each enforced by a token bucket, and caps the
+requests in flight. Waiting requests are admitted earliest deadline first:
+the request of the task closest to its timeout goes first. The deadline of
+the current task is set by the runner through `llm_deadline`.
+
+Tokens are charged when a request is admitted, estimated from the prompt,
+and corrected by the usage the provider reports once the response is in.
+
+`droidworld llm-gateway` serves one gateway as a sidecar over HTTP, so that
+several processes or containers share its budget; `RemoteGateway` is the
+client they use instead of a local gateway. `GatedLLM` (in `eval.llm.gated`)
+puts an LLM behind either.
+"""
+
+import heapq
+import itertools
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, List, Protocol, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Charged for the response until the provider reports the actual usage.
+DEFAULT_OUTPUT_TOKENS = 1000
+CHARS_PER_TOKEN = 4
+# Admissions not released after this long, e.g. of a killed client, expire.
+DEFAULT_MAX_REQUEST_SECONDS = 600.0
+DEFAULT_GATEWAY_PORT = 5100
+
+
+class TokenBucket:
+    """Refills at `per_minute / 60` per second, up to one minute's budget."""
+
+    def __init__(self, per_minute: float):
+        self.rate = per_minute / 60
+        self.capacity = float(per_minute)
+        self.level = self.capacity
+        self._updated = time.monotonic()
+
+    def _refill(self, now: float):
+        elapsed = now - self._updated
+        self.level = min(self.capacity, self.level + elapsed * self.rate)
+        self._updated = now
+
+    def wait_time(self, amount: float, now: float) -> float:
+        """Seconds until `amount` can be taken, 0 if it can be now."""
+        self._refill(now)
+        # Requests larger than the bucket only wait for a full bucket.
+        missing = min(amount, self.capacity) - self.level
+        return max(0.0, missing / self.rate)
+
+    def take(self, amount: float):
+        self.level -= amount
+
+    def give_back(self, amount: float):
+        """Corrects a charge, which may leave the bucket in debt."""
+        self.level = min(self.capacity, self.level + amount)
+
+
+@dataclass
+class Admission:
+    ticket: int
+    tokens: int
+    # Seconds the request waited to be admitted.
+    waited: float = field(default=0.0)
+
+
+@dataclass
+class GatewayStats:
+    requests: int = field(default=0)
+    tokens: int = field(default=0)
+    waited: float = field(default=0.0)
+    max_waited: float = field(default=0.0)
+    expired: int = field(default=0)
+
+    def record(self, admission: Admission):
+        self.requests += 1
+        self.waited += admission.waited
+        self.max_waited = max(self.max_waited, admission.waited)
+
+    def summary(self) -> str:
+        mean = self.waited / self.requests if self.requests else 0.0
+        return (
+            f"{self.requests} requests, {self.tokens} tokens, queued {mean:.2f}s on"
+            f" average, {self.max_waited:.2f}s at most"
+        )
+
+
+class Gateway(Protocol):
+    def acquire(self, tokens: int, seconds_left: float | None = None) -> Admission: ...
+
+    def release(self, admission: Admission, tokens: int | None = None): ...
+
+
+class LLMGateway:
+    """Admits requests under RPM, TPM and in-flight limits; 0 disables one."""
+
+    def __init__(
+        self,
+        requests_per_minute: float = 0,
+        tokens_per_minute: float = 0,
+        max_in_flight: int = 0,
+        max_request_seconds: float = DEFAULT_MAX_REQUEST_SECONDS,
+    ):
+        self.requests = (
+            TokenBucket(requests_per_minute) if requests_per_minute else None
+        )
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.max_in_flight = max_in_flight
+        self.max_request_seconds = max_request_seconds
+        self.stats = GatewayStats()
+        self._condition = threading.Condition()
+        self._tickets = itertools.count()
+        # Waiting requests by (deadline, arrival).
+        self._waiting: List[Tuple[float, int]] = []
+        # Admission time of every request in flight.
+        self._in_flight: Dict[int, float] = {}
+
+    def _expire(self, now: float):
+        expired = [
+            ticket
+            for ticket, admitted_at in self._in_flight.items()
+            if now - admitted_at >= self.max_request_seconds
+        ]
+        for ticket in expired:
+            del self._in_flight[ticket]
+        if expired:
+            self.stats.expired += len(expired)
+            logger.warning(f"{len(expired)} LLM requests were never released")
+
+    def _wait_time(self, tokens: int, now: float) -> float:
+        """Seconds until the budgets admit a request, 0 if they do now.
+
+        Without a free slot, that is until the oldest request expires.
+        """
+        self._expire(now)
+        if self.max_in_flight and len(self._in_flight) >= self.max_in_flight:
+            oldest = min(self._in_flight.values())
+            return oldest + self.max_request_seconds - now
+        return max(
+            self.requests.wait_time(1, now) if self.requests else 0.0,
+            self.tokens.wait_time(tokens, now) if self.tokens else 0.0,
+        )
+
+    def acquire(self, tokens: int, seconds_left: float | None = None) -> Admission:
+        """Blocks until the request may be sent, most urgent requests first."""
+        start = time.monotonic()
+        deadline = start + seconds_left if seconds_left is not None else float("inf")
+        with self._condition:
+            ticket = next(self._tickets)
+            entry = (deadline, ticket)
+            heapq.heappush(self._waiting, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    wait = None
+                    if self._waiting[0] == entry:
+                        wait = self._wait_time(tokens, now)
+                        if wait == 0:
+                            break
+                    # Releases and admissions notify, bucket refills and expiries
+                    # do not, so the first in line wakes up once the budget allows.
+                    self._condition.wait(timeout=wait)
+            finally:
+                self._waiting.remove(entry)
+                heapq.heapify(self._waiting)
+                # The next request in line may be admissible as well.
+                self._condition.notify_all()
+
+            if self.requests:
+                self.requests.take(1)
+            if self.tokens:
+                self.tokens.take(tokens)
+            self._in_flight[ticket] = now
+            admission = Admission(ticket, tokens, now - start)
+            self.stats.record(admission)
+            return admission
+
+    def release(self, admission: Admission, tokens: int | None = None):
+        """Frees the slot of a finished request, charging its actual `tokens`."""
+        with self._condition:
+            self._in_flight.pop(admission.ticket, None)
+            used = admission.tokens if tokens is None else tokens
+            if self.tokens and used != admission.tokens:
+                self.tokens.give_back(admission.tokens - used)
+            self.stats.tokens += used
+            self._condition.notify_all()
+
+
+def estimate_tokens(text: str, output_tokens: int = DEFAULT_OUTPUT_TOKENS) -> int:
+    """Rough token count of a request with prompt `text`."""
+    return len(text) // CHARS_PER_TOKEN + output_tokens
+
+
+current_llm_deadline: ContextVar[float | None] = ContextVar(
+    "current_llm_deadline", default=None
+)
+
+
+@contextmanager
+def llm_deadline(seconds: float) -> Iterator[None]:
+    """Gives LLM requests in this context priority by their task's deadline."""
+    token = current_llm_deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        current_llm_deadline.reset(token)
+
+
+def seconds_left() -> float | None:
+    deadline = current_llm_deadline.get()
+    return deadline - time.monotonic() if deadline is not None else None
+
+
+class RemoteGateway:
+    """Client of a gateway sidecar; requests pass if it cannot be reached."""
+
+    def __init__(self, url: str):
+        self.url = url
+        # Admissions block until the sidecar's budget allows them.
+        self._http = httpx.Client(base_url=url, timeout=httpx.Timeout(10, read=None))
+
+    def acquire(self, tokens: int, seconds_left: float | None = None) -> Admission:
+        start = time.monotonic()
+        try:
+            response = self._http.post(
+                "/acquire", json={"tokens": tokens, "seconds_left": seconds_left}
+            )
+            response.raise_for_status()
+            ticket = response.json()["ticket"]
+        except httpx.HTTPError as e:
+            logger.warning(f"LLM gateway {self.url} unavailable, not throttling: {e}")
+            ticket = -1
+        # Includes the round trip to the sidecar.
+        return Admission(ticket, tokens, time.monotonic() - start)
+
+    def release(self, admission: Admission, tokens: int | None = None):
+        if admission.ticket < 0:
+            return
+        try:
+            self._http.post(
+                "/release",
+                json={
+                    "ticket": admission.ticket,
+                    "tokens": admission.tokens,
+                    "used": tokens,
+                },
+            ).raise_for_status()
+        except httpx.HTTPError as e:
+            logger.warning(f"Could not release LLM request {admission.ticket}: {e}")
+
+
+class GatewayHandler(BaseHTTPRequestHandler):
+    gateway: LLMGateway
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def log_message(self, format, *args):
+        logger.debug(format % args)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        request: Dict[str, Any] = json.loads(self.rfile.read(length) or b"{}")
+        if self.path == "/acquire":
+            admission = self.gateway.acquire(
+                int(request["tokens"]), request.get("seconds_left")
+            )
+            self._send_json(
+                200, {"ticket": admission.ticket, "waited": admission.waited}
+            )
+        elif self.path == "/release":
+            self.gateway.release(
+                Admission(int(request["ticket"]), int(request["tokens"])),
+                request.get("used"),
+            )
+            self._send_json(200, {"status": "success"})
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def do_GET(self):
+        if self.path == "/stats":
+            self._send_json(200, self.gateway.stats.__dict__)
+        else:
+            self._send_json(404, {"detail": "Not Found"})
+
+    def _send_json(self, status: int, payload: Any):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+
+def serve(
+    gateway: LLMGateway, host: str = "127.0.0.1", port: int = DEFAULT_GATEWAY_PORT
+) -> ThreadingHTTPServer:
+    """Starts the gateway sidecar in a daemon thread and returns it."""
+    handler = type("BoundGatewayHandler", (GatewayHandler,), {"gateway": gateway})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    logger.info(f"LLM gateway listening on http://{host}:{port}")
+    return server
@@ -0,0 +1,72 @@
+"""Detection of agents stuck repeating the same action on the same screen.
+
+`AndroidWorldTools` reports every ui state the agent reads and every action
+it takes. An action is paired with the hash of the last ui state read before
+it; when the same pair comes back `max_repeats` times in a row, with a fresh
+state read in between each time, the screen did not react to the action and
+the run is considered stuck.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from typing import Any, Callable, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_STUCK_REPEATS = 3
+
+
+class AgentStuckError(Exception):
+    pass
+
+
+def state_hash(state: Any) -> str:
+    if isinstance(state, dict):
+        state = state.get("a11y_tree", state)
+    body = json.dumps(state, sort_keys=True, default=str)
+    return hashlib.sha1(body.encode()).hexdigest()
+
+
+class LoopDetector:
+    def __init__(self, max_repeats: int = DEFAULT_STUCK_REPEATS):
+        self.max_repeats = max_repeats
+        self.repeats = 0
+        self.reason: str | None = None
+        # Called once, possibly from a tool thread, when the run is stuck.
+        self.on_stuck: Callable[[], None] | None = None
+        self._state: str | None = None
+        self._fresh_state = False
+        self._last: Tuple[str | None, str] | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def stuck(self) -> bool:
+        return self.reason is not None
+
+    def observe_state(self, state: Any):
+        with self._lock:
+            self._state = state_hash(state)
+            self._fresh_state = True
+
+    def record_action(self, name: str, args: tuple, kwargs: dict):
+        with self._lock:
+            # Several actions of one step share a state read, nothing to judge.
+            if not self._fresh_state:
+                return
+            self._fresh_state = False
+
+            action = f"{name}{args!r}{sorted(kwargs.items())!r}"
+            pair = (self._state, action)
+            self.repeats = self.repeats + 1 if pair == self._last else 1
+            self._last = pair
+            if self.repeats < self.max_repeats or self.stuck:
+                return
+            self.reason = (
+                f"Stuck: {action} repeated {self.repeats} times without a screen change"
+            )
+
+        logger.warning(self.reason)
+        if self.on_stuck is not None:
+            self.on_stuck()
@@ -0,0 +1,185 @@
+"""Run manifests, which make runs resumable.
+
+A run is identified by its task family, seed, number of task combinations
+and LLM configuration; the same configuration always maps to the same run
+id. The manifest `eval_results/runs/<run_id>.json` describes the run and
+`eval_results/runs/<run_id>.jsonl` gets one line per finished instance,
+appended as soon as its result is written, with the seconds the write took.
+A resumed run reads these lines into a set and skips every instance in it.
+
+Instances a run leaves out, e.g. because they do not fit its time budget,
+are listed in the manifest under `skipped` with the reason. They are not
+finished, so resuming the run runs them.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, Iterator, Set, Tuple
+
+from eval.tracker import OUTPUT_DIR, TaskResult
+
+logger = logging.getLogger(__name__)
+
+RUNS_DIR = "runs"
+
+
+@dataclass(frozen=True)
+class RunConfig:
+    task_family: str
+    seed: int
+    n_task_combinations: int
+    llm_provider: str
+    llm_model: str
+    temperature: float
+    vision: bool = field(default=False)
+    reasoning: bool = field(default=False)
+    reflection: bool = field(default=False)
+
+    @property
+    def run_id(self) -> str:
+        body = json.dumps(self.__dict__, sort_keys=True)
+        digest = hashlib.sha256(body.encode()).hexdigest()[:12]
+        prefix = f"{self.task_family}-seed{self.seed}-n{self.n_task_combinations}"
+        return f"{prefix}-{digest}"
+
+
+class RunManifest:
+    def __init__(
+        self, config: RunConfig, root: Path | str = Path(OUTPUT_DIR, RUNS_DIR)
+    ):
+        self.config = config
+        self.run_id = config.run_id
+        self.path = Path(root, f"{self.run_id}.json")
+        self.log_path = Path(root, f"{self.run_id}.jsonl")
+        self.finished: Set[Tuple[str, int]] = set()
+        self.manifest: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def _load(self):
+        for entry in _read_log(self.log_path):
+            self.finished.add((entry["task_name"], entry["task_idx"]))
+
+    def _describe(self, resume: bool) -> Dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "config": self.config.__dict__,
+            "started_at": datetime.now().isoformat(),
+            "resumed": resume,
+            "finished": len(self.finished),
+        }
+
+    def start(self, resume: bool = False, restart: bool = False) -> "RunManifest":
+        """Writes the manifest, keeping the finished instances if resuming.
+
+        Raises instead of discarding finished instances unless `restart`.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.log_path.exists():
+            self._load()
+        if resume:
+            logger.info(
+                f"Resuming run {self.run_id}: {len(self.finished)} instances already finished"
+            )
+        elif self.finished and not restart:
+            raise RuntimeError(
+                f"Run {self.run_id} already finished {len(self.finished)} instances, resume or restart it"
+            )
+        else:
+            self.finished.clear()
+            self.log_path.write_text("")
+            logger.info(f"Starting run {self.run_id}")
+
+        self.manifest = self._describe(resume)
+        self._write_manifest()
+        return self
+
+    def join(self) -> "RunManifest":
+        """Joins a run shared with other processes, e.g. queue workers.
+
+        Only the first process to join writes the manifest, and the finished
+        instances are never discarded.
+        """
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.log_path.touch()
+        self._load()
+        self.manifest = self._describe(resume=False)
+        try:
+            with open(self.path, "x") as f:
+                f.write(json.dumps(self.manifest, indent=2))
+            logger.info(f"Starting run {self.run_id}")
+        except FileExistsError:
+            logger.info(
+                f"Joining run {self.run_id}: {len(self.finished)} instances already finished"
+            )
+        return self
+
+    def _write_manifest(self):
+        self.path.write_text(json.dumps(self.manifest, indent=2))
+
+    def update(self, **fields: Any):
+        """Adds `fields` to the manifest."""
+        with self._lock:
+            self.manifest.update(fields)
+            self._write_manifest()
+
+    def record_skipped(self, skipped: Dict[Tuple[str, int], str]):
+        """Lists instances the run left out, by (task name, index), and why."""
+        if not skipped:
+            return
+        with self._lock:
+            entries = self.manifest.setdefault("skipped", [])
+            entries.extend(
+                {"task_name": task_name, "task_idx": task_idx, "reason": reason}
+                for (task_name, task_idx), reason in skipped.items()
+            )
+            self._write_manifest()
+
+    def is_finished(self, task_name: str, task_idx: int) -> bool:
+        return (task_name, task_idx) in self.finished
+
+    def record(self, result: TaskResult):
+        """Marks the instance of `result` as finished unless it errored.
+
+        Errored instances, e.g. after an emulator crash, run again on resume.
+        """
+        if result.error:
+            return
+        entry = {
+            "task_name": result.task_name,
+            "task_idx": result.task_idx,
+            "success": result.success,
+            "outcome": result.outcome,
+            "timestamp": datetime.now().isoformat(),
+        }
+        if "write" in result.phases:
+            entry["write"] = result.phases["write"]
+        with self._lock:
+            self.finished.add((result.task_name, result.task_idx))
+            with open(self.log_path, "a") as f:
+                f.write(json.dumps(entry) + "\n")
+
+
+def _read_log(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path) as f:
+        for line in f:
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                # The last line may be cut off by a crash.
+                continue
+
+
+def iter_write_timings(
+    root: Path | str = Path(OUTPUT_DIR, RUNS_DIR),
+) -> Iterator[Dict[str, Any]]:
+    """Yields the write phase of every recorded instance, like a result."""
+    for log_path in sorted(Path(root).glob("*.jsonl")):
+        for entry in _read_log(log_path):
+            if "write" in entry:
+                phases = {"write": entry["write"]}
+                yield {"task_name": entry["task_name"], "phases": phases}
@@ -0,0 +1,125 @@
+"""Order in which task instances are handed to the devices.
+
+`SUITE`, the default, keeps the suite index order. `LONGEST_FIRST`, opt-in
+through `--task-order longest-first`, estimates the duration of every
+instance and starts the longest ones first, so that long tasks do not start
+last and set the makespan. The estimate is the median device time
+of past runs of the task, or, for tasks without history, its complexity
+times the seconds per complexity unit observed in past runs. Instances with
+equal estimates are interleaved by app, so instances of the same app go to
+different devices, and shuffled with the run's seed.
+"""
+
+import heapq
+import logging
+import random
+import re
+import statistics
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from eval.env.catalog import SuiteCatalog
+from eval.pipeline import WorkItem
+
+logger = logging.getLogger(__name__)
+
+SUITE = "suite"
+LONGEST_FIRST = "longest-first"
+TASK_ORDERS = (SUITE, LONGEST_FIRST)
+
+# Used for tasks without history when no past run can calibrate it.
+DEFAULT_SECONDS_PER_COMPLEXITY = 120.0
+
+
+def task_app(task_name: str) -> str:
+    """App a task works on, the first word of its name (e.g. `Markor`)."""
+    match = re.match(r"[A-Z][a-z0-9]*", task_name)
+    return match.group(0) if match else task_name
+
+
+def result_seconds(result: Dict[str, Any]) -> float:
+    """Device time of a past run, the agent time for old results."""
+    phases = result.get("phases") or {}
+    # The write phase runs in the background, off the device.
+    seconds = sum(t for phase, t in phases.items() if phase != "write")
+    return seconds or result.get("execution_time", 0.0)
+
+
+class DurationEstimator:
+    def __init__(
+        self,
+        results: Iterable[Dict[str, Any]],
+        catalog: SuiteCatalog,
+        seconds_per_complexity: float = DEFAULT_SECONDS_PER_COMPLEXITY,
+    ):
+        self.catalog = catalog
+        history: Dict[str, List[float]] = defaultdict(list)
+        for result in results:
+            seconds = result_seconds(result)
+            if seconds > 0:
+                history[result["task_name"]].append(seconds)
+        self.history = {name: statistics.median(s) for name, s in history.items()}
+
+        # Calibrate the fallback on tasks of this suite that have history.
+        rates = []
+        for name, seconds in self.history.items():
+            if name in catalog.instances and catalog.length(name):
+                complexity = self._complexity(name, 0)
+                if complexity > 0:
+                    rates.append(seconds / complexity)
+        self.seconds_per_complexity = (
+            statistics.median(rates) if rates else seconds_per_complexity
+        )
+        logger.debug(
+            f"Duration history of {len(self.history)} task types, {self.seconds_per_complexity:.1f}s per complexity unit"
+        )
+
+    def _complexity(self, task_name: str, task_idx: int) -> float:
+        return self.catalog.instance(task_name, task_idx).complexity
+
+    def estimate(self, item: WorkItem) -> float:
+        seconds = self.history.get(item.task_name)
+        if seconds is not None:
+            return seconds
+        complexity = self._complexity(item.task_name, item.task_idx)
+        return complexity * self.seconds_per_complexity
+
+
+def _spread_apps(items: List[WorkItem], rng: random.Random) -> List[WorkItem]:
+    by_app: Dict[str, List[WorkItem]] = defaultdict(list)
+    for item in items:
+        by_app[task_app(item.task_name)].append(item)
+    apps = sorted(by_app)
+    rng.shuffle(apps)
+    for app in apps:
+        rng.shuffle(by_app[app])
+
+    spread = []
+    while apps:
+        for app in apps:
+            spread.append(by_app[app].pop())
+        apps = [app for app in apps if by_app[app]]
+    return spread
+
+
+def order_longest_first(
+    items: Iterable[WorkItem], estimates: Dict[WorkItem, float], seed: int
+) -> List[WorkItem]:
+    """Sorts by descending estimate, spreading apps among equal estimates."""
+    rng = random.Random(seed)
+    ties: Dict[float, List[WorkItem]] = defaultdict(list)
+    for item in items:
+        ties[round(estimates[item])].append(item)
+
+    ordered = []
+    for seconds in sorted(ties, reverse=True):
+        ordered.extend(_spread_apps(ties[seconds], rng))
+    return ordered
+
+
+def estimate_makespan(durations: Iterable[float], n_devices: int) -> float:
+    """Makespan when every item goes to the device that is free first."""
+    devices = [0.0] * max(1, n_devices)
+    for seconds in durations:
+        heapq.heappush(devices, heapq.heappop(devices) + seconds)
+    return max(devices)
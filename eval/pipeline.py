@@ -0,0 +1,358 @@
+"""Pipelined execution of a sequence of tasks on one device.
+
+While a task runs on the device, `TaskPipeline` already fetches the goal and
+complexity of the task expected next and builds its agent, and results of
+finished tasks are written and reported by a background writer. The next
+task is only taken from the shared queue once the device is free, so other
+devices can still steal it; if they do, its preparation is discarded.
+Between two tasks the device only waits for the boot check, reset and
+`initialize_task`, or, in snapshot mode, for the snapshot restore and
+`initialize_task`.
+"""
+
+import asyncio
+import inspect
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import (
+    TYPE_CHECKING,
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Iterable,
+    List,
+    Tuple,
+)
+
+from eval.budget import BudgetPolicy
+from eval.env.boot import BootStateCache
+from eval.env.catalog import SuiteCatalog
+from eval.env.client import AndroidEnvClient
+from eval.env.snapshots import SnapshotManager
+from eval.errors import INFRASTRUCTURE, classify_error
+from eval.tracker import OUTCOME_ERROR, TaskResult, track_task, write_task_result
+
+# The runner pulls in droidrun and llama_index; it is imported once tasks run.
+if TYPE_CHECKING:
+    from llama_index.core.llms import LLM
+
+    from eval.runner import PreparedTask
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class WorkItem:
+    task_id: int
+    task_name: str
+    task_idx: int
+
+
+async def _aiter(
+    items: Iterable[WorkItem] | AsyncIterable[WorkItem],
+) -> AsyncIterator[WorkItem]:
+    if isinstance(items, AsyncIterable):
+        async for item in items:
+            yield item
+    else:
+        for item in items:
+            yield item
+
+
+# Called with a work item, its result (None if it did not run), the seconds
+# the device spent on it and the infrastructure error it hit, if any. Returns
+# whether the item will be retried, in which case its result is dropped.
+# Callbacks that block, e.g. on a database, return an awaitable instead.
+FinishedCallback = Callable[
+    [WorkItem, TaskResult | None, float, str | None], bool | Awaitable[bool]
+]
+# Called with a work item before it starts. Returns why it must be skipped,
+# or None to run it.
+StartCallback = Callable[[WorkItem], str | None]
+
+
+class ResultWriter:
+    """Writes task results in order on a background thread."""
+
+    def __init__(self, write: Callable[[TaskResult], None] = write_task_result):
+        self.write = write
+        self._executor = ThreadPoolExecutor(1, thread_name_prefix="result-writer")
+        self._pending: List[asyncio.Future] = []
+
+    def submit(self, result: TaskResult):
+        loop = asyncio.get_running_loop()
+        self._pending = [f for f in self._pending if not f.done()]
+        self._pending.append(loop.run_in_executor(self._executor, self._write, result))
+
+    def _write(self, result: TaskResult):
+        try:
+            self.write(result)
+        except Exception as e:
+            logger.error(
+                f"Error writing result of {result.task_name} {result.task_idx}: {e}"
+            )
+
+    async def drain(self):
+        """Waits until every submitted result is written."""
+        await asyncio.gather(*self._pending)
+        self._pending.clear()
+
+    async def aclose(self):
+        await self.drain()
+        self._executor.shutdown(wait=True)
+
+
+@dataclass
+class TaskOptions:
+    max_steps_multiplier: int
+    timeout_multiplier: int
+    vision: bool
+    reasoning: bool
+    reflection: bool
+    tracing: bool
+    debug: bool
+    keep_overlay_disabled: bool = False
+    # Stop the agent after this many identical actions on the same screen.
+    stuck_repeats: int = 0
+
+
+class TaskPipeline:
+    """Runs work items on one device, preparing item n+1 while n runs."""
+
+    def __init__(
+        self,
+        env: AndroidEnvClient,
+        device_serial: str,
+        llm: "LLM",
+        options: TaskOptions,
+        catalog: SuiteCatalog | None = None,
+        boot_cache: BootStateCache | None = None,
+        writer: ResultWriter | None = None,
+        snapshots: SnapshotManager | None = None,
+        budget_policy: BudgetPolicy | None = None,
+    ):
+        self.env = env
+        self.device_serial = device_serial
+        self.llm = llm
+        self.options = options
+        self.catalog = catalog
+        self.boot_cache = boot_cache
+        self.writer = writer or ResultWriter()
+        self.snapshots = snapshots
+        self.budget_policy = budget_policy
+        self.on_finished: FinishedCallback | None = None
+        self.on_start: StartCallback | None = None
+        self._stopping = False
+
+    async def prepare(self, item: WorkItem) -> "PreparedTask":
+        from eval.runner import prepare_task
+
+        o = self.options
+        return await prepare_task(
+            self.env,
+            self.device_serial,
+            self.llm,
+            item.task_id,
+            item.task_name,
+            item.task_idx,
+            o.max_steps_multiplier,
+            o.timeout_multiplier,
+            o.vision,
+            o.reasoning,
+            o.reflection,
+            o.tracing,
+            o.debug,
+            self.catalog,
+            self.budget_policy,
+        )
+
+    def _prefetch(self, item: WorkItem | None) -> asyncio.Task | None:
+        if item is None:
+            return None
+        return asyncio.create_task(self.prepare(item))
+
+    async def _boot_check(self) -> Exception | None:
+        """Returns the error if the device is not ready."""
+        # A restorable snapshot of the verified state replaces the boot check.
+        if self.snapshots is not None and self.snapshots.is_saved(self.env):
+            return None
+        try:
+            if self.boot_cache is not None:
+                await asyncio.to_thread(
+                    self.boot_cache.ensure_booted, self.env, self.device_serial
+                )
+            if self.snapshots is not None:
+                await self.env.aio.reset(go_home=True)
+                await self.snapshots.save(self.env)
+            return None
+        except Exception as e:
+            logger.error(f"Error booting environment: {e}")
+            logger.info(
+                "Please check if the environment is running and accessible. Keep on trying or restart the environment"
+            )
+            return e
+
+    def _invalidate(self):
+        if self.boot_cache is not None:
+            self.boot_cache.invalidate(self.env, self.device_serial)
+        if self.snapshots is not None:
+            self.snapshots.invalidate(self.env)
+
+    async def execute(
+        self, item: WorkItem, preparing: asyncio.Task
+    ) -> Tuple[TaskResult | None, Exception | None]:
+        """Runs a prepared item and returns its result or the error."""
+        try:
+            task = await preparing
+        except Exception as e:
+            logger.error(f"Error preparing task {item.task_name} {item.task_idx}: {e}")
+            return None, e
+
+        from eval.runner import execute_task
+
+        logger.info(f"Running task {item.task_name} {item.task_idx}...")
+        try:
+            res, e = await execute_task(
+                self.env,
+                self.device_serial,
+                task,
+                keep_overlay_disabled=self.options.keep_overlay_disabled,
+                snapshots=self.snapshots,
+                stuck_repeats=self.options.stuck_repeats,
+            )
+        except Exception as e:
+            logger.error(f"Error running task {item.task_name} {item.task_idx}: {e}")
+            self._invalidate()
+            return None, e
+
+        if e:
+            logger.error(f"Error running task {item.task_name} {item.task_idx}: {e}")
+        else:
+            logger.info(f"Task {item.task_name} {item.task_idx} completed successfully")
+        # With snapshots, the restore before the next task cleans up after
+        # failures; a failing restore falls back to the full boot check.
+        if (e or res.error) and self.snapshots is None:
+            self._invalidate()
+
+        # A failed teardown does not invalidate the result of the run, and
+        # the runner classified the error of the run itself.
+        return res, None
+
+    def _error_result(
+        self, item: WorkItem, error: Exception, kind: str
+    ) -> TaskResult:
+        """Result of an item that did not run, so that it is not lost."""
+        goal = ""
+        if self.catalog is not None and item.task_name in self.catalog.instances:
+            goal = self.catalog.instance(item.task_name, item.task_idx).goal
+        res = track_task(item.task_id, item.task_name, item.task_idx, goal, 0)
+        res.error = repr(error)
+        res.error_kind = kind
+        res.device = self.device_serial
+        res.outcome = OUTCOME_ERROR
+        return res
+
+    async def _finished(
+        self,
+        item: WorkItem,
+        res: TaskResult | None,
+        error: Exception | None,
+        started: float,
+        kind: str | None = None,
+    ) -> TaskResult | None:
+        """Reports the outcome of `item`; returns the result to write.
+
+        There is none if the item will be retried. Items that did not run get
+        a result that records the error.
+        """
+        if res is not None:
+            kind, message = res.error_kind or None, res.error
+        else:
+            kind, message = kind or classify_error(error), str(error)
+        retry = False
+        if self.on_finished is not None:
+            infrastructure_error = message if kind == INFRASTRUCTURE else None
+            seconds = time.perf_counter() - started
+            retry = self.on_finished(item, res, seconds, infrastructure_error)
+            if inspect.isawaitable(retry):
+                retry = await retry
+        if retry:
+            return None
+        if res is None:
+            res = self._error_result(item, error, kind)
+        return res
+
+    def stop(self):
+        """Stops `run` after the item currently running."""
+        self._stopping = True
+
+    async def run(
+        self,
+        items: Iterable[WorkItem] | AsyncIterable[WorkItem],
+        peek: Callable[[], WorkItem | None] | None = None,
+    ) -> List[TaskResult]:
+        """Runs all items in order and returns the results once written.
+
+        The next item is taken from `items` when the device becomes free.
+        `peek` tells which item that will likely be, without taking it, so
+        that it is prepared while the current item runs.
+        """
+        results = []
+        self._stopping = False
+        queue = _aiter(items)
+        current = await anext(queue, None)
+        preparing = self._prefetch(current)
+        upcoming, next_preparing = None, None
+        try:
+            while current is not None and not self._stopping:
+                skip = self.on_start(current) if self.on_start is not None else None
+                if skip is not None:
+                    logger.info(
+                        f"Skipping {current.task_name} {current.task_idx}: {skip}"
+                    )
+                    preparing.cancel()
+                    current = await anext(queue, None)
+                    preparing = self._prefetch(current)
+                    continue
+
+                started = time.perf_counter()
+                error = await self._boot_check()
+                if error is not None:
+                    preparing.cancel()
+                    # The device is not ready, whatever the error says.
+                    res = await self._finished(
+                        current, None, error, started, kind=INFRASTRUCTURE
+                    )
+                    if res is not None:
+                        self.writer.submit(res)
+                        results.append(res)
+                    current = await anext(queue, None)
+                    preparing = self._prefetch(current)
+                    continue
+
+                # Prepare the likely next task while this one runs on the device.
+                upcoming = peek() if peek is not None else None
+                next_preparing = self._prefetch(upcoming)
+                res, error = await self.execute(current, preparing)
+                res = await self._finished(current, res, error, started)
+                if res is not None:
+                    self.writer.submit(res)
+                    results.append(res)
+
+                current = await anext(queue, None)
+                if current is not None and current == upcoming:
+                    preparing = next_preparing
+                else:
+                    if next_preparing is not None:
+                        next_preparing.cancel()
+                    preparing = self._prefetch(current)
+                upcoming, next_preparing = None, None
+        finally:
+            for task in (preparing, next_preparing):
+                if task is not None:
+                    task.cancel()
+            await self.writer.drain()
+        return results
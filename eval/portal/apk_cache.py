@@ -0,0 +1,101 @@
+"""
+Content-addressed cache for the DroidRun Portal APK.
+
+APKs are stored by SHA-256 under `objects/`, and `refs/<version>` points a
+portal version at its object. Installers on the same host (or on containers
+sharing the cache directory through a volume) share one download through a
+file lock, and a warm cache works without network access.
+"""
+
+import fcntl
+import hashlib
+import logging
+import os
+import shutil
+from contextlib import contextmanager
+from importlib.metadata import version as package_version
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from eval.cache import get_cache_dir
+
+logger = logging.getLogger(__name__)
+
+# Overrides the cache key of the portal APK to download.
+PORTAL_VERSION_ENV = "DROIDWORLD_PORTAL_VERSION"
+
+
+def default_portal_version() -> str:
+    """Cache key of the portal release matching the installed droidrun."""
+    return os.getenv(PORTAL_VERSION_ENV) or f"droidrun-{package_version('droidrun')}"
+
+
+def sha256_file(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+@contextmanager
+def _file_lock(path: Path) -> Iterator[None]:
+    with open(path, "a") as f:
+        fcntl.flock(f, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class PortalApkCache:
+    def __init__(self, root: Path | None = None):
+        self.root = Path(root) if root else get_cache_dir("portal-apk")
+        for name in ("objects", "refs", "locks"):
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    def object_path(self, sha256: str) -> Path:
+        return self.root / "objects" / f"{sha256}.apk"
+
+    def lookup(self, version: str) -> Tuple[str, Path] | None:
+        """Returns `(sha256, path)` of a cached version without downloading."""
+        try:
+            sha256 = (self.root / "refs" / version).read_text().strip()
+        except FileNotFoundError:
+            return None
+
+        path = self.object_path(sha256)
+        if not path.exists():
+            logger.warning(f"Portal APK ref {version} points to missing {sha256}")
+            return None
+        return sha256, path
+
+    def fetch(self, version: str | None = None) -> Tuple[str, Path]:
+        """Returns `(sha256, path)` of the portal APK, downloading it once."""
+        version = version or default_portal_version()
+        cached = self.lookup(version)
+        if cached is not None:
+            return cached
+
+        with _file_lock(self.root / "locks" / f"{version}.lock"):
+            # Another installer may have downloaded it while we waited.
+            cached = self.lookup(version)
+            if cached is not None:
+                return cached
+
+            from droidrun.portal import download_portal_apk
+
+            logger.info(f"Downloading portal APK {version} into {self.root}...")
+            with download_portal_apk() as apk_path:
+                sha256 = sha256_file(Path(apk_path))
+                path = self.object_path(sha256)
+                tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+                shutil.copyfile(apk_path, tmp_path)
+                os.replace(tmp_path, path)
+
+            ref_path = self.root / "refs" / version
+            tmp_ref = ref_path.parent / f"{version}.{os.getpid()}.tmp"
+            tmp_ref.write_text(sha256)
+            os.replace(tmp_ref, ref_path)
+            logger.info(f"Cached portal APK {version} as {sha256[:12]}")
+            return sha256, path
@@ -3,6 +3,10 @@ Keepalive service for the DroidRun accessibility overlay.
 
 This module provides functionality to continuously disable the overlay of the
 DroidRun accessibility service, which is necessary for some tasks.
+
+`OverlayKeepalive` watches any number of devices from one asyncio task. Each
+check is a single `adb shell` call that reads the overlay state and only
+broadcasts the hide toggle when the overlay was re-enabled.
 """
 
 import os
@@ -11,9 +15,17 @@ import time
 import logging
 import asyncio
 import subprocess
-from typing import Optional
-from contextlib import contextmanager
+from typing import Dict, Optional
+from contextlib import asynccontextmanager, contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from adbutils import adb, AdbDevice
+from eval.portal.probe import (
+    HIDE_OVERLAY_COMMAND,
+    HIDE_VISIBLE_OVERLAY_COMMAND,
+    DeviceStatus,
+    run_probe,
+)
 import threading
 
 logger = logging.getLogger(__name__)
@@ -27,9 +39,7 @@ def disable_overlay_once(device: AdbDevice):
         device_serial: Device serial number
     """
     try:
-        device.shell(
-            "am broadcast -a com.droidrun.portal.TOGGLE_OVERLAY --ez overlay_visible false"
-        )
+        device.shell(HIDE_OVERLAY_COMMAND)
 
         logger.debug("Disabled overlay once")
         return True
@@ -82,3 +92,163 @@ class KeepOverlayDisabled:
 
     def __exit__(self, exc_type, exc_value, traceback):
         self.stop()
+
+
+DEFAULT_KEEPALIVE_INTERVAL = 5
+# Upper bound on concurrent adb calls of one keepalive.
+DEFAULT_KEEPALIVE_WORKERS = 4
+
+
+@dataclass
+class KeepaliveStats:
+    checks: int = field(default=0)
+    broadcasts_sent: int = field(default=0)
+    drift_detections: int = field(default=0)
+    errors: int = field(default=0)
+    adb_seconds: float = field(default=0.0)
+    last_adb_latency: float | None = field(default=None)
+
+    @property
+    def mean_adb_latency(self) -> float | None:
+        return self.adb_seconds / self.checks if self.checks else None
+
+    def add(self, other: "KeepaliveStats"):
+        self.checks += other.checks
+        self.broadcasts_sent += other.broadcasts_sent
+        self.drift_detections += other.drift_detections
+        self.errors += other.errors
+        self.adb_seconds += other.adb_seconds
+
+
+class OverlayKeepalive:
+    """Keeps the overlay disabled on many devices from one event loop.
+
+    Devices are watched with reference counts, so concurrent tasks on the
+    same device share one check. Blocking adb calls run on a small shared
+    thread pool instead of one thread per device.
+    """
+
+    def __init__(
+        self,
+        interval: float = DEFAULT_KEEPALIVE_INTERVAL,
+        max_workers: int = DEFAULT_KEEPALIVE_WORKERS,
+    ):
+        self.interval = interval
+        self.max_workers = max_workers
+        self.stats: Dict[str, KeepaliveStats] = {}
+        self._devices: Dict[str, AdbDevice] = {}
+        self._watchers: Dict[str, int] = {}
+        self._executor: ThreadPoolExecutor | None = None
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    @property
+    def total(self) -> KeepaliveStats:
+        total = KeepaliveStats()
+        for stats in self.stats.values():
+            total.add(stats)
+        return total
+
+    def watch(self, serial: str):
+        self._watchers[serial] = self._watchers.get(serial, 0) + 1
+        if serial in self._devices:
+            return
+
+        self._devices[serial] = adb.device(serial)
+        self.stats.setdefault(serial, KeepaliveStats())
+        if self._task is None or self._task.done():
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    self.max_workers, thread_name_prefix="overlay-keepalive"
+                )
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Started overlay keepalive with {self.interval}s interval")
+        else:
+            # Check the new device right away instead of after a full interval.
+            self._wakeup.set()
+
+    def unwatch(self, serial: str):
+        count = self._watchers.get(serial, 0) - 1
+        if count > 0:
+            self._watchers[serial] = count
+            return
+
+        self._watchers.pop(serial, None)
+        self._devices.pop(serial, None)
+        if not self._devices and self._task is not None:
+            self._task.cancel()
+            self._task = None
+            stats = self.total
+            logger.info(
+                f"Stopped overlay keepalive: {stats.checks} checks,"
+                f" {stats.broadcasts_sent} broadcasts,"
+                f" {stats.drift_detections} drift detections"
+            )
+
+    @asynccontextmanager
+    async def keep_disabled(self, serial: str):
+        self.watch(serial)
+        try:
+            yield self.stats[serial]
+        finally:
+            self.unwatch(serial)
+
+    def _check(self, serial: str, device: AdbDevice):
+        stats = self.stats[serial]
+        start = time.perf_counter()
+        try:
+            results = run_probe(
+                device, {"overlay_windows": HIDE_VISIBLE_OVERLAY_COMMAND}
+            )
+        except Exception as e:
+            stats.errors += 1
+            logger.error(f"Failed to check overlay on {serial}: {e}")
+            return
+
+        stats.last_adb_latency = time.perf_counter() - start
+        stats.adb_seconds += stats.last_adb_latency
+        stats.checks += 1
+        visible = DeviceStatus.from_results(results).overlay_visible
+        if visible is not False:
+            # The command broadcasts blindly when the state is unreadable.
+            stats.broadcasts_sent += 1
+        if visible:
+            stats.drift_detections += 1
+            logger.debug(f"Overlay re-enabled on {serial}, disabled it again")
+
+    async def _loop(self):
+        loop = asyncio.get_running_loop()
+        while self._devices:
+            self._wakeup.clear()
+            await asyncio.gather(
+                *(
+                    loop.run_in_executor(self._executor, self._check, serial, device)
+                    for serial, device in list(self._devices.items())
+                )
+            )
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def aclose(self):
+        self._devices.clear()
+        self._watchers.clear()
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+
+_shared_keepalive: OverlayKeepalive | None = None
+
+
+def get_overlay_keepalive() -> OverlayKeepalive:
+    """Returns the keepalive shared by every task of this process."""
+    global _shared_keepalive
+    if _shared_keepalive is None:
+        _shared_keepalive = OverlayKeepalive()
+    return _shared_keepalive
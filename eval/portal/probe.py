@@ -0,0 +1,165 @@
+"""
+Batched device probes.
+
+Device and portal state is read by composing several shell queries into a
+single `adb shell` invocation. Each query's output is preceded by a marker
+line, so the combined output is split back into per-query results in one
+pass. Over ADB-over-TCP this replaces one round trip per query with one per
+probe.
+"""
+
+import logging
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Dict, Iterable
+
+# adbutils imports PIL, the CLI must start without it.
+if TYPE_CHECKING:
+    from adbutils import AdbDevice
+
+logger = logging.getLogger(__name__)
+
+PORTAL_PACKAGE_NAME = "com.droidrun.portal"
+_MARKER = "@@droidworld-probe@@"
+
+QUERIES = {
+    "boot_id": "cat /proc/sys/kernel/random/boot_id",
+    "boot_completed": "getprop sys.boot_completed",
+    "portal_version": f"dumpsys package {PORTAL_PACKAGE_NAME} | grep -m1 versionName",
+    "a11y_enabled": "settings get secure accessibility_enabled",
+    "a11y_services": "settings get secure enabled_accessibility_services",
+    "portal_content": (
+        f"content query --uri content://{PORTAL_PACKAGE_NAME}/state"
+        " | grep -c 'Row: 0 result='"
+    ),
+    # Number of visible accessibility overlay windows owned by the portal.
+    "overlay_windows": (
+        "dumpsys window windows | awk"
+        f" '/Window #/ {{p = /{PORTAL_PACKAGE_NAME}/; a = 0}}"
+        " p && /ty=ACCESSIBILITY_OVERLAY/ {a = 1}"
+        " p && a && /mViewVisibility=0x0/ {c++}"
+        " END {print c + 0}'"
+    ),
+}
+DEFAULT_QUERIES = (
+    "boot_id",
+    "boot_completed",
+    "portal_version",
+    "a11y_enabled",
+    "a11y_services",
+    "portal_content",
+)
+
+HIDE_OVERLAY_COMMAND = (
+    f"am broadcast -a {PORTAL_PACKAGE_NAME}.TOGGLE_OVERLAY --ez overlay_visible false"
+)
+# Prints the number of visible overlay windows and hides the overlay unless
+# that number is 0, so an unreadable overlay state still gets the broadcast.
+HIDE_VISIBLE_OVERLAY_COMMAND = (
+    f"n=$({QUERIES['overlay_windows']}); echo $n;"
+    f' [ "$n" = 0 ] || {HIDE_OVERLAY_COMMAND} >/dev/null'
+)
+
+
+def set_overlay_offset_command(offset: int) -> str:
+    return (
+        f"content insert --uri content://{PORTAL_PACKAGE_NAME}/overlay_offset"
+        f" --bind offset:i:{offset} >/dev/null; echo $?"
+    )
+
+
+@dataclass
+class DeviceStatus:
+    boot_id: str = field(default="")
+    boot_completed: bool = field(default=False)
+    portal_version: str = field(default="")
+    a11y_enabled: bool = field(default=False)
+    a11y_services: str = field(default="")
+    portal_content_ok: bool = field(default=False)
+    overlay_offset_set: bool | None = field(default=None)
+    # None if the overlay state could not be read.
+    overlay_visible: bool | None = field(default=None)
+    raw: Dict[str, str] = field(default_factory=dict)
+
+    @classmethod
+    def from_results(cls, results: Dict[str, str]) -> "DeviceStatus":
+        version = results.get("portal_version", "")
+        return cls(
+            boot_id=results.get("boot_id", ""),
+            boot_completed=results.get("boot_completed") == "1",
+            portal_version=version.split("=", 1)[-1] if version else "",
+            a11y_enabled=results.get("a11y_enabled") == "1",
+            a11y_services=results.get("a11y_services", ""),
+            portal_content_ok=_as_int(results.get("portal_content")) > 0,
+            overlay_offset_set=(
+                results["overlay_offset"] == "0"
+                if "overlay_offset" in results
+                else None
+            ),
+            overlay_visible=(
+                int(results["overlay_windows"]) > 0
+                if results.get("overlay_windows", "").isdigit()
+                else None
+            ),
+            raw=results,
+        )
+
+    def has_a11y_service(self, service_name: str) -> bool:
+        return self.a11y_enabled and service_name in self.a11y_services
+
+
+def _as_int(value: str | None) -> int:
+    try:
+        return int(value or 0)
+    except ValueError:
+        return 0
+
+
+def compose_probe(commands: Dict[str, str]) -> str:
+    """Joins named shell commands into one script with delimited output."""
+    return "; ".join(
+        f"echo {_MARKER}{name}; {{ {command}; }} 2>/dev/null"
+        for name, command in commands.items()
+    )
+
+
+def parse_probe_output(output: str) -> Dict[str, str]:
+    """Splits the output of a composed probe back into named results."""
+    results: Dict[str, str] = {}
+    name, lines = None, []
+    for line in output.splitlines():
+        if line.startswith(_MARKER):
+            if name is not None:
+                results[name] = "\n".join(lines).strip()
+            name, lines = line[len(_MARKER) :].strip(), []
+        elif name is not None:
+            lines.append(line)
+    if name is not None:
+        results[name] = "\n".join(lines).strip()
+    return results
+
+
+def run_probe(device: "AdbDevice", commands: Dict[str, str]) -> Dict[str, str]:
+    """Runs named shell commands in a single `adb shell` call."""
+    return parse_probe_output(device.shell(compose_probe(commands)))
+
+
+def probe_device(
+    device: "AdbDevice",
+    queries: Iterable[str] = DEFAULT_QUERIES,
+    overlay_offset: int | None = None,
+    hide_overlay: bool = False,
+) -> DeviceStatus:
+    """Reads device and portal state in one round trip.
+
+    Args:
+        device: Device to probe
+        queries: Names of `QUERIES` to run
+        overlay_offset: Also sets the portal overlay offset if given
+        hide_overlay: Also broadcasts the portal's hide-overlay toggle
+    """
+    commands = {name: QUERIES[name] for name in queries}
+    if overlay_offset is not None:
+        commands["overlay_offset"] = set_overlay_offset_command(overlay_offset)
+    if hide_overlay:
+        commands["hide_overlay"] = HIDE_OVERLAY_COMMAND
+    return DeviceStatus.from_results(run_probe(device, commands))
@@ -1,24 +1,51 @@
+import asyncio
 import logging
-import math
+from contextlib import nullcontext
+from dataclasses import dataclass
 from typing import Tuple
 
 from llama_index.core.workflow import WorkflowTimeoutError
 from llama_index.core.llms import LLM
 from droidrun import DroidAgent
 
+from eval.budget import Budget, BudgetPolicy, StaticBudgetPolicy
+from eval.env.catalog import SuiteCatalog
 from eval.env.client import AndroidEnvClient
+from eval.env.snapshots import SnapshotManager
+from eval.errors import classify_error
 from eval.tools import AndroidWorldTools
 from eval.tracker import (
+    OUTCOME_COMPLETED,
+    OUTCOME_ERROR,
+    OUTCOME_STUCK,
+    OUTCOME_TIMEOUT,
     track_task,
     TaskResult,
     get_task_result,
 )
-# from eval.portal.keepalive import KeepOverlayDisabled
+from eval.llm.gateway import llm_deadline
+from eval.loop_detector import AgentStuckError, LoopDetector
+from eval.portal.keepalive import get_overlay_keepalive
+from eval.timing import PhaseTimer, StepTimer, timing_steps
 
 logger = logging.getLogger(__name__)
 
 
-async def run_task_on_env(
+@dataclass
+class PreparedTask:
+    """A task whose goal, budget and agent are ready before it starts."""
+
+    task_id: int
+    task_name: str
+    task_idx: int
+    goal: str
+    complexity: float
+    budget: Budget
+    agent: DroidAgent
+    tools: AndroidWorldTools
+
+
+async def prepare_task(
     env: AndroidEnvClient,
     device_serial: str,
     llm: LLM,
@@ -32,28 +59,27 @@ async def run_task_on_env(
     reflection: bool,
     tracing: bool,
     debug: bool,
-) -> Tuple[TaskResult, Exception | None]:
-    env.reset(go_home=True)
-    task_goal = env.get_task_goal(task_name, task_idx)
-    task_complexity = env.get_task_complexity(task_name, task_idx)
+    catalog: SuiteCatalog | None = None,
+    budget_policy: BudgetPolicy | None = None,
+) -> PreparedTask:
+    """Does all per-task work that does not touch the device state.
 
-    max_steps = math.ceil(task_complexity * max_steps_multiplier)
-    max_retries = math.ceil(max_steps / 10)
-    timeout = math.ceil(task_complexity * timeout_multiplier)
+    Safe to run while another task is still running on the same device.
+    """
+    if catalog is not None:
+        task_info = catalog.instance(task_name, task_idx)
+        task_goal, task_complexity = task_info.goal, task_info.complexity
+    else:
+        task_goal = await env.aio.get_task_goal(task_name, task_idx)
+        task_complexity = await env.aio.get_task_complexity(task_name, task_idx)
 
-    logger.info(
-        f"Initializing Task {task_name} {task_idx} | Complexity {task_complexity} -> {max_steps} max steps | {task_goal} within {timeout} seconds"
-    )
+    if budget_policy is None:
+        budget_policy = StaticBudgetPolicy(max_steps_multiplier, timeout_multiplier)
+    budget = budget_policy.budget(task_name, task_complexity)
+    max_steps, timeout = budget.max_steps, budget.timeout
 
-    try:
-        env.initialize_task(task_name, task_idx)
-        logger.debug("Task initialized successfully")
-    except Exception as e:
-        raise RuntimeError(f"Error initializing task {task_name} {task_idx}: {e}")
-
-    # with KeepOverlayDisabled(device_serial):
     logger.info(
-        f"Initializing DroidAgent with {max_steps} steps and {timeout} timeout"
+        f"Initializing DroidAgent for {task_name} {task_idx} with {max_steps} steps and {timeout} timeout ({budget.source} budget)"
     )
 
     tools = AndroidWorldTools(device_serial, env)
@@ -70,50 +96,167 @@ async def run_task_on_env(
         reflection=reflection,
         vision=vision,
     )
-
     logger.debug("DroidAgent initialized successfully")
 
-    task_result = track_task(task_id, task_name, task_idx, task_goal, max_steps)
+    return PreparedTask(
+        task_id=task_id,
+        task_name=task_name,
+        task_idx=task_idx,
+        goal=task_goal,
+        complexity=task_complexity,
+        budget=budget,
+        agent=agent,
+        tools=tools,
+    )
+
 
+async def _run_agent(agent: DroidAgent, detector: LoopDetector | None):
+    """Runs the agent, cancelling it as soon as `detector` reports it stuck."""
+    handler = agent.run()
+    if detector is None:
+        return await handler
+
+    loop = asyncio.get_running_loop()
+    stuck = asyncio.Event()
+    detector.on_stuck = lambda: loop.call_soon_threadsafe(stuck.set)
+    waiter = asyncio.create_task(stuck.wait())
     try:
+        await asyncio.wait({handler, waiter}, return_when=asyncio.FIRST_COMPLETED)
+    finally:
+        waiter.cancel()
+    if handler.done():
+        return await handler
 
-        logger.info("Running DroidAgent...")
-        agent_result = await agent.run()
-        logger.debug("DroidAgent completed successfully")
-
-        score = env.get_task_score(task_name, task_idx)
-        logger.info(f"Task {task_name} {task_idx} score: {score}")
-
-        result = get_task_result(
-            task_result,
-            agent,
-            score=score,
-            agent_result=agent_result,
-            device=device_serial,
-        )
-    except WorkflowTimeoutError as e:
-        logger.warn(f"Droidrun timed out for task {task_name} {task_idx}: {e}")
-        score = env.get_task_score(task_name, task_idx)
-        logger.info(f"Task {task_name} {task_idx} score: {score}")
-        result = get_task_result(
-            task_result,
-            agent,
-            score=score,
-            agent_result={
-                "steps": agent.step_counter,
-                "success": False,
-                "reason": f"Timeout after {timeout} seconds",
-            },
-            device=device_serial,
-        )
+    await handler.cancel_run()
+    try:
+        await handler
     except Exception as e:
-        logger.error(f"Error completing task {task_name} {task_idx}: {e}")
-        result = get_task_result(
-            task_result,
-            agent,
-            error=repr(e),
-            device=device_serial,
-        )
+        logger.debug(f"Cancelled stuck agent: {e!r}")
+    raise AgentStuckError(detector.reason)
+
+
+async def execute_task(
+    env: AndroidEnvClient,
+    device_serial: str,
+    task: PreparedTask,
+    keep_overlay_disabled: bool = False,
+    snapshots: SnapshotManager | None = None,
+    stuck_repeats: int = 0,
+) -> Tuple[TaskResult, Exception | None]:
+    """Resets the device, runs a prepared task on it, scores and tears down.
+
+    With `snapshots`, the device is restored to the clean snapshot instead of
+    being reset, so a failed teardown of the previous task leaves no trace.
+    With `stuck_repeats`, the agent is stopped once it repeats the same action
+    on an unchanged screen that many times.
+    """
+    task_name, task_idx = task.task_name, task.task_idx
+    agent, timeout = task.agent, task.budget.timeout
+    timer = PhaseTimer()
+
+    if snapshots is not None:
+        with timer.phase("restore"):
+            await snapshots.restore(env)
+    else:
+        with timer.phase("reset"):
+            await env.aio.reset(go_home=True)
+    logger.info(
+        f"Initializing Task {task_name} {task_idx} | Complexity {task.complexity} -> {task.budget.max_steps} max steps | {task.goal} within {timeout} seconds"
+    )
+
+    try:
+        with timer.phase("initialize"):
+            await env.aio.initialize_task(task_name, task_idx)
+        logger.debug("Task initialized successfully")
+    except Exception as e:
+        raise RuntimeError(f"Error initializing task {task_name} {task_idx}: {e}")
+
+    task_result = track_task(
+        task.task_id, task_name, task_idx, task.goal, task.budget.max_steps
+    )
+    task_result.timeout = timeout
+    task_result.budget_source = task.budget.source
+    task_result.phases = timer.phases
+    steps = StepTimer()
+    task.tools.step_timer = steps
+
+    detector = None
+    if stuck_repeats > 0:
+        detector = LoopDetector(stuck_repeats)
+        task.tools.loop_detector = detector
+
+    keepalive = (
+        get_overlay_keepalive().keep_disabled(device_serial)
+        if keep_overlay_disabled
+        else nullcontext()
+    )
+    async with keepalive:
+        try:
+
+            logger.info("Running DroidAgent...")
+            # Behind an LLM gateway, tasks close to their timeout go first.
+            with timer.phase("agent_run"), timing_steps(steps), llm_deadline(timeout):
+                agent_result = await _run_agent(agent, detector)
+            logger.debug("DroidAgent completed successfully")
+
+            with timer.phase("score"):
+                score = await env.aio.get_task_score(task_name, task_idx)
+            logger.info(f"Task {task_name} {task_idx} score: {score}")
+
+            result = get_task_result(
+                task_result,
+                agent,
+                score=score,
+                agent_result=agent_result,
+                device=device_serial,
+                outcome=OUTCOME_COMPLETED,
+            )
+        except AgentStuckError as e:
+            logger.warn(f"Stopped task {task_name} {task_idx} early: {e}")
+            with timer.phase("score"):
+                score = await env.aio.get_task_score(task_name, task_idx)
+            logger.info(f"Task {task_name} {task_idx} score: {score}")
+            result = get_task_result(
+                task_result,
+                agent,
+                score=score,
+                agent_result={
+                    "steps": agent.step_counter,
+                    "success": False,
+                    "reason": str(e),
+                },
+                device=device_serial,
+                outcome=OUTCOME_STUCK,
+            )
+        except WorkflowTimeoutError as e:
+            logger.warn(f"Droidrun timed out for task {task_name} {task_idx}: {e}")
+            with timer.phase("score"):
+                score = await env.aio.get_task_score(task_name, task_idx)
+            logger.info(f"Task {task_name} {task_idx} score: {score}")
+            result = get_task_result(
+                task_result,
+                agent,
+                score=score,
+                agent_result={
+                    "steps": agent.step_counter,
+                    "success": False,
+                    "reason": f"Timeout after {timeout} seconds",
+                },
+                device=device_serial,
+                outcome=OUTCOME_TIMEOUT,
+            )
+        except Exception as e:
+            logger.error(f"Error completing task {task_name} {task_idx}: {e}")
+            result = get_task_result(
+                task_result,
+                agent,
+                error=repr(e),
+                device=device_serial,
+                outcome=OUTCOME_ERROR,
+            )
+            # The result only keeps the repr, classify the exception itself.
+            result.error_kind = classify_error(e)
+    result.step_timings = steps.steps
     # finally:
     #     try:
     #         write_task_trajectory(task_name, task_idx, agent)
@@ -132,7 +275,8 @@ async def run_task_on_env(
 
     try:
         logger.debug(f"Tearing down task {task_name} {task_idx}")
-        env.tear_down_task(task_name, task_idx)
+        with timer.phase("teardown"):
+            await env.aio.tear_down_task(task_name, task_idx)
     except Exception as e:
         logger.error(f"Error tearing down task {task_name} {task_idx}: {e}")
         logger.info("Continuing to next task...")
@@ -141,3 +285,39 @@ async def run_task_on_env(
     # TODO add trajectory to task result
 
     return (result, None)
+
+
+async def run_task_on_env(
+    env: AndroidEnvClient,
+    device_serial: str,
+    llm: LLM,
+    task_id: int,
+    task_name: str,
+    task_idx: int,
+    max_steps_multiplier: int,
+    timeout_multiplier: int,
+    vision: bool,
+    reasoning: bool,
+    reflection: bool,
+    tracing: bool,
+    debug: bool,
+    catalog: SuiteCatalog | None = None,
+    keep_overlay_disabled: bool = False,
+) -> Tuple[TaskResult, Exception | None]:
+    task = await prepare_task(
+        env,
+        device_serial,
+        llm,
+        task_id,
+        task_name,
+        task_idx,
+        max_steps_multiplier,
+        timeout_multiplier,
+        vision,
+        reasoning,
+        reflection,
+        tracing,
+        debug,
+        catalog,
+    )
+    return await execute_task(env, device_serial, task, keep_overlay_disabled)
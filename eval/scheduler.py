@@ -0,0 +1,382 @@
+"""Dispatch of task instances across several devices.
+
+`WorkStealingQueue` keeps one deque of work items per device. A device takes
+items from the front of its own deque and, once that is empty, steals from
+the back of the fullest other deque, so no device idles while work is left.
+`DeviceScheduler` runs one `TaskPipeline` per device on a shared queue in one
+event loop and periodically logs throughput. Devices that become ready after
+the run started join it and steal their share of the remaining items.
+
+The scheduler also tracks the health of every device. Items that hit an
+infrastructure error (see `eval.errors`) are requeued, preferably on another
+device, up to `max_retries` times; after that, they are dropped and only
+their error is written as result. A device whose infrastructure keeps
+failing is quarantined: it stops taking items, its queued items go to the
+other devices, and it is recovered in the background. Once recovered, it
+rejoins the run. Only the first failure of an item counts against a device,
+so an instance that fails everywhere does not quarantine healthy devices.
+
+With a `TimeBudget`, devices do not start items that are expected to run
+past the deadline; these are collected in `skipped` with the reason.
+"""
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import (
+    AsyncIterable,
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Deque,
+    Dict,
+    Iterable,
+    List,
+    Tuple,
+)
+
+from eval.deadline import TimeBudget
+from eval.pipeline import TaskPipeline, WorkItem
+from eval.tracker import TaskResult
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_CONSECUTIVE_FAILURES = 3
+DEFAULT_MAX_RETRIES = 2
+DEFAULT_SUMMARY_INTERVAL = 60
+# Health scores are an exponential moving average of infrastructure successes.
+HEALTH_SCORE_WEIGHT = 0.25
+MIN_HEALTH_SCORE = 0.5
+RECOVERY_DELAYS = (30, 60, 120, 240)
+
+
+class WorkStealingQueue:
+    def __init__(self, devices: Iterable[str]):
+        self._deques: Dict[str, Deque[WorkItem]] = {d: deque() for d in devices}
+        # Items waiting for a device to (re)join when no device is left.
+        self._parked: Deque[WorkItem] = deque()
+        self.steals = 0
+
+    def __len__(self) -> int:
+        return len(self._parked) + sum(len(d) for d in self._deques.values())
+
+    def put_all(self, items: Iterable[WorkItem]):
+        """Deals `items` round-robin, so every device starts with its share."""
+        devices = list(self._deques)
+        for i, item in enumerate(items):
+            self._deques[devices[i % len(devices)]].append(item)
+
+    def requeue(self, item: WorkItem, avoid: str | None = None):
+        """Puts `item` first in the shortest deque, avoiding `avoid` if possible."""
+        devices = [d for d in self._deques if d != avoid] or list(self._deques)
+        if not devices:
+            self._parked.append(item)
+            return
+        shortest = min(devices, key=lambda d: len(self._deques[d]))
+        self._deques[shortest].appendleft(item)
+
+    def get(self, device: str) -> WorkItem | None:
+        own = self._deques.get(device)
+        if own:
+            return own.popleft()
+
+        victim = max(self._deques.values(), key=len, default=None)
+        if not victim:
+            return None
+        self.steals += 1
+        return victim.pop()
+
+    def peek(self, device: str) -> WorkItem | None:
+        """The item `get` would return now, without taking it."""
+        own = self._deques.get(device)
+        if own:
+            return own[0]
+        victim = max(self._deques.values(), key=len, default=None)
+        return victim[-1] if victim else None
+
+    def add_device(self, device: str):
+        own = self._deques.setdefault(device, deque())
+        own.extend(self._parked)
+        self._parked.clear()
+
+    def remove_device(self, device: str):
+        """Hands the items of `device` to the remaining devices."""
+        items = self._deques.pop(device, deque())
+        if self._deques:
+            self.put_all(items)
+        else:
+            self._parked.extend(items)
+
+
+@dataclass
+class DeviceHealth:
+    device: str
+    completed: int = field(default=0)
+    # Infrastructure failures, agent failures do not count against a device.
+    failures: int = field(default=0)
+    consecutive_failures: int = field(default=0)
+    score: float = field(default=1.0)
+    busy_seconds: float = field(default=0.0)
+    last_error: str | None = field(default=None)
+    quarantined: bool = field(default=False)
+    recoveries: int = field(default=0)
+
+    def record(self, failed: bool):
+        self.score += HEALTH_SCORE_WEIGHT * ((0.0 if failed else 1.0) - self.score)
+        if failed:
+            self.failures += 1
+            self.consecutive_failures += 1
+        else:
+            self.consecutive_failures = 0
+
+
+class DeviceScheduler:
+    def __init__(
+        self,
+        pipelines: Dict[str, TaskPipeline],
+        recover: Callable[[str], Awaitable[None]] | None = None,
+        max_consecutive_failures: int = DEFAULT_MAX_CONSECUTIVE_FAILURES,
+        max_retries: int = DEFAULT_MAX_RETRIES,
+        summary_interval: float = DEFAULT_SUMMARY_INTERVAL,
+        time_budget: TimeBudget | None = None,
+    ):
+        self.pipelines = pipelines
+        # Brings a quarantined device back, raising if it fails to.
+        self.recover = recover
+        self.max_consecutive_failures = max_consecutive_failures
+        self.max_retries = max_retries
+        self.summary_interval = summary_interval
+        self.time_budget = time_budget
+        self.queue = WorkStealingQueue(pipelines)
+        self.health: Dict[str, DeviceHealth] = {}
+        self.retries: Dict[WorkItem, int] = {}
+        self.dropped: List[WorkItem] = []
+        self.skipped: Dict[WorkItem, str] = {}
+        self.results: List[TaskResult] = []
+        self.total = 0
+        self._started_at = 0.0
+        # Items a device took from the queue and has not finished yet.
+        self._claimed: Dict[str, List[WorkItem]] = {}
+        self._consumers: Dict[str, asyncio.Task] = {}
+        self._recoveries: Dict[str, asyncio.Task] = {}
+        for device, pipeline in pipelines.items():
+            self._register(device, pipeline)
+
+    def _register(self, device: str, pipeline: TaskPipeline):
+        self.pipelines[device] = pipeline
+        self.health[device] = DeviceHealth(device)
+        self._claimed[device] = []
+        pipeline.on_finished = self._recorder(device)
+        pipeline.on_start = self._starter(device)
+
+    async def _join(self, joining: AsyncIterable[Tuple[str, TaskPipeline]]):
+        async for device, pipeline in joining:
+            self._register(device, pipeline)
+            logger.info(f"Device {device} joined the run")
+            self._start(device)
+
+    def _recorder(self, device: str):
+        def record(
+            item: WorkItem,
+            result: TaskResult | None,
+            seconds: float,
+            infrastructure_error: str | None,
+        ) -> bool:
+            health = self.health[device]
+            health.busy_seconds += seconds
+            if item in self._claimed[device]:
+                self._claimed[device].remove(item)
+            if infrastructure_error is not None:
+                health.last_error = infrastructure_error
+                # An instance that failed before, elsewhere, is likely broken
+                # itself, e.g. its initialization fails on every device.
+                if item not in self.retries:
+                    health.record(failed=True)
+                    self._check_health(device)
+                return self._retry(item, device, infrastructure_error)
+            health.record(failed=False)
+            health.completed += 1
+            return False
+
+        return record
+
+    def _starter(self, device: str):
+        def start(item: WorkItem) -> str | None:
+            if self.time_budget is None:
+                return None
+            reason = self.time_budget.skip_reason(item)
+            if reason is not None:
+                if item in self._claimed[device]:
+                    self._claimed[device].remove(item)
+                self.skipped[item] = reason
+            return reason
+
+        return start
+
+    def _check_health(self, device: str):
+        health = self.health[device]
+        if (
+            health.consecutive_failures < self.max_consecutive_failures
+            and health.score >= MIN_HEALTH_SCORE
+        ):
+            return
+        health.quarantined = True
+        self.pipelines[device].stop()
+        logger.error(
+            f"Quarantining device {device}: {health.consecutive_failures} infrastructure failures in a row, health {health.score:.2f}, last error: {health.last_error}"
+        )
+
+    def _retry(self, item: WorkItem, device: str, error: str) -> bool:
+        attempts = self.retries.get(item, 0)
+        if attempts >= self.max_retries:
+            logger.error(
+                f"Giving up on {item.task_name} {item.task_idx} after {attempts + 1} infrastructure failures: {error}"
+            )
+            self.dropped.append(item)
+            return False
+
+        self.retries[item] = attempts + 1
+        self.queue.requeue(item, avoid=device)
+        logger.warning(
+            f"Requeued {item.task_name} {item.task_idx} after an infrastructure error on {device} (retry {attempts + 1}/{self.max_retries}): {error}"
+        )
+        self._wake_idle_devices()
+        return True
+
+    async def _items(self, device: str) -> AsyncIterator[WorkItem]:
+        while not self.health[device].quarantined:
+            item = self.queue.get(device)
+            if item is None:
+                return
+            self._claimed[device].append(item)
+            yield item
+
+    def _start(self, device: str):
+        self.queue.add_device(device)
+        self._consumers[device] = asyncio.create_task(self._consume(device))
+
+    def _wake_idle_devices(self):
+        """Restarts healthy devices that ran out of work before a requeue."""
+        for device, health in self.health.items():
+            if device not in self._consumers and not health.quarantined:
+                self._start(device)
+
+    async def _consume(self, device: str):
+        try:
+            self.results.extend(
+                await self.pipelines[device].run(
+                    self._items(device), peek=lambda: self.queue.peek(device)
+                )
+            )
+        except Exception as e:
+            logger.error(f"Device {device} stopped: {e}")
+            self.health[device].quarantined = True
+        finally:
+            del self._consumers[device]
+            # Prefetched items the pipeline did not get to run go back too.
+            unclaimed = self._claimed[device]
+            self._claimed[device] = []
+            self.queue.remove_device(device)
+            for item in unclaimed:
+                self.queue.requeue(item)
+            if len(self.queue):
+                self._wake_idle_devices()
+
+        if self.health[device].quarantined and self.recover is not None:
+            self._recoveries[device] = asyncio.create_task(self._recover(device))
+
+    async def _recover(self, device: str):
+        health = self.health[device]
+        try:
+            for delay in RECOVERY_DELAYS:
+                await asyncio.sleep(delay)
+                try:
+                    await self.recover(device)
+                except Exception as e:
+                    logger.error(f"Recovery of device {device} failed: {e}")
+                    continue
+
+                health.quarantined = False
+                health.consecutive_failures = 0
+                health.score = MIN_HEALTH_SCORE + HEALTH_SCORE_WEIGHT
+                health.recoveries += 1
+                logger.info(f"Device {device} recovered, back in rotation")
+                self._start(device)
+                return
+            logger.error(f"Giving up on device {device}")
+        finally:
+            del self._recoveries[device]
+
+    @property
+    def done(self) -> int:
+        return sum(h.completed for h in self.health.values())
+
+    def summary(self) -> str:
+        elapsed = time.monotonic() - self._started_at
+        rate = self.done / elapsed * 3600 if elapsed > 0 else 0.0
+        devices = ", ".join(
+            f"{h.device}: {h.completed} done, health {h.score:.2f}"
+            + (f" ({h.failures} infra failures)" if h.failures else "")
+            + (" [quarantined]" if h.quarantined else "")
+            for h in self.health.values()
+        )
+        return (
+            f"{self.done}/{self.total} tasks in {elapsed / 60:.1f} min"
+            f" ({rate:.1f}/h, {len(self.queue)} queued, {self.queue.steals} stolen,"
+            f" {sum(self.retries.values())} retried, {len(self.skipped)} skipped)"
+            f" | {devices}"
+        )
+
+    async def _log_summaries(self):
+        while True:
+            await asyncio.sleep(self.summary_interval)
+            logger.info(f"Progress: {self.summary()}")
+
+    async def run(
+        self,
+        items: Iterable[WorkItem],
+        joining: AsyncIterable[Tuple[str, TaskPipeline]] | None = None,
+    ) -> List[TaskResult]:
+        """Runs all items on all devices and returns the results.
+
+        Devices from `joining` are added as it yields them.
+        """
+        items = list(items)
+        self.total = len(items)
+        self.queue.put_all(items)
+        self._started_at = time.monotonic()
+
+        monitor = asyncio.create_task(self._log_summaries())
+        joiner = None
+        if joining is not None:
+            joiner = asyncio.create_task(self._join(joining))
+        try:
+            for device in list(self.pipelines):
+                self._start(device)
+            # Quarantined devices may come back and late devices may join
+            # while there is work left.
+            while True:
+                waiting = [*self._recoveries.values()]
+                if joiner is not None and not joiner.done():
+                    waiting.append(joiner)
+                if not self._consumers and not (waiting and len(self.queue)):
+                    break
+                await asyncio.wait(
+                    [*self._consumers.values(), *waiting],
+                    return_when=asyncio.FIRST_COMPLETED,
+                )
+        finally:
+            monitor.cancel()
+            if joiner is not None:
+                joiner.cancel()
+            for task in [*self._consumers.values(), *self._recoveries.values()]:
+                task.cancel()
+
+        logger.info(f"Finished: {self.summary()}")
+        if len(self.queue) or self.dropped:
+            logger.error(
+                f"{len(self.queue) + len(self.dropped)} tasks did not finish, no healthy device left or out of retries"
+            )
+        return self.results
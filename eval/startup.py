@@ -0,0 +1,97 @@
+"""Import-time budget of the CLI.
+
+Orchestrators run `droidworld check` as a frequent health probe, so the CLI
+must start without loading the agent stack. Commands import droidrun,
+llama_index, android_world and numpy when they run, never at module load.
+
+`measure_imports` imports a module in a fresh interpreter with
+`python -X importtime` and adds up the time spent in the modules of every
+top-level package. `check_startup` fails if one of `HEAVY_PACKAGES` is
+imported or the total exceeds the budget; `droidworld startup-check` runs it.
+"""
+
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Set
+
+CLI_MODULE = "eval.cli"
+# Packages that only the commands running the agent or decoding frames need.
+HEAVY_PACKAGES = (
+    "droidrun",
+    "llama_index",
+    "android_world",
+    "numpy",
+    "PIL",
+    # Imports PIL.
+    "adbutils",
+)
+DEFAULT_STARTUP_BUDGET_MS = 1500.0
+
+# import time:       self [us] |  cumulative | imported package
+_IMPORT_TIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+\d+ \| *(\S+)")
+
+
+@dataclass
+class ImportProfile:
+    module: str
+    # Milliseconds spent in the modules of each top-level package.
+    packages: Dict[str, float] = field(default_factory=dict)
+    modules: Set[str] = field(default_factory=set)
+
+    @property
+    def total_ms(self) -> float:
+        return sum(self.packages.values())
+
+    def imported(self, packages: Iterable[str]) -> List[str]:
+        """Those of `packages` that were imported, at any depth."""
+        return [
+            package
+            for package in packages
+            if any(m == package or m.startswith(f"{package}.") for m in self.modules)
+        ]
+
+
+def parse_import_times(output: str, module: str = CLI_MODULE) -> ImportProfile:
+    """Reads the `-X importtime` lines of `output` into an `ImportProfile`."""
+    packages: Dict[str, float] = defaultdict(float)
+    modules = set()
+    for line in output.splitlines():
+        match = _IMPORT_TIME_LINE.match(line)
+        if match is None:
+            continue
+        self_us, name = match.groups()
+        modules.add(name)
+        packages[name.split(".")[0]] += int(self_us) / 1000
+    return ImportProfile(module, dict(packages), modules)
+
+
+def measure_imports(module: str = CLI_MODULE) -> ImportProfile:
+    """Imports `module` in a fresh interpreter and profiles the imports."""
+    process = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if process.returncode != 0:
+        raise RuntimeError(f"Failed to import {module}: {process.stderr[-2000:]}")
+    return parse_import_times(process.stderr, module)
+
+
+def check_startup(
+    profile: ImportProfile,
+    max_ms: float = DEFAULT_STARTUP_BUDGET_MS,
+    heavy_packages: Iterable[str] = HEAVY_PACKAGES,
+) -> List[str]:
+    """Problems with the startup of `profile`, empty if there are none."""
+    problems = [
+        f"{profile.module} imports {package} at module load"
+        for package in profile.imported(heavy_packages)
+    ]
+    if profile.total_ms > max_ms:
+        problems.append(
+            f"Importing {profile.module} takes {profile.total_ms:.0f} ms, the budget is {max_ms:.0f} ms"
+        )
+    return problems
@@ -0,0 +1,201 @@
+"""Monotonic-clock timings of task phases and agent steps.
+
+`PhaseTimer` records how long each phase of a task took (`reset` or
+`restore`, `initialize`, `agent_run`, `score`, `teardown`, `write`). `StepTimer` splits
+the agent run into steps: a step starts when an LLM call returns, and the
+tool/device calls made until the next LLM call count towards it. LLM calls
+are timed through llama-index instrumentation events, routed to the
+`StepTimer` of the current task by a context variable. The time an LLM call
+waited for admission by an `LLMGateway` is part of it and also reported as
+`llm_queue`. Tool calls are timed by `AndroidWorldTools`, which holds its
+task's `StepTimer` itself because generated agent code calls tools from
+plain threads.
+
+numpy and llama-index are imported by the functions that use them, so that
+summarizing timings does not pay for them.
+"""
+
+import functools
+import inspect
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+PHASES = ("restore", "reset", "initialize", "agent_run", "score", "teardown", "write")
+
+
+class PhaseTimer:
+    def __init__(self):
+        self.phases: Dict[str, float] = {}
+
+    def record(self, name: str, seconds: float):
+        self.phases[name] = self.phases.get(name, 0.0) + seconds
+
+    @contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(name, time.monotonic() - start)
+
+
+class StepTimer:
+    def __init__(self):
+        self.steps: List[Dict[str, float]] = []
+        self._lock = threading.Lock()
+        # Nesting of LLM calls, e.g. a caching LLM calling the provider's.
+        self._llm_depth = 0
+        self._llm_started = 0.0
+        self._llm_queued = 0.0
+
+    def llm_started(self):
+        with self._lock:
+            if self._llm_depth == 0:
+                self._llm_started = time.monotonic()
+            self._llm_depth += 1
+
+    def llm_queued(self, seconds: float):
+        """Adds time the current LLM call waited for admission."""
+        with self._lock:
+            self._llm_queued += seconds
+
+    def llm_ended(self):
+        with self._lock:
+            if self._llm_depth == 0:
+                return
+            self._llm_depth -= 1
+            if self._llm_depth == 0:
+                elapsed = time.monotonic() - self._llm_started
+                step = {"llm": elapsed, "tools": 0.0, "llm_queue": self._llm_queued}
+                self.steps.append(step)
+                self._llm_queued = 0.0
+
+    def add_tool(self, seconds: float):
+        with self._lock:
+            if not self.steps:
+                self.steps.append({"llm": 0.0, "tools": 0.0, "llm_queue": 0.0})
+            self.steps[-1]["tools"] += seconds
+
+
+current_step_timer: ContextVar[StepTimer | None] = ContextVar(
+    "current_step_timer", default=None
+)
+
+
+@contextmanager
+def timing_steps(timer: StepTimer) -> Iterator[StepTimer]:
+    """Reports LLM calls made in this context to `timer`."""
+    install_llm_timing()
+    token = current_step_timer.set(timer)
+    try:
+        yield timer
+    finally:
+        current_step_timer.reset(token)
+
+
+def timed_tool(
+    func: Callable[..., Any], record: Callable[[float], None]
+) -> Callable[..., Any]:
+    """Wraps a tool so that `record` gets the latency of every call."""
+
+    if inspect.iscoroutinefunction(func):
+
+        @functools.wraps(func)
+        async def async_wrapper(*args, **kwargs):
+            start = time.monotonic()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                record(time.monotonic() - start)
+
+        return async_wrapper
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.monotonic()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            record(time.monotonic() - start)
+
+    return wrapper
+
+
+_llm_timing_installed = False
+
+
+def install_llm_timing():
+    """Times the outermost LLM call between its start and end events."""
+    global _llm_timing_installed
+    if _llm_timing_installed:
+        return
+
+    from llama_index.core.instrumentation import get_dispatcher
+    from llama_index.core.instrumentation.event_handlers import BaseEventHandler
+    from llama_index.core.instrumentation.events.llm import (
+        LLMChatEndEvent,
+        LLMChatStartEvent,
+        LLMCompletionEndEvent,
+        LLMCompletionStartEvent,
+    )
+
+    class LLMTimingHandler(BaseEventHandler):
+        @classmethod
+        def class_name(cls) -> str:
+            return "LLMTimingHandler"
+
+        def handle(self, event, **kwargs):
+            timer = current_step_timer.get()
+            if timer is None:
+                return
+            if isinstance(event, (LLMChatStartEvent, LLMCompletionStartEvent)):
+                timer.llm_started()
+            elif isinstance(event, (LLMChatEndEvent, LLMCompletionEndEvent)):
+                timer.llm_ended()
+
+    get_dispatcher().add_event_handler(LLMTimingHandler())
+    _llm_timing_installed = True
+
+
+PERCENTILES = (50, 90, 99)
+
+
+def summarize_timings(
+    results: Iterable[Dict[str, Any]], percentiles: Sequence[int] = PERCENTILES
+) -> Dict[str, Dict[str, Dict[str, float]]]:
+    """Percentiles of phase and step timings per task type.
+
+    Returns `{task_name: {metric: {"n": count, "p50": seconds, ...}}}`, where
+    the metrics are the phases plus `step_llm`, `step_tools` and, for results
+    with queueing times, `step_llm_queue`.
+    """
+    import numpy as np
+
+    samples: Dict[str, Dict[str, List[float]]] = {}
+    for result in results:
+        metrics = samples.setdefault(result["task_name"], {})
+        for name, seconds in result.get("phases", {}).items():
+            metrics.setdefault(name, []).append(seconds)
+        for step in result.get("step_timings", []):
+            metrics.setdefault("step_llm", []).append(step["llm"])
+            metrics.setdefault("step_tools", []).append(step["tools"])
+            if "llm_queue" in step:
+                metrics.setdefault("step_llm_queue", []).append(step["llm_queue"])
+
+    summary = {}
+    for task_name, metrics in sorted(samples.items()):
+        summary[task_name] = {}
+        for name in sorted(metrics, key=_metric_order):
+            values = np.array(metrics[name])
+            stats = {"n": len(values)}
+            for p in percentiles:
+                stats[f"p{p}"] = float(np.percentile(values, p))
+            summary[task_name][name] = stats
+    return summary
+
+
+def _metric_order(name: str) -> Tuple[int, str]:
+    return (PHASES.index(name) if name in PHASES else len(PHASES), name)
@@ -1,11 +1,33 @@
 from droidrun.tools import AdbTools
-from typing import Optional
+import functools
+import inspect
+from typing import Any, Callable, Optional
 from eval.env.client import AndroidEnvClient
+from eval.loop_detector import LoopDetector
+from eval.timing import StepTimer, timed_tool
 from android_world.env import json_action
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Tools that change the device state, watched by the loop detector.
+ACTION_TOOLS = (
+    "tap_by_index",
+    "swipe",
+    "drag",
+    "input_text",
+    "back",
+    "press_key",
+    "start_app",
+)
+# Tools whose latency counts as device time of the current agent step.
+TIMED_TOOLS = ACTION_TOOLS + (
+    "list_packages",
+    "take_screenshot",
+    "get_state",
+    "complete",
+)
+
 
 class AndroidWorldTools(AdbTools):
     def __init__(self, serial: str, client: Optional[AndroidEnvClient] = None) -> None:
@@ -13,8 +35,59 @@ class AndroidWorldTools(AdbTools):
         super().__init__(serial, use_tcp=True)
         logger.debug("AdbTools initialized")
         self.client = client or AndroidEnvClient()
+        self.step_timer: StepTimer | None = None
+        self.loop_detector: LoopDetector | None = None
+        for name in TIMED_TOOLS:
+            setattr(self, name, timed_tool(getattr(self, name), self._record_tool))
+        for name in ACTION_TOOLS:
+            setattr(self, name, self._watch_action(name, getattr(self, name)))
+        self.get_state = self._watch_state(self.get_state)
         logger.debug(f"AndroidWorldTools initialized with {self.client.base_url}")
 
+    def _record_tool(self, seconds: float):
+        if self.step_timer is not None:
+            self.step_timer.add_tool(seconds)
+
+    def _watch_action(self, name: str, func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                if self.loop_detector is not None:
+                    self.loop_detector.record_action(name, args, kwargs)
+                return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if self.loop_detector is not None:
+                self.loop_detector.record_action(name, args, kwargs)
+            return func(*args, **kwargs)
+
+        return wrapper
+
+    def _watch_state(self, func: Callable[..., Any]) -> Callable[..., Any]:
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                state = await func(*args, **kwargs)
+                if self.loop_detector is not None:
+                    self.loop_detector.observe_state(state)
+                return state
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            state = func(*args, **kwargs)
+            if self.loop_detector is not None:
+                self.loop_detector.observe_state(state)
+            return state
+
+        return wrapper
+
     def complete(self, success: bool, reason: str = "") -> bool:
         """
         Mark the task as finished (copied from AdbTools).
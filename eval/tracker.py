@@ -1,15 +1,17 @@
 import json
 import os
-from typing import Dict, Any, List
+from typing import TYPE_CHECKING, Dict, Any, Iterator, List
 import logging
-from dataclasses import dataclass, field, asdict
+from dataclasses import dataclass, field, asdict, replace
 from datetime import datetime
-from droidrun import DroidAgent
-from droidrun.agent.utils.trajectory import get_trajectory_statistics
 from pathlib import Path
-import requests
 import time
 
+from eval.blobstore import BlobStore, TrajectoryReader, externalize_trajectory
+
+if TYPE_CHECKING:
+    from droidrun import DroidAgent
+
 logger = logging.getLogger("tracker")
 
 """
@@ -56,6 +58,13 @@ class TrajectoryStats:
     failed_executions: int = field(default=0)
 
 
+# How the agent run ended.
+OUTCOME_COMPLETED = "completed"
+OUTCOME_TIMEOUT = "timeout"
+OUTCOME_STUCK = "stuck"
+OUTCOME_ERROR = "error"
+
+
 # legacy result format used in web repr
 @dataclass
 class TaskResult:
@@ -64,6 +73,9 @@ class TaskResult:
     task_idx: int
     task_description: str
     max_steps: int
+    # Seconds the agent was given, and the budget policy that chose both.
+    timeout: int = field(default=0)
+    budget_source: str = field(default="static")
     success: float = field(default=0.0)
     agent_success: bool = field(default=False)
     steps_taken: int = field(default=0)
@@ -73,17 +85,29 @@ class TaskResult:
     logs: List[str] = field(default_factory=list)
     timestamp: str = field(default_factory=lambda: datetime.now().isoformat())
     error: str | None = field(default=None)
+    # "infrastructure" or "agent" when there is an error, see eval.errors.
+    error_kind: str = field(default="")
     trajectory: List[Dict[str, Any]] = field(default_factory=list)
     trajectory_stats: TrajectoryStats = field(default_factory=TrajectoryStats)
     device: str = field(default="")
+    # Run manifest the result belongs to, see eval.manifest.
+    run_id: str = field(default="")
+    # One of the OUTCOME_* values.
+    outcome: str = field(default="")
+    # Seconds per phase, see eval.timing.PHASES.
+    phases: Dict[str, float] = field(default_factory=dict)
+    # LLM and tool seconds of every agent step.
+    step_timings: List[Dict[str, float]] = field(default_factory=list)
 
 
 OUTPUT_DIR = "eval_results"
+# Content-addressed trajectory payloads, shared by all results.
+OBJECTS_DIR = "objects"
 
 
-def get_task_result_path(task_name: str) -> Path:
+def get_task_result_path(task_name: str, task_idx: int) -> Path:
     dname = f"{task_name.replace(' ', '_')}"
-    opath = Path(OUTPUT_DIR, dname)
+    opath = Path(OUTPUT_DIR, dname, str(task_idx))
     opath.mkdir(parents=True, exist_ok=True)
     return opath
 
@@ -102,11 +126,12 @@ def track_task(
 
 def get_task_result(
     task_result: TaskResult,
-    agent: DroidAgent,
+    agent: "DroidAgent",
     score: float = 0.0,
     agent_result: Dict[str, Any] | None = None,
     error: str | None = None,
     device: str = None,
+    outcome: str | None = None,
 ) -> TaskResult:
     task_result.success = score
 
@@ -121,6 +146,8 @@ def get_task_result(
     started_at = datetime.fromisoformat(task_result.timestamp)
     task_result.execution_time = (datetime.now() - started_at).total_seconds()
 
+    from droidrun.agent.utils.trajectory import get_trajectory_statistics
+
     task_result.logs = []
     task_result.trajectory = agent.trajectory.get_trajectory()
     task_result.trajectory_stats = TrajectoryStats(
@@ -129,13 +156,15 @@ def get_task_result(
     task_result.reasoning = agent.reasoning
     if device is not None:
         task_result.device = device
+    if outcome is not None:
+        task_result.outcome = outcome
 
     return task_result
 
 
 def write_task_result(
     task_result: TaskResult,
-):
+) -> bool:
     agent_result_str = json.dumps(
         {
             "success": task_result.agent_success,
@@ -147,20 +176,57 @@ def write_task_result(
         f"Writing task result for {task_result.task_name} {task_result.task_idx} with score {task_result.success}. Agent result: {agent_result_str}"
     )
 
-    dpath = get_task_result_path(task_result.task_name)
+    dpath = get_task_result_path(task_result.task_name, task_result.task_idx)
     fpath = dpath / "result.json"
+    tmp_path = fpath.with_suffix(f".{os.getpid()}.tmp")
+    written = False
     try:
-        with open(fpath, "w") as f:
-            json.dump(asdict(task_result), f, indent=2)
+        start = time.monotonic()
+        trajectory = externalize_trajectory(task_result.trajectory, get_blob_store())
+        data = asdict(replace(task_result, trajectory=[]))
+        data["trajectory"] = trajectory
+        # The write phase is only known once the file is written, so it is not
+        # part of it; the run manifest records it (see `RunManifest.record`).
+        data["phases"].pop("write", None)
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=2)
+        os.replace(tmp_path, fpath)
+        task_result.phases["write"] = time.monotonic() - start
+        written = True
         logger.debug(f"Wrote task {task_result.task_name} result to {fpath}")
     except Exception as e:
         logger.error(f"Error writing task result to {fpath}: {e}")
+        tmp_path.unlink(missing_ok=True)
 
     # write_task_trajectory(
     #     task_result.task_name, task_result.task_idx, task_result.trajectory
     # )
 
     send_discord_task_result(task_result)
+    return written
+
+
+def iter_task_results() -> Iterator[Dict[str, Any]]:
+    """Yields every result written under `OUTPUT_DIR` as a dict."""
+    root = Path(OUTPUT_DIR)
+    # Results live in <task>/<idx>/, older ones directly in <task>/.
+    fpaths = [*root.glob("*/*/result.json"), *root.glob("*/result.json")]
+    for fpath in sorted(fpaths):
+        try:
+            with open(fpath) as f:
+                yield json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading task result {fpath}: {e}")
+
+
+def get_blob_store() -> BlobStore:
+    """Store shared by the trajectories of all results under `OUTPUT_DIR`."""
+    return BlobStore(Path(OUTPUT_DIR, OBJECTS_DIR))
+
+
+def read_trajectory(result: Dict[str, Any]) -> TrajectoryReader:
+    """Trajectory of a written result, with blobs loaded on access."""
+    return TrajectoryReader(result.get("trajectory", []), get_blob_store())
 
 
 def write_task_trajectory(
@@ -168,7 +234,7 @@ def write_task_trajectory(
 ):
     logger.debug(f"Writing task trajectory for {task_name} {task_idx}.")
 
-    dpath = get_task_result_path(task_name)
+    dpath = get_task_result_path(task_name, task_idx)
 
     os.makedirs(dpath, exist_ok=True)
 
@@ -178,7 +244,7 @@ def write_task_trajectory(
 
     trajectory_json_path = os.path.join(trajectory_folder, "trajectory.json")
     with open(trajectory_json_path, "w") as f:
-        json.dump(trajectory, f, indent=2)
+        json.dump(externalize_trajectory(trajectory, get_blob_store()), f, indent=2)
 
     logger.debug(f"Wrote task {task_name} trajectory to {trajectory_json_path}")
 
@@ -208,6 +274,9 @@ def create_task_result_embed(task_result: TaskResult) -> dict:
     elif task_result.error:
         color = 0xE74C3C  # Red for error
         status_emoji = "❌"
+    elif task_result.outcome == OUTCOME_STUCK:
+        color = 0x8E44AD  # Purple for runs stopped by the loop detector
+        status_emoji = "🔁"
     elif task_result.success != 1.0 and task_result.agent_success:
         color = 0xF5B041  # Orange for mismatch - needs manual verification
         status_emoji = "🔍"
@@ -410,6 +479,8 @@ def send_discord_embed(embed: dict):
         logger.error("DISCORD_WEBHOOK_URL is not set")
         return
 
+    import requests
+
     try:
         res = requests.post(
             webhook_url,
@@ -13,6 +13,8 @@ Generate a docker-compose.yaml file for Android World benchmark environment.
 OPTIONS:
     -n, --n <number>    Number of runner instances to generate (default: 1)
                         Must be a positive integer
+    -q, --queue         Share one task queue between the runners instead of
+                        splitting the task indices between them
     -h, --help          Show this help message and exit
     --                  All options after -- will be passed to the droidrun command
 
@@ -21,6 +23,7 @@ EXAMPLES:
     $0 -n 5                               # Generate with 5 runner instances
     $0 --n 10                             # Generate with 10 runner instances
     $0 -n 3 -- --reasoning --debug       # Generate 3 instances with additional droidrun options
+    $0 -n 5 --queue                       # Generate 5 workers and a coordinator
     $0 -- --llm-provider OpenAI --llm-model gpt-4o  # Pass additional LLM options
 
 DESCRIPTION:
@@ -34,12 +37,17 @@ DESCRIPTION:
     - android-world-env-<N>: The Android emulator environment
     - droidrun-benchmark-<N>: The benchmark execution container
 
+    With --queue, a droidrun-coordinator container fills a task queue on the
+    eval_results volume and every droidrun-benchmark-<N> container leases
+    tasks from it, so runners can be added or removed during a run.
+
 EOF
 }
 
 # Parse command line arguments
 n=1  # default value
-additional_droidrun_options="--llm-provider Gemini --llm-model models/gemini-2.5-pro --reasoning --reflection --timeout-multiplier 1000"
+queue=false
+additional_droidrun_options="--llm-provider Gemini --llm-model models/gemini-2.5-pro --reasoning --reflection --timeout-multiplier 1000 --budget-policy history"
 
 while [[ $# -gt 0 ]]; do
   case $1 in
@@ -52,6 +60,10 @@ while [[ $# -gt 0 ]]; do
       fi
       shift 2
       ;;
+    -q|--queue)
+      queue=true
+      shift
+      ;;
     -h|--help)
       show_help
       exit 0
@@ -81,15 +93,40 @@ volumes:
       type: none
       o: bind
       device: ./eval_results
+  droidworld_cache:
 
 services:"""
 
+# print coordinator
+if [ "$queue" = true ]; then
+echo """
+  droidrun-coordinator:
+    image: timoatdroidrun/droidrun-android-world:latest
+    container_name: droidrun-coordinator
+    networks:
+      - benchmark
+    volumes:
+      - eval_results:/opt/shared/eval_results
+      - droidworld_cache:/opt/shared/cache
+    environment:
+      - DROIDWORLD_CACHE_DIR=/opt/shared/cache
+    command: coordinator --env-url http://android-world-env-1:5000 --task-family $SUITE_FAMILY
+    depends_on:
+      android-world-env-1:
+        condition: service_healthy"""
+fi
+
 # print emulators
 android_env_list=() 
 for i in $(seq 1 $n); do
 	android_env_list+=("android-world-env-$i:5555")
   env_min_task_idx=$(( (i - 1) * SIUTE_MAX_TASK_IDX / n ))
   env_max_task_idx=$(( i * SIUTE_MAX_TASK_IDX / n ))
+  if [ "$queue" = true ]; then
+    runner_command="worker --env-url http://android-world-env-$i:5000 --env-serial android-world-env-$i:5555"
+  else
+    runner_command="run --env-url http://android-world-env-$i:5000 --env-serial android-world-env-$i:5555 --min-task-idx $env_min_task_idx --max-task-idx $env_max_task_idx"
+  fi
 
 echo """
   android-world-env-$i:
@@ -111,9 +148,12 @@ echo """
       - benchmark
     volumes:
       - eval_results:/opt/shared/eval_results
+      - droidworld_cache:/opt/shared/cache
+    environment:
+      - DROIDWORLD_CACHE_DIR=/opt/shared/cache
     env_file:
       - .env
-    command: run --env-url http://android-world-env-$i:5000 --env-serial android-world-env-$i:5555 --min-task-idx $env_min_task_idx --max-task-idx $env_max_task_idx $additional_droidrun_options
+    command: $runner_command $additional_droidrun_options
     depends_on:
       android-world-env-$i:
         condition: service_healthy"""
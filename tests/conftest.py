@@ -0,0 +1,40 @@
+import pytest
+
+
+@pytest.fixture
+def standin():
+    """Stand-in environment server, see `eval.env.standin`.
+
+    Counts the connections it accepted in `server.connections`.
+    """
+    pytest.importorskip("numpy")
+    from eval.env.standin import serve
+
+    server = serve(port=0)
+    server.connections = 0
+    process_request = server.process_request
+
+    def counting(request, client_address):
+        server.connections += 1
+        process_request(request, client_address)
+
+    server.process_request = counting
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def standin_url(standin) -> str:
+    host, port = standin.server_address
+    return f"http://{host}:{port}"
+
+
+@pytest.fixture(autouse=True)
+def cache_dir(tmp_path, monkeypatch):
+    """Keeps the droidworld cache of every test in its own directory."""
+    from eval.cache import CACHE_DIR_ENV
+
+    path = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_ENV, str(path))
+    return path
@@ -0,0 +1,106 @@
+import hashlib
+import sys
+import threading
+import types
+from contextlib import contextmanager
+
+import pytest
+
+from eval.env.boot import install_portal
+from eval.portal.apk_cache import PORTAL_VERSION_ENV, PortalApkCache
+
+APK = b"portal apk"
+APK_SHA256 = hashlib.sha256(APK).hexdigest()
+
+
+@pytest.fixture
+def downloads(tmp_path, monkeypatch):
+    """Fakes droidrun's portal download and counts the downloads."""
+    counter = {"downloads": 0}
+
+    @contextmanager
+    def download_portal_apk():
+        counter["downloads"] += 1
+        path = tmp_path / "download.apk"
+        path.write_bytes(APK)
+        yield str(path)
+
+    portal = types.SimpleNamespace(
+        download_portal_apk=download_portal_apk,
+        enable_portal_accessibility=lambda device, service_name: None,
+        A11Y_SERVICE_NAME="com.droidrun.portal/.DroidrunAccessibilityService",
+    )
+    monkeypatch.setitem(sys.modules, "droidrun", types.SimpleNamespace(portal=portal))
+    monkeypatch.setitem(sys.modules, "droidrun.portal", portal)
+    return counter
+
+
+def test_fetch_downloads_once(tmp_path, downloads):
+    sha256, path = PortalApkCache(tmp_path / "apk").fetch("v1")
+    again = PortalApkCache(tmp_path / "apk").fetch("v1")
+
+    assert sha256 == APK_SHA256
+    assert path.read_bytes() == APK
+    assert again == (sha256, path)
+    assert downloads["downloads"] == 1
+
+
+def test_versions_share_objects(tmp_path, downloads):
+    cache = PortalApkCache(tmp_path / "apk")
+
+    assert cache.fetch("v1") == cache.fetch("v2")
+    assert len(list((tmp_path / "apk" / "objects").iterdir())) == 1
+
+
+def test_concurrent_fetches_share_one_download(tmp_path, downloads):
+    results = []
+
+    def fetch():
+        results.append(PortalApkCache(tmp_path / "apk").fetch("v1"))
+
+    threads = [threading.Thread(target=fetch) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(results)) == 1
+    assert downloads["downloads"] == 1
+
+
+def test_missing_object_is_downloaded_again(tmp_path, downloads):
+    cache = PortalApkCache(tmp_path / "apk")
+    _, path = cache.fetch("v1")
+    path.unlink()
+
+    assert cache.lookup("v1") is None
+    assert cache.fetch("v1")[1].exists()
+    assert downloads["downloads"] == 2
+
+
+class FakeDevice:
+    def __init__(self, installed_sha256: str | None):
+        self.installed_sha256 = installed_sha256
+        self.installs = []
+
+    def shell(self, command: str) -> str:
+        if self.installed_sha256 is None:
+            return ""
+        return f"{self.installed_sha256}  /data/app/base.apk\n"
+
+    def install(self, path, **kwargs):
+        self.installs.append(path)
+
+
+@pytest.mark.parametrize(
+    "installed, installs", [(APK_SHA256, 0), ("other", 1), (None, 1)]
+)
+def test_install_portal_skips_the_installed_apk(
+    tmp_path, monkeypatch, downloads, installed, installs
+):
+    monkeypatch.setenv(PORTAL_VERSION_ENV, "v1")
+    device = FakeDevice(installed)
+
+    install_portal(device, PortalApkCache(tmp_path / "apk"))
+
+    assert len(device.installs) == installs
@@ -0,0 +1,60 @@
+from eval.blobstore import (
+    BLOB_KEY,
+    BlobStore,
+    TrajectoryReader,
+    externalize_trajectory,
+    is_blob_ref,
+)
+
+SCREENSHOT = b"\x89PNG" + bytes(range(256)) * 8
+TREE = [{"index": i, "text": f"Item {i}"} for i in range(100)]
+
+
+def objects(store):
+    return [path for path in store.root.rglob("*") if path.is_file()]
+
+
+def test_identical_content_is_stored_once(tmp_path):
+    store = BlobStore(tmp_path)
+
+    digest = store.put(SCREENSHOT)
+
+    assert store.put(SCREENSHOT) == digest
+    assert digest in store
+    assert store.get(digest) == SCREENSHOT
+    assert len(objects(store)) == 1
+
+
+def test_trajectory_round_trip(tmp_path):
+    store = BlobStore(tmp_path)
+    trajectory = [
+        {"step": i, "action": "tap", "screenshot": SCREENSHOT, "ui_state": TREE}
+        for i in range(3)
+    ]
+
+    steps = externalize_trajectory(trajectory, store)
+
+    assert steps[0]["step"] == 0 and steps[0]["action"] == "tap"
+    assert is_blob_ref(steps[0]["screenshot"]) and is_blob_ref(steps[0]["ui_state"])
+    assert len(objects(store)) == 2
+    assert list(TrajectoryReader(steps, store)) == trajectory
+
+
+def test_small_fields_stay_inline(tmp_path):
+    store = BlobStore(tmp_path)
+
+    steps = externalize_trajectory([{"ui_state": TREE[:2]}], store)
+
+    assert steps[0]["ui_state"] == TREE[:2]
+    assert not objects(store)
+
+
+def test_nested_bytes_are_externalized(tmp_path):
+    store = BlobStore(tmp_path)
+    step = {"observation": {"screenshot": b"png", "packages": ["a", "b"]}}
+
+    steps = externalize_trajectory([step], store)
+    reader = TrajectoryReader(steps, store)
+
+    assert BLOB_KEY in steps[0]["observation"]["screenshot"]
+    assert reader.field(0, "observation") == step["observation"]
@@ -0,0 +1,112 @@
+import itertools
+import sys
+import threading
+import types
+
+import pytest
+
+from eval.env import boot
+from eval.env.boot import (
+    BootCancelled,
+    BootStateCache,
+    DeviceFingerprint,
+    backoff_delays,
+    check_cancelled,
+)
+
+
+class FakeEnv:
+    base_url = "http://env-1:5000"
+
+    def __init__(self):
+        self.healthy = True
+
+    def health(self) -> bool:
+        return self.healthy
+
+
+@pytest.fixture
+def device(monkeypatch):
+    """Fakes adb and the full boot check, and records the full boots."""
+    state = types.SimpleNamespace(
+        fingerprint=DeviceFingerprint("boot-1", "0.4.1", "portal"), boots=[]
+    )
+
+    def boot_environment(env, serial, cancelled=None):
+        state.boots.append(serial)
+        return serial
+
+    adb = types.SimpleNamespace(device=lambda serial: serial)
+    monkeypatch.setitem(sys.modules, "adbutils", types.SimpleNamespace(adb=adb))
+    monkeypatch.setattr(boot, "boot_environment", boot_environment)
+    monkeypatch.setattr(boot, "get_device_fingerprint", lambda d: state.fingerprint)
+    return state
+
+
+def test_verified_device_skips_the_full_boot(device):
+    cache, env = BootStateCache(ttl=60), FakeEnv()
+
+    cache.ensure_booted(env, "emulator-5554")
+    cache.ensure_booted(env, "emulator-5554")
+
+    assert device.boots == ["emulator-5554"]
+
+
+def test_changed_device_is_verified_again(device):
+    cache, env = BootStateCache(ttl=60), FakeEnv()
+    cache.ensure_booted(env, "emulator-5554")
+
+    device.fingerprint = DeviceFingerprint("boot-2", "0.4.1", "portal")
+    cache.ensure_booted(env, "emulator-5554")
+
+    assert len(device.boots) == 2
+
+
+def test_unhealthy_expired_or_invalidated_state_is_verified_again(device):
+    env = FakeEnv()
+    cache = BootStateCache(ttl=60)
+    cache.ensure_booted(env, "emulator-5554")
+
+    env.healthy = False
+    cache.ensure_booted(env, "emulator-5554")
+    env.healthy = True
+    cache.invalidate(env, "emulator-5554")
+    cache.ensure_booted(env, "emulator-5554")
+    expired = BootStateCache(ttl=0)
+    expired.ensure_booted(env, "emulator-5554")
+    expired.ensure_booted(env, "emulator-5554")
+
+    assert len(device.boots) == 5
+
+
+def test_fast_checks_renew_the_verification(device, monkeypatch):
+    clock = types.SimpleNamespace(now=0.0)
+    fake_time = types.SimpleNamespace(monotonic=lambda: clock.now)
+    monkeypatch.setattr(boot, "time", fake_time)
+    cache, env = BootStateCache(ttl=120), FakeEnv()
+
+    # Tasks that take longer than the TTL, one after the other.
+    for clock.now in (0.0, 100.0, 200.0, 300.0):
+        cache.ensure_booted(env, "emulator-5554")
+    assert device.boots == ["emulator-5554"]
+
+    # An idle device is verified again.
+    clock.now = 500.0
+    cache.ensure_booted(env, "emulator-5554")
+    assert len(device.boots) == 2
+
+
+def test_backoff_delays():
+    delays = list(itertools.islice(backoff_delays(1, 4, 2), 5))
+
+    assert delays == [1, 2, 4, 4, 4]
+
+
+def test_check_cancelled():
+    cancelled = threading.Event()
+    check_cancelled(None)
+    check_cancelled(cancelled)
+
+    cancelled.set()
+    with pytest.raises(BootCancelled):
+        check_cancelled(cancelled)
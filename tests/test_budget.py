@@ -0,0 +1,51 @@
+import pytest
+
+from eval.budget import HISTORY, STATIC, HistoryBudgetPolicy, StaticBudgetPolicy
+
+STATIC_POLICY = StaticBudgetPolicy(max_steps_multiplier=10, timeout_multiplier=60)
+
+
+def run(task_name="ContactsAddContact", steps=8, seconds=40.0, **kwargs):
+    result = {
+        "task_name": task_name,
+        "success": 1.0,
+        "error": None,
+        "steps_taken": steps,
+        "execution_time": seconds + 20,
+        "phases": {"agent_run": seconds},
+    }
+    return {**result, **kwargs}
+
+
+def test_static_budget_scales_with_complexity():
+    budget = STATIC_POLICY.budget("ContactsAddContact", 1.5)
+
+    assert (budget.max_steps, budget.timeout) == (15, 90)
+    assert budget.source == STATIC
+
+
+def test_history_budget_from_successful_runs():
+    pytest.importorskip("numpy")
+    results = [run(steps=8, seconds=40.0)] * 4
+    policy = HistoryBudgetPolicy(results, STATIC_POLICY, percentile=95, margin=0.25)
+
+    budget = policy.budget("ContactsAddContact", 1.5)
+
+    assert (budget.max_steps, budget.timeout) == (10, 50)
+    assert (budget.source, budget.samples) == (HISTORY, 4)
+
+
+def test_failed_runs_are_not_learned_from():
+    results = [run(), run(), run(success=0.0), run(error="device offline")]
+    policy = HistoryBudgetPolicy(results, STATIC_POLICY, min_samples=3)
+
+    assert policy.budget("ContactsAddContact", 1.5).source == STATIC
+    assert policy.budget("ExpenseAddSingle", 1.5).source == STATIC
+
+
+def test_execution_time_is_used_without_phases():
+    pytest.importorskip("numpy")
+    results = [run(seconds=40.0, phases={})] * 3
+    policy = HistoryBudgetPolicy(results, STATIC_POLICY, margin=0)
+
+    assert policy.budget("ContactsAddContact", 1.5).timeout == 60
@@ -0,0 +1,43 @@
+import pytest
+
+pytest.importorskip("llama_index")
+
+from llama_index.core.base.llms.types import ChatMessage
+from llama_index.core.llms.mock import MockLLM
+
+from eval.llm.cache import RECORD, REPLAY, LLMCacheMiss, LLMCacheStore
+from eval.llm.caching import CachingLLM
+
+MESSAGES = [ChatMessage(role="user", content="Open the contacts app")]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = LLMCacheStore(tmp_path / "llm.sqlite")
+    yield store
+    store.close()
+
+
+def test_record_answers_repeated_requests_from_the_cache(store):
+    llm = CachingLLM(MockLLM(), store, mode=RECORD)
+
+    first = llm.chat(MESSAGES)
+    again = llm.chat(MESSAGES)
+
+    assert again.message.content == first.message.content
+    assert (llm.hits, llm.misses) == (1, 1)
+    assert len(store) == 1
+
+
+def test_replay_uses_the_recording(store):
+    CachingLLM(MockLLM(), store, mode=RECORD).chat(MESSAGES)
+    llm = CachingLLM(MockLLM(), store, mode=REPLAY)
+
+    assert llm.chat(MESSAGES).message.content
+    with pytest.raises(LLMCacheMiss):
+        llm.chat([ChatMessage(role="user", content="Something else")])
+
+
+def test_unknown_mode_is_rejected(store):
+    with pytest.raises(ValueError):
+        CachingLLM(MockLLM(), store, mode="off")
@@ -0,0 +1,128 @@
+import asyncio
+from collections import Counter
+
+from eval.env.catalog import SuiteCatalog, TaskInstanceInfo
+
+SUITE = {"ContactsAddContact": 2, "SimpleSmsReply": 1, "MarkorCreateNote": 0}
+
+
+class FakeEnv:
+    """Serves `SUITE` and counts the requests per method."""
+
+    def __init__(self, fingerprint: str = "f1"):
+        self.fingerprint = fingerprint
+        self.calls = Counter()
+
+    async def get_suite_fingerprint(self) -> str:
+        self.calls["fingerprint"] += 1
+        return self.fingerprint
+
+    async def get_suite_task_list(self):
+        self.calls["task_list"] += 1
+        return list(SUITE)
+
+    async def get_suite_task_length(self, name: str) -> int:
+        self.calls["length"] += 1
+        return SUITE[name]
+
+    async def get_task_goal(self, name: str, idx: int) -> str:
+        self.calls["goal"] += 1
+        return f"{name} goal {idx}"
+
+    async def get_task_complexity(self, name: str, idx: int) -> float:
+        return 1.0 + idx
+
+    async def get_task_template(self, name: str, idx: int) -> str:
+        return f"{name} template"
+
+
+def load(env: FakeEnv, **kwargs) -> SuiteCatalog:
+    return asyncio.run(SuiteCatalog.load(env, "android_world", 42, 1, **kwargs))
+
+
+def test_load_fetches_every_instance():
+    catalog = load(FakeEnv())
+
+    assert catalog.task_list == list(SUITE)
+    assert {name: catalog.length(name) for name in SUITE} == SUITE
+    assert catalog.instance("ContactsAddContact", 1) == TaskInstanceInfo(
+        "ContactsAddContact goal 1", 2.0, "ContactsAddContact template"
+    )
+    assert catalog.task_id("SimpleSmsReply") == 1
+    assert catalog.select(1) == ["SimpleSmsReply", "MarkorCreateNote"]
+    assert catalog.select(0, 1) == ["ContactsAddContact"]
+
+
+def test_cache_is_reused_while_the_fingerprint_matches():
+    first = load(FakeEnv())
+    env = FakeEnv()
+
+    assert load(env) == first
+    assert env.calls == {"fingerprint": 1}
+
+
+def test_cache_is_refetched_when_the_suite_changes():
+    load(FakeEnv())
+    env = FakeEnv(fingerprint="f2")
+
+    catalog = load(env)
+
+    assert catalog.fingerprint == "f2"
+    assert env.calls["goal"] == 3
+    assert SuiteCatalog.from_cache("android_world", 42, 1).fingerprint == "f2"
+
+
+def test_refresh_ignores_the_cache():
+    load(FakeEnv())
+    env = FakeEnv()
+
+    load(env, refresh=True)
+
+    assert env.calls["goal"] == 3
+
+
+def test_selected_tasks_skip_the_cache():
+    env = FakeEnv()
+
+    catalog = load(env, tasks=["SimpleSmsReply"])
+
+    assert list(catalog.instances) == ["SimpleSmsReply"]
+    assert env.calls == {"task_list": 1, "length": 1, "goal": 1}
+    assert SuiteCatalog.from_cache("android_world", 42, 1) is None
+
+
+def test_unreadable_cache_is_ignored():
+    SuiteCatalog.cache_path("android_world", 42, 1).write_text("{")
+
+    assert SuiteCatalog.from_cache("android_world", 42, 1) is None
+    assert load(FakeEnv()).length("ContactsAddContact") == 2
+
+
+def test_fallback_fingerprint_follows_the_suite(standin_url):
+    from eval.env.client import AsyncAndroidEnvClient
+
+    requests = []
+
+    async def fingerprints():
+        async with AsyncAndroidEnvClient(standin_url) as env:
+            # As for servers without a fingerprint endpoint.
+            env._has_suite_fingerprint = False
+            await env.reinitialize_suite(1, 42, "android_world")
+            request = env._request
+
+            async def counting(method, path, **kwargs):
+                requests.append(path)
+                return await request(method, path, **kwargs)
+
+            env._request = counting
+            first = await env.get_suite_fingerprint()
+            same = await env.get_suite_fingerprint()
+            await env.reinitialize_suite(2, 42, "android_world")
+            return first, same, await env.get_suite_fingerprint()
+
+    first, same, changed = asyncio.run(fingerprints())
+
+    assert first == same
+    assert changed != first
+    assert requests.count("/suite/task_list") == 3
+    assert len(requests) == 4
@@ -0,0 +1,66 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from eval.env.client import AndroidEnvClient, AsyncAndroidEnvClient
+
+
+def test_sync_calls_reuse_one_connection(standin, standin_url):
+    env = AndroidEnvClient(standin_url)
+    try:
+        assert env.health()
+        assert env.reset(go_home=True).status == "success"
+        task_list = env.get_suite_task_list()
+        assert env.get_suite_task_length(task_list[0]) == 1
+        assert env.get_task_goal(task_list[0], 0) == f"Goal for {task_list[0]} #0"
+    finally:
+        env.disconnect()
+
+    assert standin.connections == 1
+
+
+def test_aio_shares_the_pool_of_the_sync_client(standin, standin_url):
+    env = AndroidEnvClient(standin_url)
+
+    async def main():
+        # Runs on a loop of its own, not on the client's loop thread.
+        return await asyncio.gather(*(env.aio.health() for _ in range(4)))
+
+    try:
+        assert env.health()
+        assert asyncio.run(main()) == [True] * 4
+        assert env.health()
+    finally:
+        env.disconnect()
+
+    assert 1 <= standin.connections <= 4
+
+
+def test_concurrent_calls_stay_within_the_pool(standin, standin_url):
+    env = AndroidEnvClient(standin_url, pool_size=2)
+    try:
+        with ThreadPoolExecutor(8) as executor:
+            results = list(executor.map(lambda _: env.health(), range(32)))
+    finally:
+        env.disconnect()
+
+    assert all(results)
+    assert standin.connections <= 2
+
+
+def test_async_client_closes_its_pool(standin_url):
+    async def main():
+        async with AsyncAndroidEnvClient(standin_url) as env:
+            assert await env.health()
+            assert (await env.initialize_task("SimpleSmsReply", 0)).status == "success"
+        return env
+
+    env = asyncio.run(main())
+
+    assert env._http.is_closed
+
+
+def test_unknown_screenshot_encoding_is_rejected():
+    with pytest.raises(ValueError):
+        AsyncAndroidEnvClient(screenshot_encoding="bmp")
@@ -0,0 +1,123 @@
+import asyncio
+
+import pytest
+
+from eval.coordinator import DONE, FAILED, LEASED, PENDING, LeaseQueue, LeaseWorker
+from eval.pipeline import WorkItem
+from eval.tracker import track_task
+
+
+def items(n):
+    return [WorkItem(0, "ContactsAddContact", i) for i in range(n)]
+
+
+@pytest.fixture
+def queue(tmp_path):
+    queue = LeaseQueue(tmp_path / "queue.sqlite")
+    queue.create(items(3), {"task_family": "android_world", "max_attempts": 2})
+    return queue
+
+
+def test_instances_are_leased_once_in_order(queue):
+    leased = [queue.lease(worker, 60) for worker in ("w1", "w2", "w1")]
+
+    assert leased == items(3)
+    assert queue.lease("w2", 60) is None
+    assert queue.workers() == {"w1": 2, "w2": 1}
+    assert queue.meta()["task_family"] == "android_world"
+
+
+def test_expired_lease_goes_to_another_worker(queue):
+    item = queue.lease("w1", -1)
+
+    assert queue.lease("w2", 60) == item
+    queue.heartbeat("w1", [item], 60)
+    assert queue.workers() == {"w2": 1}
+
+
+def test_heartbeat_keeps_the_lease(queue):
+    item = queue.lease("w1", -1)
+    queue.heartbeat("w1", [item], 60)
+
+    assert queue.lease("w2", 60) == items(3)[1]
+
+
+def test_released_instance_is_retried_until_out_of_attempts(queue):
+    item = queue.lease("w1", 60)
+
+    assert queue.release("w1", item, "device offline")
+    assert queue.lease("w2", 60) == item
+    assert not queue.release("w2", item, "device offline")
+    assert queue.counts()[FAILED] == 1
+
+
+def test_dead_worker_instances_fail_after_max_attempts(queue):
+    item = queue.lease("w1", -1)
+    assert queue.lease("w2", -1) == item
+
+    assert queue.lease("w3", 60) != item
+    assert queue.counts()[FAILED] == 1
+
+
+def test_create_keeps_state_unless_reset(queue):
+    queue.complete("w1", queue.lease("w1", 60), 1.0)
+
+    assert queue.create(items(4), {}) == 1
+    assert queue.counts() == {PENDING: 3, LEASED: 0, DONE: 1, FAILED: 0}
+    assert queue.create(items(4), {}, reset=True) == 4
+    assert queue.counts()[PENDING] == 4
+
+
+def test_worker_completes_written_results(queue):
+    worker = LeaseWorker(queue, "w1", lease_seconds=60)
+
+    async def lease_all():
+        return [item async for item in worker.items()]
+
+    leased = asyncio.run(lease_all())
+    ok, broken, skipped = leased
+    worker.record(track_task(0, ok.task_name, ok.task_idx, "", 1))
+    assert asyncio.run(worker.on_finished(broken, None, 1.0, "device offline"))
+    asyncio.run(worker.on_finished(skipped, None, 1.0, None))
+    # The error row of the released instance does not complete it.
+    worker.record(track_task(0, broken.task_name, broken.task_idx, "", 1))
+
+    assert worker.completed == 1
+    assert queue.counts() == {PENDING: 1, LEASED: 0, DONE: 1, FAILED: 1}
+    assert not queue.finished()
+
+
+def test_released_instance_goes_to_another_worker_first(queue):
+    item = queue.lease("w1", 60)
+    queue.release("w1", item, "device offline")
+
+    assert queue.lease("w1", 60) == items(3)[1]
+    assert queue.lease("w2", 60) == item
+
+
+def test_only_the_lease_holder_completes(queue):
+    item = queue.lease("w1", -1)
+    assert queue.lease("w2", 60) == item
+
+    queue.complete("w1", item, 1.0)
+
+    assert queue.counts()[DONE] == 0
+
+
+def test_failing_worker_is_quarantined(queue):
+    failing = LeaseWorker(queue, "w1", max_consecutive_failures=2)
+    healthy = LeaseWorker(queue, "w2")
+
+    async def run(worker, error):
+        async for item in worker.items():
+            if error is not None:
+                await worker.on_finished(item, None, 1.0, error)
+            else:
+                worker.record(track_task(0, item.task_name, item.task_idx, "", 1))
+
+    asyncio.run(run(failing, "device offline"))
+    asyncio.run(run(healthy, None))
+
+    assert failing.health.quarantined and failing.health.failures == 2
+    assert healthy.completed == 3
+    assert queue.counts()[DONE] == 3
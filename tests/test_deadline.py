@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from eval.deadline import (
+    MOST_INSTANCES,
+    STRATIFIED,
+    TimeBudget,
+    parse_time_budget,
+    plan_time_budget,
+)
+from eval.pipeline import WorkItem
+
+NOW = datetime(2025, 1, 30, 22, 15)
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        ("5400", 5400),
+        ("90m", 5400),
+        ("1h30m", 5400),
+        ("1.5h", 5400),
+        ("45s", 45),
+        ("23:00", 45 * 60),
+        ("06:00", 7 * 3600 + 45 * 60),
+        ("2025-01-31T06:00", 7 * 3600 + 45 * 60),
+    ],
+)
+def test_parse_time_budget(value, seconds):
+    assert parse_time_budget(value, now=NOW) == seconds
+
+
+@pytest.mark.parametrize("value", ["", "soon", "2025-01-30T06:00"])
+def test_invalid_time_budget(value):
+    with pytest.raises(ValueError):
+        parse_time_budget(value, now=NOW)
+
+
+def instances(task_name, *estimates):
+    return {WorkItem(0, task_name, i): seconds for i, seconds in enumerate(estimates)}
+
+
+def test_most_instances_admits_the_shortest():
+    estimates = {**instances("Long", 300, 300), **instances("Short", 60, 60, 60)}
+
+    plan = plan_time_budget(estimates, estimates, 400, n_devices=2)
+
+    assert [item.task_name for item in plan.selected] == ["Short"] * 3 + ["Long"]
+    assert plan.makespan == 300
+    assert set(plan.skipped) == {WorkItem(0, "Long", 1)}
+
+
+def test_stratified_covers_every_task_type():
+    estimates = {**instances("Long", 300), **instances("Short", 50, 50, 50, 50)}
+
+    most = plan_time_budget(estimates, estimates, 350, 1, MOST_INSTANCES)
+    stratified = plan_time_budget(estimates, estimates, 350, 1, STRATIFIED)
+
+    assert {item.task_name for item in most.selected} == {"Short"}
+    assert {item.task_name for item in stratified.selected} == {"Short", "Long"}
+
+
+def test_instances_longer_than_the_budget_are_skipped():
+    estimates = instances("Long", 500)
+
+    plan = plan_time_budget(estimates, estimates, 400, n_devices=4)
+
+    assert not plan.selected
+    assert "longer than the 400s budget" in plan.skipped[WorkItem(0, "Long", 0)]
+
+
+def test_instances_that_would_run_past_the_deadline_are_skipped():
+    estimates = instances("ContactsAddContact", 10, 1000)
+    budget = TimeBudget(60, estimates)
+    short, long = estimates
+
+    assert budget.skip_reason(short) is None
+    assert "left before the deadline" in budget.skip_reason(long)
+    assert TimeBudget(0).skip_reason(long) == "deadline passed"
@@ -0,0 +1,89 @@
+import pytest
+
+pytest.importorskip("numpy")
+pytest.importorskip("android_world")
+
+from eval.env.client import parse_element
+from eval.env.elements import ElementTree
+from eval.env.standin import synthetic_elements
+
+
+@pytest.fixture
+def raw_elements():
+    elements = synthetic_elements(12)
+    elements[1]["is_checked"] = True
+    elements[2]["bbox_pixels"] = None
+    elements[3]["metadata"] = {"source": "a11y"}
+    return elements
+
+
+def test_elements_match_the_parsed_elements(raw_elements):
+    tree = ElementTree(raw_elements)
+
+    assert len(tree) == len(raw_elements)
+    assert tree.to_list() == [parse_element(el) for el in raw_elements]
+    assert tree[-1] == parse_element(raw_elements[-1])
+
+
+def test_elements_are_materialized_once_and_on_demand(raw_elements):
+    tree = ElementTree(raw_elements)
+
+    first = tree[5]
+
+    assert tree[5] is first
+    assert list(tree._elements) == [5]
+
+
+def test_out_of_range(raw_elements):
+    with pytest.raises(IndexError):
+        ElementTree(raw_elements)[len(raw_elements)]
+
+
+def test_clickable_at(raw_elements):
+    tree = ElementTree(raw_elements)
+
+    # Items are 48 px rows; every third one is clickable.
+    assert [el.text for el in tree.clickable_at(10, 3 * 48 + 1)] == ["Item 3"]
+    assert tree.clickable_at(10, 48 + 1) == []
+
+
+def test_unset_flags_and_boxes(raw_elements):
+    tree = ElementTree(raw_elements)
+
+    assert tree[1].is_checked is True
+    assert tree[0].is_checked is None
+    assert tree[2].bbox_pixels is None
+    assert not tree.contains_point(10, 2 * 48 + 1)[2]
+    assert tree[3].metadata == {"source": "a11y"}
+
+
+def test_views_share_arrays_but_not_elements(raw_elements):
+    tree = ElementTree(raw_elements)
+    tree[3].metadata["source"] = "changed"
+    tree[0].bbox_pixels.x_min = -1
+
+    view = tree.view()
+
+    assert view.boxes is tree.boxes and view[3] is not tree[3]
+    assert view[3].metadata == {"source": "a11y"}
+    assert view[0] == parse_element(raw_elements[0])
+    with pytest.raises(ValueError):
+        tree.flags[0, 0] = 1
+
+
+def test_changed_elements_do_not_change_the_cache(standin_url):
+    from eval.env.client import AndroidEnvClient
+
+    env = AndroidEnvClient(standin_url)
+    try:
+        first = env.get_elements()
+        first[0].text = "changed"
+        first.pop()
+        tree = env.get_element_tree()
+        tree[0].text = "changed"
+
+        assert env.get_elements() == env.get_element_tree().to_list()
+        assert env.get_elements()[0].text != "changed"
+        assert len(env.get_elements()) == len(first) + 1
+    finally:
+        env.disconnect()
@@ -0,0 +1,72 @@
+import sys
+import types
+
+import httpx
+import pytest
+
+from eval.errors import AGENT, INFRASTRUCTURE, classify_error
+
+
+def status_error(status_code: int) -> httpx.HTTPStatusError:
+    request = httpx.Request("POST", "http://localhost:5000/task/initialize")
+    response = httpx.Response(status_code, request=request)
+    return httpx.HTTPStatusError(str(status_code), request=request, response=response)
+
+
+def wrapped(cause: Exception) -> Exception:
+    """`cause` re-raised the way the runner reports task errors."""
+    try:
+        try:
+            raise cause
+        except Exception as e:
+            raise RuntimeError(f"Error initializing task: {e}") from e
+    except RuntimeError as e:
+        return e
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ConnectionResetError("connection reset by peer"),
+        httpx.ConnectError("connection refused"),
+        httpx.ReadTimeout("timed out"),
+        status_error(503),
+        RuntimeError("device emulator-5554 offline"),
+        wrapped(status_error(500)),
+        wrapped(httpx.RemoteProtocolError("server disconnected")),
+    ],
+)
+def test_infrastructure_errors(error):
+    assert classify_error(error) == INFRASTRUCTURE
+
+
+@pytest.mark.parametrize(
+    "error",
+    [
+        ValueError("invalid action index 12"),
+        status_error(404),
+        wrapped(status_error(422)),
+        RuntimeError("Agent did not finish within 20 steps"),
+    ],
+)
+def test_agent_errors(error):
+    assert classify_error(error) == AGENT
+
+
+def test_no_error():
+    assert classify_error(None) is None
+
+
+@pytest.mark.parametrize("module", ["adbutils", "async_adbutils"])
+def test_adb_errors_are_infrastructure(monkeypatch, module):
+    AdbError = type("AdbError", (Exception,), {})
+    monkeypatch.setitem(sys.modules, module, types.SimpleNamespace(AdbError=AdbError))
+
+    assert classify_error(wrapped(AdbError("closed"))) == INFRASTRUCTURE
+
+
+def test_cyclic_cause_chain_terminates():
+    first, second = ValueError("a"), ValueError("b")
+    first.__context__, second.__context__ = second, first
+
+    assert classify_error(first) == AGENT
@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+import types
+
+import pytest
+
+from eval.env.fleet import FleetBoot, run_detached, wait_ready_async
+
+
+class FakeEnv:
+    def __init__(self, name: str, healthy: bool = True):
+        self.base_url = f"http://{name}:5000"
+
+        async def health() -> bool:
+            return healthy
+
+        self.aio = types.SimpleNamespace(health=health)
+
+
+class FakeBootCache:
+    """Boots each serial in `seconds[serial]`, or fails it if that is None."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.cancelled_boots = []
+
+    def ensure_booted(self, env, serial, cancelled=None):
+        if self.seconds[serial] is None:
+            raise RuntimeError(f"Device {serial} is not connected")
+        if cancelled.wait(self.seconds[serial]):
+            self.cancelled_boots.append(serial)
+
+
+def fleet(seconds, **kwargs) -> FleetBoot:
+    targets = [(FakeEnv(serial), serial) for serial in seconds]
+    return FleetBoot(targets, boot_cache=FakeBootCache(seconds), **kwargs)
+
+
+def test_quorum_then_stragglers_as_they_become_ready():
+    async def main():
+        boot = fleet({"slow": 0.3, "fast": 0.01, "broken": None, "medium": 0.1})
+        boot.start()
+        quorum = [report.serial for report in await boot.wait_for_quorum(1)]
+        late = [report.serial async for report in boot.as_ready()]
+        return boot, quorum, late
+
+    boot, quorum, late = asyncio.run(main())
+
+    assert quorum == ["fast"]
+    assert late == ["medium", "slow"]
+    broken = boot.reports[2]
+    assert not broken.ready and "not connected" in broken.error
+    assert boot.target(boot.reports[1])[1] == "fast"
+    assert all(r.time_to_ready > 0 for r in boot.ready)
+
+
+def test_prepare_runs_once_a_device_is_verified():
+    prepared = []
+
+    async def prepare(env, serial):
+        prepared.append(serial)
+
+    async def main():
+        boot = fleet({"a": 0.0, "b": None}, prepare=prepare).start()
+        return await boot.wait_for_quorum(2)
+
+    assert [r.serial for r in asyncio.run(main())] == ["a"]
+    assert prepared == ["a"]
+
+
+def test_cancel_stops_the_stragglers():
+    boot_cache = FakeBootCache({"fast": 0.0, "stuck": 30})
+
+    async def main():
+        targets = [(FakeEnv(serial), serial) for serial in boot_cache.seconds]
+        boot = FleetBoot(targets, boot_cache=boot_cache).start()
+        await boot.wait_for_quorum(1)
+        boot.cancel()
+        return boot
+
+    start = time.monotonic()
+    boot = asyncio.run(main())
+
+    assert time.monotonic() - start < 5
+    assert not boot.reports[1].ready
+    # The boot thread sees the cancellation at its next step.
+    for _ in range(100):
+        if boot_cache.cancelled_boots:
+            break
+        time.sleep(0.01)
+    assert boot_cache.cancelled_boots == ["stuck"]
+
+
+def test_run_detached():
+    def fail():
+        raise ValueError("boom")
+
+    async def main():
+        result = await run_detached(lambda a, b: a + b, 1, 2)
+        with pytest.raises(ValueError):
+            await run_detached(fail)
+        return result
+
+    assert asyncio.run(main()) == 3
+
+
+def test_run_detached_does_not_hold_up_loop_shutdown():
+    release = threading.Event()
+
+    async def main():
+        task = asyncio.create_task(run_detached(release.wait, 30))
+        await asyncio.sleep(0.05)
+        task.cancel()
+
+    start = time.monotonic()
+    asyncio.run(main())
+    release.set()
+
+    assert time.monotonic() - start < 5
+
+
+def test_wait_ready_async_times_out():
+    async def main():
+        await wait_ready_async(FakeEnv("down", healthy=False), timeout=0.1)
+
+    with pytest.raises(RuntimeError, match="failed to become ready"):
+        asyncio.run(main())
@@ -0,0 +1,68 @@
+import pytest
+
+from eval.env import frames
+
+np = pytest.importorskip("numpy")
+
+
+@pytest.fixture
+def frame():
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 255, size=(24, 10, 3), dtype=np.uint8)
+
+
+@pytest.mark.parametrize("encoding", [frames.RAW, frames.ZLIB])
+def test_round_trip(frame, encoding):
+    body, headers = frames.encode_frame(frame, encoding)
+
+    decoded = frames.decode_frame(body, headers)
+
+    assert headers[frames.SHAPE_HEADER] == "24,10,3"
+    assert decoded.dtype == np.uint8
+    np.testing.assert_array_equal(decoded, frame)
+
+
+def test_png_round_trip(frame):
+    pytest.importorskip("PIL")
+    body, headers = frames.encode_frame(frame, frames.PNG)
+
+    np.testing.assert_array_equal(frames.decode_frame(body, headers), frame)
+
+
+def test_raw_frames_are_read_only_views(frame):
+    body, headers = frames.encode_frame(frame)
+
+    decoded = frames.decode_frame(body, headers)
+
+    assert not decoded.flags.writeable
+    assert decoded.base is not None
+
+
+def test_zlib_shrinks_flat_frames():
+    flat = np.full((2400, 1080, 3), 245, dtype=np.uint8)
+
+    raw, _ = frames.encode_frame(flat, frames.RAW)
+    compressed, _ = frames.encode_frame(flat, frames.ZLIB)
+
+    assert len(compressed) * 10 < len(raw)
+
+
+def test_unknown_encoding(frame):
+    with pytest.raises(ValueError):
+        frames.encode_frame(frame, "bmp")
+    body, headers = frames.encode_frame(frame)
+    with pytest.raises(ValueError):
+        frames.decode_frame(body, {**headers, frames.ENCODING_HEADER: "bmp"})
+
+
+def test_client_decodes_binary_screenshots(standin, standin_url):
+    from eval.env.client import AndroidEnvClient
+    from eval.env.standin import synthetic_frame
+
+    env = AndroidEnvClient(standin_url, screenshot_encoding=frames.ZLIB)
+    try:
+        screenshot = env.get_screenshot()
+    finally:
+        env.disconnect()
+
+    np.testing.assert_array_equal(screenshot, synthetic_frame())
@@ -0,0 +1,117 @@
+import threading
+import time
+
+import pytest
+
+from eval.llm.gateway import (
+    LLMGateway,
+    RemoteGateway,
+    TokenBucket,
+    estimate_tokens,
+    llm_deadline,
+    seconds_left,
+    serve,
+)
+
+
+def test_bucket_refills_at_its_rate():
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(60)
+    now = bucket._updated
+
+    assert bucket.wait_time(1, now) == pytest.approx(1.0)
+    assert bucket.wait_time(1, now + 1) == 0
+    assert bucket.wait_time(1000, now + 1) == pytest.approx(59.0)
+
+
+def test_bucket_corrections_stay_within_capacity():
+    bucket = TokenBucket(per_minute=60)
+    bucket.take(10)
+    bucket.give_back(100)
+
+    assert bucket.level == 60
+
+
+def test_actual_usage_is_charged_on_release():
+    gateway = LLMGateway(tokens_per_minute=600)
+
+    admission = gateway.acquire(600)
+    gateway.release(admission, tokens=100)
+    started = time.monotonic()
+    gateway.release(gateway.acquire(500))
+
+    assert time.monotonic() - started < 0.5
+    assert gateway.stats.tokens == 600
+
+
+def test_exhausted_budget_delays_requests():
+    gateway = LLMGateway(tokens_per_minute=600)
+    gateway.release(gateway.acquire(600))
+
+    admission = gateway.acquire(2)
+
+    assert admission.waited == pytest.approx(0.2, abs=0.1)
+
+
+def test_earliest_deadline_is_admitted_first():
+    gateway = LLMGateway(max_in_flight=1)
+    running = gateway.acquire(1)
+    admitted = []
+
+    def request(seconds_left):
+        gateway.release(gateway.acquire(1, seconds_left))
+        admitted.append(seconds_left)
+
+    threads = [threading.Thread(target=request, args=(s,)) for s in (None, 100, 10)]
+    for thread in threads:
+        thread.start()
+        time.sleep(0.05)
+    gateway.release(running)
+    for thread in threads:
+        thread.join()
+
+    assert admitted == [10, 100, None]
+    assert gateway.stats.requests == 4
+
+
+def test_unreleased_requests_expire():
+    gateway = LLMGateway(max_in_flight=1, max_request_seconds=0.1)
+    gateway.acquire(1)
+
+    admission = gateway.acquire(1)
+
+    assert admission.waited >= 0.1
+    assert gateway.stats.expired == 1
+
+
+def test_deadline_of_the_current_task():
+    assert seconds_left() is None
+    with llm_deadline(60):
+        assert 59 < seconds_left() <= 60
+    assert estimate_tokens("x" * 400, output_tokens=0) == 100
+
+
+def test_remote_gateway_shares_the_sidecar_budget():
+    gateway = LLMGateway(max_in_flight=1)
+    server = serve(gateway, port=0)
+    host, port = server.server_address
+    try:
+        remote = RemoteGateway(f"http://{host}:{port}")
+        admission = remote.acquire(100)
+        remote.release(admission, tokens=40)
+        remote.release(remote.acquire(100))
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert admission.ticket >= 0
+    assert (gateway.stats.requests, gateway.stats.tokens) == (2, 140)
+
+
+def test_unreachable_gateway_does_not_throttle():
+    remote = RemoteGateway("http://127.0.0.1:9")
+
+    admission = remote.acquire(100)
+    remote.release(admission)
+
+    assert admission.ticket == -1
@@ -0,0 +1,92 @@
+import asyncio
+import subprocess
+import types
+
+import pytest
+
+pytest.importorskip("adbutils")
+
+from eval.portal import keepalive
+from eval.portal.keepalive import OverlayKeepalive
+from eval.portal.probe import compose_probe
+
+
+class OverlayDevice:
+    """Answers overlay checks with the next of `visible_windows`."""
+
+    def __init__(self, *visible_windows: int):
+        self.visible_windows = list(visible_windows)
+        self.checks = 0
+
+    def shell(self, command: str) -> str:
+        self.checks += 1
+        n = self.visible_windows.pop(0) if self.visible_windows else 0
+        script = compose_probe({"overlay_windows": f"echo {n}"})
+        process = subprocess.run(["sh", "-c", script], capture_output=True, text=True)
+        return process.stdout
+
+
+@pytest.fixture
+def devices(monkeypatch):
+    devices = {}
+    adb = types.SimpleNamespace(device=lambda serial: devices[serial])
+    monkeypatch.setattr(keepalive, "adb", adb)
+    return devices
+
+
+def test_one_loop_watches_every_device(devices):
+    devices.update(a=OverlayDevice(1, 0), b=OverlayDevice(0, 0))
+    watcher = OverlayKeepalive(interval=0.01)
+
+    async def main():
+        async with watcher.keep_disabled("a"), watcher.keep_disabled("b"):
+            await asyncio.sleep(0.1)
+            task = watcher._task
+        await asyncio.sleep(0)
+        return task
+
+    task = asyncio.run(main())
+
+    assert task.cancelled() or task.done()
+    assert watcher.stats["a"].drift_detections == 1
+    assert watcher.stats["a"].broadcasts_sent == 1
+    assert watcher.stats["b"].broadcasts_sent == 0
+    assert watcher.total.checks == devices["a"].checks + devices["b"].checks
+
+
+def test_shared_device_is_checked_once_per_round(devices):
+    devices.update(a=OverlayDevice())
+    watcher = OverlayKeepalive(interval=60)
+
+    async def main():
+        async with watcher.keep_disabled("a"):
+            await asyncio.sleep(0.05)
+            async with watcher.keep_disabled("a"):
+                await asyncio.sleep(0.05)
+            # Still watched by the outer task.
+            assert "a" in watcher._devices
+        assert watcher._task is None
+        await watcher.aclose()
+
+    asyncio.run(main())
+
+    assert devices["a"].checks == 1
+
+
+def test_failed_checks_are_counted(devices):
+    class Offline:
+        def shell(self, command):
+            raise RuntimeError("device offline")
+
+    devices.update(a=Offline())
+    watcher = OverlayKeepalive(interval=60)
+
+    async def main():
+        async with watcher.keep_disabled("a"):
+            await asyncio.sleep(0.05)
+        await watcher.aclose()
+
+    asyncio.run(main())
+
+    assert watcher.stats["a"].errors == 1
+    assert watcher.stats["a"].checks == 0
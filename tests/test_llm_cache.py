@@ -0,0 +1,76 @@
+import itertools
+import types
+
+import pytest
+
+from eval.llm import cache
+from eval.llm.cache import LLMCacheStore, request_key
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Makes every `time.time()` of the store one second later."""
+    ticks = itertools.count(1_000_000)
+    monkeypatch.setattr(cache, "time", types.SimpleNamespace(time=lambda: next(ticks)))
+
+
+def message(role, *blocks):
+    return types.SimpleNamespace(role=role, blocks=list(blocks))
+
+
+def text(value):
+    return types.SimpleNamespace(text=value)
+
+
+def image(data):
+    return types.SimpleNamespace(text=None, image=data, block_type="image")
+
+
+def test_store_round_trip(cache_dir):
+    store = LLMCacheStore()
+    store.put("k", {"message": {"role": "assistant", "content": "hi"}})
+
+    assert store.get("k") == {"message": {"role": "assistant", "content": "hi"}}
+    assert store.get("missing") is None
+    assert store.path.parent == cache_dir / "llm"
+    store.close()
+
+
+def test_least_recently_used_entries_are_evicted(tmp_path, clock):
+    value = {"content": "x" * 100}
+    store = LLMCacheStore(tmp_path / "llm.sqlite")
+    store.put("a", value)
+    (entry_size,) = store._db.execute("SELECT size FROM entries").fetchone()
+    store.max_bytes = 2 * entry_size
+    store.put("b", value)
+    store.get("a")
+    store.put("c", value)
+
+    assert len(store) == 2
+    assert store.get("b") is None
+    assert store.get("a") == store.get("c") == value
+    store.close()
+
+
+def test_entries_survive_a_reopen(tmp_path):
+    LLMCacheStore(tmp_path / "llm.sqlite").put("k", {"content": "hi"})
+
+    assert LLMCacheStore(tmp_path / "llm.sqlite").get("k") == {"content": "hi"}
+
+
+def test_request_key_ignores_surrounding_whitespace():
+    messages = [message("user", text("Open the app"))]
+    padded = [message("user", text("  Open the app\n"))]
+
+    assert request_key(messages, "m", 0.0) == request_key(padded, "m", 0.0)
+    assert request_key(messages, "m", 0.0) != request_key(messages, "m", 0.5)
+    assert request_key(messages, "m", 0.0) != request_key(messages, "other", 0.0)
+
+
+def test_request_key_hashes_image_content():
+    first = [message("user", text("Screen"), image(b"png-1"))]
+    same = [message("user", text("Screen"), image(b"png-1"))]
+    other = [message("user", text("Screen"), image(b"png-2"))]
+
+    assert request_key(first, "m", None) == request_key(same, "m", None)
+    assert request_key(first, "m", None) != request_key(other, "m", None)
@@ -0,0 +1,61 @@
+from eval.loop_detector import LoopDetector, state_hash
+
+SCREEN = {"a11y_tree": [{"text": "Save"}], "phone_state": {"time": "10:00"}}
+
+
+def tap(detector, index=0, state=SCREEN):
+    detector.observe_state(state)
+    detector.record_action("tap_by_index", (index,), {})
+
+
+def test_repeated_action_on_the_same_screen_is_stuck():
+    detector = LoopDetector(max_repeats=3)
+    calls = []
+    detector.on_stuck = lambda: calls.append(detector.reason)
+
+    for _ in range(4):
+        tap(detector)
+
+    assert detector.stuck
+    assert "tap_by_index(0,)" in detector.reason
+    assert len(calls) == 1
+
+
+def test_screen_change_resets_the_count():
+    detector = LoopDetector(max_repeats=3)
+
+    tap(detector)
+    tap(detector)
+    tap(detector, state={"a11y_tree": [{"text": "Saved"}]})
+    tap(detector)
+
+    assert not detector.stuck
+    assert detector.repeats == 1
+
+
+def test_other_action_resets_the_count():
+    detector = LoopDetector(max_repeats=3)
+
+    tap(detector)
+    tap(detector)
+    tap(detector, index=1)
+
+    assert not detector.stuck
+
+
+def test_actions_without_a_fresh_state_read_are_ignored():
+    detector = LoopDetector(max_repeats=2)
+    detector.observe_state(SCREEN)
+
+    for _ in range(5):
+        detector.record_action("swipe", (), {"direction": "down"})
+
+    assert not detector.stuck
+    assert detector.repeats == 1
+
+
+def test_state_hash_ignores_everything_but_the_tree():
+    later = {**SCREEN, "phone_state": {"time": "10:01"}}
+
+    assert state_hash(SCREEN) == state_hash(later)
+    assert state_hash(SCREEN) != state_hash({"a11y_tree": []})
@@ -0,0 +1,90 @@
+import json
+
+import pytest
+
+from eval.manifest import RunConfig, RunManifest, iter_write_timings
+from eval.tracker import track_task
+
+CONFIG = RunConfig("android_world", 42, 1, "OpenAI", "gpt-4o", 0.0)
+
+
+def result(task_idx, error=None):
+    res = track_task(0, "ContactsAddContact", task_idx, "", 10)
+    res.error = error
+    return res
+
+
+@pytest.fixture
+def started(tmp_path):
+    manifest = RunManifest(CONFIG, root=tmp_path).start()
+    manifest.record(result(0))
+    manifest.record(result(1, error="device offline"))
+    return manifest
+
+
+def test_run_id_depends_on_the_whole_config():
+    same = RunConfig("android_world", 42, 1, "OpenAI", "gpt-4o", 0.0)
+    other = RunConfig("android_world", 42, 1, "OpenAI", "gpt-4o", 0.5)
+
+    assert CONFIG.run_id == same.run_id != other.run_id
+    assert CONFIG.run_id.startswith("android_world-seed42-n1-")
+
+
+def test_resume_skips_finished_instances(tmp_path, started):
+    resumed = RunManifest(CONFIG, root=tmp_path).start(resume=True)
+
+    assert resumed.is_finished("ContactsAddContact", 0)
+    assert not resumed.is_finished("ContactsAddContact", 1)
+    assert json.loads(resumed.path.read_text())["resumed"]
+
+
+def test_cut_off_log_line_is_ignored(tmp_path, started):
+    with open(started.log_path, "a") as f:
+        f.write('{"task_name": "ContactsAddCon')
+
+    resumed = RunManifest(CONFIG, root=tmp_path).start(resume=True)
+
+    assert resumed.finished == {("ContactsAddContact", 0)}
+
+
+def test_finished_instances_are_kept_unless_restarting(tmp_path, started):
+    with pytest.raises(RuntimeError):
+        RunManifest(CONFIG, root=tmp_path).start()
+    assert RunManifest(CONFIG, root=tmp_path).start(resume=True).finished
+
+    restarted = RunManifest(CONFIG, root=tmp_path).start(restart=True)
+
+    assert not restarted.finished
+    assert restarted.log_path.read_text() == ""
+
+
+def test_only_the_first_worker_writes_the_manifest(tmp_path, started):
+    started.path.unlink()
+    first = RunManifest(CONFIG, root=tmp_path).join()
+    first.update(workers=1)
+
+    second = RunManifest(CONFIG, root=tmp_path).join()
+
+    assert second.finished == {("ContactsAddContact", 0)}
+    assert json.loads(second.path.read_text())["workers"] == 1
+
+
+def test_skipped_instances_are_listed(started):
+    started.record_skipped({("ContactsAddContact", 2): "too long"})
+
+    manifest = json.loads(started.path.read_text())
+
+    assert manifest["skipped"] == [
+        {"task_name": "ContactsAddContact", "task_idx": 2, "reason": "too long"}
+    ]
+    assert not started.is_finished("ContactsAddContact", 2)
+
+
+def test_write_times_are_logged(tmp_path, started):
+    res = result(3)
+    res.phases["write"] = 0.25
+    started.record(res)
+
+    timings = list(iter_write_timings(tmp_path))
+
+    assert timings == [{"task_name": "ContactsAddContact", "phases": {"write": 0.25}}]
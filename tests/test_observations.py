@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+
+from eval.env.observations import (
+    ObservationCache,
+    apply_element_delta,
+    content_hash,
+)
+
+
+def test_apply_element_delta():
+    base = [{"text": "a"}, {"text": "b"}, {"text": "c"}]
+
+    changed = apply_element_delta(
+        base, {"base": "h", "length": 4, "changed": [[1, {"text": "B"}], [3, {}]]}
+    )
+    shorter = apply_element_delta(base, {"base": "h", "length": 2, "changed": []})
+
+    assert changed == [{"text": "a"}, {"text": "B"}, {"text": "c"}, {}]
+    assert shorter == base[:2]
+    assert base[1] == {"text": "b"}
+
+
+def test_apply_element_delta_must_cover_new_elements():
+    with pytest.raises(ValueError):
+        apply_element_delta([{}], {"base": "h", "length": 3, "changed": [[2, {}]]})
+
+
+def test_observation_cache_evicts_least_recently_used():
+    cache = ObservationCache(maxsize=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert (cache.get("a"), cache.get("b"), cache.get("c")) == (1, None, 3)
+    assert len(cache) == 2
+
+
+def test_disabled_observation_cache_keeps_nothing():
+    cache = ObservationCache(maxsize=0)
+    cache.put("a", 1)
+
+    assert cache.get("a") is None
+
+
+def test_content_hash_is_an_etag():
+    assert content_hash(b"x") == content_hash(b"x") != content_hash(b"y")
+    assert content_hash(b"x").startswith('"')
+
+
+def test_unchanged_screens_are_served_from_the_cache(standin, standin_url):
+    from eval.env.client import AsyncAndroidEnvClient
+
+    async def screenshots():
+        async with AsyncAndroidEnvClient(standin_url) as env:
+            first = await env.get_screenshot()
+            again = await env.get_screenshot()
+            standin.RequestHandlerClass.env.advance()
+            return first, again, await env.get_screenshot()
+
+    first, again, changed = asyncio.run(screenshots())
+
+    assert again is first
+    assert changed is not first
+    assert not first.flags.writeable
+
+
+def test_elements_are_rebuilt_from_deltas(standin, standin_url):
+    from eval.env.client import AsyncAndroidEnvClient
+
+    server_env = standin.RequestHandlerClass.env
+
+    async def elements(deltas: bool):
+        async with AsyncAndroidEnvClient(standin_url, element_deltas=deltas) as env:
+            await env._get_raw_elements(False)
+            server_env.advance()
+            _, raw = await env._get_raw_elements(False)
+            return raw
+
+    assert asyncio.run(elements(deltas=True)) == server_env.elements
+    assert asyncio.run(elements(deltas=False)) == server_env.elements
@@ -0,0 +1,78 @@
+from eval.env.catalog import SuiteCatalog, TaskInstanceInfo
+from eval.ordering import (
+    DurationEstimator,
+    estimate_makespan,
+    order_longest_first,
+    result_seconds,
+    task_app,
+)
+from eval.pipeline import WorkItem
+
+COMPLEXITIES = {
+    "ContactsAddContact": 1.0,
+    "MarkorCreateNote": 2.0,
+    "SimpleSmsReply": 4.0,
+}
+
+
+def catalog() -> SuiteCatalog:
+    return SuiteCatalog(
+        "android_world",
+        42,
+        1,
+        "f1",
+        task_list=list(COMPLEXITIES),
+        instances={
+            name: [TaskInstanceInfo("", complexity, "")]
+            for name, complexity in COMPLEXITIES.items()
+        },
+    )
+
+
+def past_run(task_name, seconds):
+    return {"task_name": task_name, "phases": {"agent_run": seconds, "write": 5.0}}
+
+
+def test_task_app():
+    assert task_app("MarkorCreateNote") == "Markor"
+    assert task_app("SimpleSmsReply") == "Simple"
+
+
+def test_result_seconds_leaves_out_the_write():
+    assert result_seconds(past_run("MarkorCreateNote", 30.0)) == 30.0
+    assert result_seconds({"execution_time": 12.0}) == 12.0
+
+
+def test_estimates_from_history_and_calibrated_complexity():
+    results = [
+        past_run("ContactsAddContact", 40.0),
+        past_run("ContactsAddContact", 60.0),
+        past_run("ContactsAddContact", 200.0),
+    ]
+    estimator = DurationEstimator(results, catalog())
+
+    assert estimator.estimate(WorkItem(0, "ContactsAddContact", 0)) == 60.0
+    assert estimator.seconds_per_complexity == 60.0
+    assert estimator.estimate(WorkItem(2, "SimpleSmsReply", 0)) == 240.0
+
+
+def test_longest_first_spreads_apps_among_ties():
+    items = [WorkItem(0, name, i) for name in ("MarkorA", "MarkorB") for i in range(2)]
+    items += [WorkItem(1, "ContactsA", i) for i in range(2)]
+    items.append(WorkItem(2, "SimpleSmsReply", 0))
+    estimates = {item: 10.0 for item in items}
+    estimates[WorkItem(2, "SimpleSmsReply", 0)] = 100.0
+
+    ordered = order_longest_first(items, estimates, seed=1)
+
+    assert ordered[0] == WorkItem(2, "SimpleSmsReply", 0)
+    apps = [task_app(item.task_name) for item in ordered[1:4]]
+    assert sorted(apps[:2]) == ["Contacts", "Markor"]
+    assert order_longest_first(items, estimates, seed=1) == ordered
+
+
+def test_longest_first_shortens_the_makespan():
+    durations = [10, 10, 10, 10, 30]
+
+    assert estimate_makespan(durations, 2) == 50
+    assert estimate_makespan(sorted(durations, reverse=True), 2) == 40
@@ -0,0 +1,131 @@
+import asyncio
+import time
+from collections import deque
+
+from eval.pipeline import ResultWriter, TaskOptions, TaskPipeline, WorkItem
+from eval.tracker import track_task
+
+OPTIONS = TaskOptions(1, 1, False, False, False, False, False)
+
+
+class FakePipeline(TaskPipeline):
+    """Prepares and runs items after short delays and logs what it does."""
+
+    def __init__(self, prepare_seconds=None, run_seconds=0.05, **kwargs):
+        self.written = []
+        writer = ResultWriter(self.written.append)
+        super().__init__(None, "emulator-5554", None, OPTIONS, writer=writer, **kwargs)
+        # Seconds to prepare each item by index, 0.05 if not listed.
+        self.prepare_seconds = prepare_seconds or {}
+        self.run_seconds = run_seconds
+        self.log = []
+
+    async def prepare(self, item):
+        self.log.append(("prepare", item.task_idx, time.monotonic()))
+        try:
+            await asyncio.sleep(self.prepare_seconds.get(item.task_idx, 0.05))
+        except asyncio.CancelledError:
+            self.log.append(("cancelled", item.task_idx, time.monotonic()))
+            raise
+        return item
+
+    async def _boot_check(self):
+        return None
+
+    async def execute(self, item, preparing):
+        await preparing
+        self.log.append(("run", item.task_idx, time.monotonic()))
+        await asyncio.sleep(self.run_seconds)
+        self.log.append(("done", item.task_idx, time.monotonic()))
+        return track_task(item.task_id, item.task_name, item.task_idx, "", 1), None
+
+
+def items(n):
+    return [WorkItem(0, "ContactsAddContact", i) for i in range(n)]
+
+
+def events(pipeline, kind):
+    return {idx: at for event, idx, at in pipeline.log if event == kind}
+
+
+def test_next_item_is_prepared_while_the_current_one_runs():
+    pipeline = FakePipeline()
+    queue = deque(items(3))
+
+    async def main():
+        async def claim():
+            while queue:
+                yield queue.popleft()
+
+        return await pipeline.run(claim(), peek=lambda: queue[0] if queue else None)
+
+    results = asyncio.run(main())
+
+    assert [r.task_idx for r in results] == [0, 1, 2]
+    assert [r.task_idx for r in pipeline.written] == [0, 1, 2]
+    prepared, done = events(pipeline, "prepare"), events(pipeline, "done")
+    assert prepared[1] < done[0]
+    assert prepared[2] < done[1]
+
+
+def test_next_item_is_claimed_only_once_the_device_is_free():
+    pipeline = FakePipeline()
+    queue = deque(items(2))
+    claimed = []
+
+    async def main():
+        async def claim():
+            while queue:
+                claimed.append(time.monotonic())
+                yield queue.popleft()
+
+        await pipeline.run(claim(), peek=lambda: queue[0] if queue else None)
+
+    asyncio.run(main())
+
+    assert claimed[1] >= events(pipeline, "done")[0]
+
+
+def test_preparation_of_a_stolen_item_is_discarded():
+    pipeline = FakePipeline(prepare_seconds={1: 10})
+    queue = deque(items(3))
+
+    async def main():
+        async def claim():
+            yield queue.popleft()
+            await asyncio.sleep(0.1)
+            # Another device took item 1 meanwhile.
+            queue.popleft()
+            while queue:
+                yield queue.popleft()
+
+        return await pipeline.run(claim(), peek=lambda: queue[0] if queue else None)
+
+    results = asyncio.run(main())
+
+    assert [r.task_idx for r in results] == [0, 2]
+    assert 1 in events(pipeline, "cancelled")
+
+
+def test_skipped_items_do_not_run():
+    pipeline = FakePipeline()
+    pipeline.on_start = lambda item: "too long" if item.task_idx == 1 else None
+
+    results = asyncio.run(pipeline.run(items(3)))
+
+    assert [r.task_idx for r in results] == [0, 2]
+    assert 1 not in events(pipeline, "run")
+
+
+def test_stop_after_the_current_item():
+    pipeline = FakePipeline()
+
+    async def main():
+        async def claim():
+            for item in items(3):
+                yield item
+                pipeline.stop()
+
+        return await pipeline.run(claim())
+
+    assert [r.task_idx for r in asyncio.run(main())] == [0]
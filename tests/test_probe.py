@@ -0,0 +1,93 @@
+import subprocess
+
+from eval.portal.probe import (
+    DEFAULT_QUERIES,
+    DeviceStatus,
+    compose_probe,
+    parse_probe_output,
+    probe_device,
+    run_probe,
+)
+
+
+class ShellDevice:
+    """Runs adb shell commands in the local shell and counts the calls."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def shell(self, command: str) -> str:
+        self.calls += 1
+        return subprocess.run(
+            ["sh", "-c", command], capture_output=True, text=True
+        ).stdout
+
+
+def test_composed_probe_runs_in_one_shell_call():
+    device = ShellDevice()
+
+    results = run_probe(
+        device,
+        {
+            "lines": "echo one; echo two",
+            "empty": "true",
+            "failing": "echo partial; ls /does-not-exist",
+            "last": "echo 1",
+        },
+    )
+
+    assert results == {
+        "lines": "one\ntwo",
+        "empty": "",
+        "failing": "partial",
+        "last": "1",
+    }
+    assert device.calls == 1
+
+
+def test_parse_ignores_output_before_the_first_marker():
+    output = ShellDevice().shell("echo motd; " + compose_probe({"a": "echo x"}))
+
+    assert parse_probe_output(output) == {"a": "x"}
+
+
+def test_device_status_from_results():
+    status = DeviceStatus.from_results(
+        {
+            "boot_id": "b1",
+            "boot_completed": "1",
+            "portal_version": "versionName=0.4.1",
+            "a11y_enabled": "1",
+            "a11y_services": "com.droidrun.portal/.Service:com.google/.Forwarder",
+            "portal_content": "1",
+            "overlay_offset": "0",
+            "overlay_windows": "2",
+        }
+    )
+
+    assert status.boot_completed and status.portal_content_ok
+    assert status.portal_version == "0.4.1"
+    assert status.has_a11y_service("com.droidrun.portal/.Service")
+    assert status.overlay_offset_set is True
+    assert status.overlay_visible is True
+
+
+def test_device_status_of_a_device_without_portal():
+    status = DeviceStatus.from_results(
+        {"portal_version": "", "a11y_enabled": "0", "portal_content": "error"}
+    )
+
+    assert status.portal_version == ""
+    assert not status.portal_content_ok
+    assert not status.has_a11y_service("com.droidrun.portal/.Service")
+    assert status.overlay_offset_set is None
+    assert status.overlay_visible is None
+
+
+def test_probe_device_runs_every_query_at_once():
+    device = ShellDevice()
+
+    status = probe_device(device, overlay_offset=-126, hide_overlay=True)
+
+    assert device.calls == 1
+    assert set(status.raw) == {*DEFAULT_QUERIES, "overlay_offset", "hide_overlay"}
@@ -0,0 +1,136 @@
+import asyncio
+
+from eval.errors import INFRASTRUCTURE
+from eval.pipeline import ResultWriter, TaskOptions, TaskPipeline, WorkItem
+from eval.scheduler import DeviceScheduler, WorkStealingQueue
+from eval.tracker import track_task
+
+OPTIONS = TaskOptions(1, 1, False, False, False, False, False)
+
+
+class FakePipeline(TaskPipeline):
+    """Runs items after a short delay, failing those `fails` picks."""
+
+    def __init__(self, device, fails=lambda item: False, run_seconds=0.01):
+        self.written = []
+        writer = ResultWriter(self.written.append)
+        super().__init__(None, device, None, OPTIONS, writer=writer)
+        self.fails = fails
+        self.run_seconds = run_seconds
+        self.ran = []
+
+    async def prepare(self, item):
+        return item
+
+    async def _boot_check(self):
+        return None
+
+    async def execute(self, item, preparing):
+        await preparing
+        await asyncio.sleep(self.run_seconds)
+        if self.fails(item):
+            return None, ConnectionError(f"{self.device_serial} went offline")
+        self.ran.append(item.task_idx)
+        res = track_task(item.task_id, item.task_name, item.task_idx, "", 1)
+        res.device = self.device_serial
+        return res, None
+
+
+def items(n):
+    return [WorkItem(0, "ContactsAddContact", i) for i in range(n)]
+
+
+def test_items_are_dealt_round_robin():
+    queue = WorkStealingQueue(["a", "b"])
+    queue.put_all(items(4))
+
+    assert [queue.get("a").task_idx, queue.get("a").task_idx] == [0, 2]
+    assert queue.get("b").task_idx == 1
+    assert queue.steals == 0
+
+
+def test_idle_device_steals_from_the_back_of_the_fullest():
+    queue = WorkStealingQueue(["a", "b", "c"])
+    queue.put_all(items(7))
+
+    assert [queue.get("c").task_idx, queue.get("c").task_idx] == [2, 5]
+    assert queue.peek("c") == queue.get("c") == WorkItem(0, "ContactsAddContact", 6)
+    assert queue.steals == 1
+
+
+def test_requeue_avoids_the_failed_device():
+    queue = WorkStealingQueue(["a", "b"])
+    item = WorkItem(0, "ContactsAddContact", 9)
+
+    queue.requeue(item, avoid="a")
+
+    assert queue.get("b") == item
+    assert queue.get("a") is None
+
+
+def test_items_of_a_removed_device_wait_for_one_to_join():
+    queue = WorkStealingQueue(["a"])
+    queue.put_all(items(2))
+
+    queue.remove_device("a")
+    assert len(queue) == 2 and queue.get("a") is None
+    queue.add_device("b")
+
+    assert [queue.get("b").task_idx, queue.get("b").task_idx] == [0, 1]
+
+
+def test_scheduler_runs_every_item_once():
+    pipelines = {d: FakePipeline(d) for d in ("a", "b")}
+    scheduler = DeviceScheduler(pipelines)
+
+    results = asyncio.run(scheduler.run(items(10)))
+
+    assert sorted(r.task_idx for r in results) == list(range(10))
+    assert pipelines["a"].ran and pipelines["b"].ran
+    assert scheduler.done == 10
+
+
+def test_failing_device_is_quarantined_and_its_items_retried():
+    pipelines = {
+        "good": FakePipeline("good"),
+        "bad": FakePipeline("bad", fails=lambda item: True),
+    }
+    scheduler = DeviceScheduler(pipelines, max_consecutive_failures=2)
+
+    results = asyncio.run(scheduler.run(items(6)))
+
+    assert sorted(r.task_idx for r in results) == list(range(6))
+    assert all(r.device == "good" for r in results)
+    assert scheduler.health["bad"].quarantined
+    assert not scheduler.health["good"].quarantined
+    assert not scheduler.dropped
+
+
+def test_item_failing_everywhere_does_not_quarantine_devices():
+    broken = WorkItem(0, "ContactsAddContact", 0)
+    pipelines = {d: FakePipeline(d, fails=lambda item: item == broken) for d in "ab"}
+    scheduler = DeviceScheduler(pipelines, max_consecutive_failures=2, max_retries=2)
+
+    results = asyncio.run(scheduler.run(items(4)))
+
+    assert scheduler.dropped == [broken]
+    assert scheduler.retries[broken] == 2
+    (error,) = [r for r in results if r.error]
+    assert error.task_idx == 0 and error.error_kind == INFRASTRUCTURE
+    assert not any(h.quarantined for h in scheduler.health.values())
+
+
+def test_late_device_joins_the_run():
+    pipelines = {"a": FakePipeline("a", run_seconds=0.05)}
+    late = FakePipeline("late", run_seconds=0.05)
+
+    async def joining():
+        await asyncio.sleep(0.1)
+        yield "late", late
+
+    scheduler = DeviceScheduler(pipelines)
+    results = asyncio.run(scheduler.run(items(10), joining=joining()))
+
+    assert sorted(r.task_idx for r in results) == list(range(10))
+    assert late.ran
+    assert scheduler.queue.steals > 0
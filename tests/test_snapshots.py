@@ -0,0 +1,51 @@
+import asyncio
+
+import numpy as np
+import pytest
+
+from eval.env.client import AndroidEnvClient
+from eval.env.snapshots import SnapshotManager
+
+
+@pytest.fixture
+def env(standin, standin_url):
+    env = AndroidEnvClient(standin_url)
+    yield env
+    env.disconnect()
+
+
+def test_restore_returns_to_the_saved_screen(standin, env):
+    snapshots = SnapshotManager()
+    clean = env.get_screenshot()
+
+    async def main():
+        await snapshots.save(env)
+        standin.RequestHandlerClass.env.advance()
+        changed = await env.aio.get_screenshot()
+        elapsed = await snapshots.restore(env)
+        return changed, elapsed, await env.aio.get_screenshot()
+
+    changed, elapsed, restored = asyncio.run(main())
+
+    assert not np.array_equal(changed, clean)
+    assert np.array_equal(restored, clean)
+    assert elapsed > 0
+
+
+def test_restore_without_a_snapshot_fails(env):
+    snapshots = SnapshotManager()
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(snapshots.restore(env))
+
+
+def test_failed_restore_forgets_the_snapshot(env):
+    snapshots = SnapshotManager()
+    asyncio.run(snapshots.save(env))
+    assert snapshots.is_saved(env)
+    snapshots.name = "missing"
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(snapshots.restore(env))
+
+    assert not snapshots.is_saved(env)
@@ -0,0 +1,50 @@
+import pytest
+
+from eval.startup import (
+    CLI_MODULE,
+    HEAVY_PACKAGES,
+    check_startup,
+    measure_imports,
+    parse_import_times,
+)
+
+IMPORT_TIMES = """\
+import time: self [us] | cumulative | imported package
+import time:      1200 |       1200 |   click.core
+import time:       800 |       2000 | click
+import time:      3000 |       3000 |     PIL.Image
+import time:       500 |       3500 |   adbutils
+import time:       100 |       5600 | eval.cli
+"""
+
+
+def test_parse_import_times():
+    profile = parse_import_times(IMPORT_TIMES)
+
+    assert profile.packages == {"click": 2.0, "PIL": 3.0, "adbutils": 0.5, "eval": 0.1}
+    assert profile.imported(["PIL", "numpy", "adbutils"]) == ["PIL", "adbutils"]
+
+
+def test_check_startup_reports_heavy_packages_and_budget():
+    profile = parse_import_times(IMPORT_TIMES)
+
+    problems = check_startup(profile, max_ms=1.0)
+
+    assert problems == [
+        f"{CLI_MODULE} imports PIL at module load",
+        f"{CLI_MODULE} imports adbutils at module load",
+        f"Importing {CLI_MODULE} takes 6 ms, the budget is 1 ms",
+    ]
+    assert check_startup(profile, heavy_packages=["numpy"]) == []
+
+
+def test_cli_starts_without_heavy_packages():
+    # The CLI itself needs these; the heavy packages may be missing.
+    for module in ("click", "httpx", "pydantic"):
+        pytest.importorskip(module)
+
+    profile = measure_imports()
+
+    assert profile.imported(HEAVY_PACKAGES) == []
+    # Timing is left to `droidworld startup-check`, CI machines vary too much.
+    assert check_startup(profile, max_ms=float("inf")) == []
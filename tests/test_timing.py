@@ -0,0 +1,80 @@
+import asyncio
+import subprocess
+import sys
+
+import pytest
+
+from eval.timing import PhaseTimer, StepTimer, summarize_timings, timed_tool
+
+
+def test_phases_add_up():
+    timer = PhaseTimer()
+    timer.record("reset", 1.0)
+    timer.record("reset", 0.5)
+    with timer.phase("agent_run"):
+        pass
+
+    assert timer.phases["reset"] == 1.5
+    assert timer.phases["agent_run"] >= 0
+
+
+def test_tools_count_towards_the_last_llm_step():
+    timer = StepTimer()
+    timer.add_tool(0.5)
+    timer.llm_started()
+    timer.llm_queued(0.25)
+    # A caching LLM calling the provider's is one call.
+    timer.llm_started()
+    timer.llm_ended()
+    timer.llm_ended()
+    timer.add_tool(1.0)
+    timer.add_tool(2.0)
+
+    assert [step["tools"] for step in timer.steps] == [0.5, 3.0]
+    assert timer.steps[1]["llm_queue"] == 0.25
+    assert len(timer.steps) == 2
+
+
+def test_timed_tool_records_sync_and_async_calls():
+    calls = []
+
+    def tap(index):
+        return index
+
+    async def swipe():
+        return "swiped"
+
+    assert timed_tool(tap, calls.append)(3) == 3
+    assert asyncio.run(timed_tool(swipe, calls.append)()) == "swiped"
+    assert len(calls) == 2
+
+
+def test_summary_per_task_and_metric():
+    pytest.importorskip("numpy")
+    results = [
+        {
+            "task_name": "ContactsAddContact",
+            "phases": {"agent_run": seconds, "reset": 1.0},
+            "step_timings": [{"llm": 2.0, "tools": 0.5}],
+        }
+        for seconds in (10.0, 20.0, 30.0)
+    ]
+
+    summary = summarize_timings(results, percentiles=(50,))
+
+    metrics = summary["ContactsAddContact"]
+    assert list(metrics) == ["reset", "agent_run", "step_llm", "step_tools"]
+    assert metrics["agent_run"] == {"n": 3, "p50": 20.0}
+
+
+def test_timing_imports_no_heavy_packages():
+    check = (
+        "import sys, eval.timing;"
+        " print(sorted({'numpy', 'llama_index'} & set(sys.modules)))"
+    )
+
+    process = subprocess.run(
+        [sys.executable, "-c", check], capture_output=True, text=True
+    )
+
+    assert process.stdout.strip() == "[]", process.stderr
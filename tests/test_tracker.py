@@ -0,0 +1,54 @@
+import json
+from pathlib import Path
+
+import pytest
+
+from eval.tracker import OUTPUT_DIR, iter_task_results, track_task, write_task_result
+
+
+@pytest.fixture(autouse=True)
+def output_dir(tmp_path, monkeypatch):
+    """Runs each test in its own directory, results go to its `OUTPUT_DIR`."""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.delenv("DISCORD_WEBHOOK_URL", raising=False)
+    return tmp_path / OUTPUT_DIR
+
+
+def result(task_idx: int = 0):
+    res = track_task(3, "ContactsAddContact", task_idx, "Add a contact", 10)
+    res.phases = {"reset": 1.5, "agent_run": 12.25}
+    return res
+
+
+def test_write_phase_is_timed_outside_the_file(output_dir):
+    res = result()
+    res.final_thought = "\0phases.write\0"
+
+    assert write_task_result(res)
+
+    path = output_dir / "ContactsAddContact" / "0" / "result.json"
+    written = json.loads(path.read_text())
+    assert res.phases["write"] > 0
+    assert written["phases"] == {"reset": 1.5, "agent_run": 12.25}
+    assert written["final_thought"] == res.final_thought
+    assert list(path.parent.iterdir()) == [path]
+
+
+def test_written_results_are_read_back(output_dir):
+    for task_idx in range(3):
+        write_task_result(result(task_idx))
+
+    results = list(iter_task_results())
+
+    assert [r["task_idx"] for r in results] == [0, 1, 2]
+    assert all(set(r["phases"]) == {"reset", "agent_run"} for r in results)
+
+
+def test_failed_write_is_reported(output_dir):
+    path = Path(output_dir, "ContactsAddContact", "0", "result.json")
+    path.mkdir(parents=True)
+    res = result()
+
+    assert not write_task_result(res)
+    assert "write" not in res.phases
+    assert list(path.parent.iterdir()) == [path]